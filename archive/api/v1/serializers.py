@@ -0,0 +1,36 @@
+from rest_framework import serializers
+
+from archive.exporters import (CONTENT_TYPES, FORMATS, ContentExporter,
+                               parse_datetime_bound)
+
+
+class ContentExportParamsSerializer(serializers.Serializer):
+    type = serializers.ListField(child=serializers.ChoiceField(choices=CONTENT_TYPES), required=False)
+    output = serializers.ChoiceField(choices=FORMATS, default='ndjson')
+    created_after = serializers.CharField(required=False)
+    created_before = serializers.CharField(required=False)
+    tag = serializers.SlugField(required=False)
+
+    def validate_date_bound(self, value):
+        try:
+            return parse_datetime_bound(value)
+        except ValueError as e:
+            raise serializers.ValidationError(str(e))
+
+    validate_created_after = validate_created_before = validate_date_bound
+
+    def validate(self, attrs):
+        attrs['type'] = attrs.get('type') or list(CONTENT_TYPES)
+        if attrs['output'] == 'csv' and len(set(attrs['type'])) != 1:
+            raise serializers.ValidationError({'type': 'Csv exports are limited to a single content type.'})
+
+        return attrs
+
+    def get_exporter(self) -> ContentExporter:
+        data = self.validated_data
+        return ContentExporter(
+            content_types=data['type'],
+            created_after=data.get('created_after'),
+            created_before=data.get('created_before'),
+            tag=data.get('tag')
+        )
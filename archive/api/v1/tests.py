@@ -0,0 +1,239 @@
+import csv
+import json
+import os
+import tempfile
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.asgi import get_asgi_application
+from django.core.management import call_command
+from django.core.signals import request_finished, request_started
+from django.db import close_old_connections
+from django.utils import timezone
+
+from asgiref.sync import async_to_sync
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.reverse import reverse as api_reverse
+from rest_framework.test import APIClient, APITestCase
+
+from comments.models import Comment
+from questans.models import Answer, Question, QuestionSignatureBand, Tag
+from search.models import SearchDocument
+from votes.models import Vote
+
+User = get_user_model()
+
+
+class ArchiveAPITestCase(APITestCase):
+
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.export_url = api_reverse('Archive_API_v1:export')
+
+        self.test_user = User.objects.create_user(
+            email='eren.yaeger@test.com',
+            password='Password@001',
+            first_name='eren',
+            last_name='yaeger',
+            username='mr_freedom'
+        )
+        self.test_staff_user = User.objects.create_user(
+            email='erwin.smith@test.com',
+            password='Password@001',
+            first_name='erwin',
+            last_name='smith',
+            username='commander',
+            is_staff=True
+        )
+        self.test_question = Question.objects.create(
+            user=self.test_user,
+            title='How do titans work?',
+            description='Where do they come from and why are they so big?'
+        )
+        self.test_question.set_tags(['titans'], is_new=True)
+        self.test_answer = Answer.objects.create(
+            user=self.test_user,
+            question=self.test_question,
+            content='Nobody really knows, "yet".'
+        )
+        self.test_other_question = Question.objects.create(
+            user=self.test_user,
+            title='Who built the walls?',
+            description='There are three of them.'
+        )
+        self.test_other_question.set_tags(['walls'], is_new=True)
+        self.test_comments = [
+            Comment.objects.create(user=self.test_user, content_object=self.test_answer, content='Someone knows.'),
+            Comment.objects.create(user=self.test_user, content_object=self.test_other_question, content='The king.')
+        ]
+
+    def export(self, **params):
+        test_response = self.client.get(path=self.export_url, data=params)
+        self.assertEqual(test_response.status_code, status.HTTP_200_OK)
+        return b''.join(test_response.streaming_content).decode()
+
+    def test_export_is_staff_only(self):
+        self.assertEqual(self.client.get(path=self.export_url).status_code, status.HTTP_401_UNAUTHORIZED)
+        self.client.force_authenticate(self.test_user)
+        self.assertEqual(self.client.get(path=self.export_url).status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_export_ndjson(self):
+        self.client.force_authenticate(self.test_staff_user)
+        test_records = [json.loads(line) for line in self.export().splitlines()]
+        self.assertEqual(
+            [(record['type'], record['id']) for record in test_records],
+            [('question', self.test_question.pk), ('question', self.test_other_question.pk),
+             ('answer', self.test_answer.pk), *[('comment', test_comment.pk) for test_comment in self.test_comments]]
+        )
+        self.assertEqual(test_records[0]['tags'], ['titans'])
+        self.assertEqual(test_records[0]['user'], 'mr_freedom')
+        self.assertEqual(test_records[2]['question'], self.test_question.pk)
+        self.assertEqual((test_records[3]['object_type'], test_records[3]['object_id']), ('answer', self.test_answer.pk))
+
+        # the tagged questions, their answers and the comments on both
+        test_records = [json.loads(line) for line in self.export(tag='titans').splitlines()]
+        self.assertEqual([record['type'] for record in test_records], ['question', 'answer', 'comment'])
+
+        test_records = self.export(type='comment', created_after=(timezone.now() + timedelta(days=1)).date())
+        self.assertEqual(test_records, '')
+        test_records = self.export(type=['question', 'answer'], created_before=timezone.now().isoformat())
+        self.assertEqual(len(test_records.splitlines()), 3)
+
+        test_response = self.client.get(path=self.export_url, data={'created_after': 'yesterday'})
+        self.assertEqual(test_response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_export_csv(self):
+        self.client.force_authenticate(self.test_staff_user)
+        test_rows = list(csv.DictReader(StringIO(self.export(type='answer', output='csv'))))
+        self.assertEqual(len(test_rows), 1)
+        self.assertEqual(test_rows[0]['content'], self.test_answer.content)
+        self.assertEqual(test_rows[0]['question'], str(self.test_question.pk))
+
+        test_response = self.client.get(path=self.export_url, data={'output': 'csv'})
+        self.assertEqual(test_response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_export_asgi(self):
+        # served by the deployment's ASGI handler (see scripts/run.sh), which iterates the response's content on the
+        # event loop, unlike the test client
+        test_token = Token.objects.create(user=self.test_staff_user)
+        test_scope = {
+            'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'scheme': 'http', 'method': 'GET',
+            'path': self.export_url, 'query_string': b'type=question&type=answer', 'server': ('testserver', 80),
+            'client': ('127.0.0.1', 0),
+            'headers': [(b'host', b'testserver'), (b'authorization', f'Token {test_token.key}'.encode())]
+        }
+        test_messages = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+        async def send(message):
+            test_messages.append(message)
+
+        # the handler would close the test's connection (in its transaction) like it closes old connections,
+        # which the test client prevents the same way
+        request_started.disconnect(close_old_connections)
+        request_finished.disconnect(close_old_connections)
+        try:
+            async_to_sync(get_asgi_application())(test_scope, receive, send)
+        finally:
+            request_started.connect(close_old_connections)
+            request_finished.connect(close_old_connections)
+
+        self.assertEqual(test_messages[0]['status'], status.HTTP_200_OK)
+        test_body = b''.join(message.get('body', b'') for message in test_messages[1:]).decode()
+        self.assertEqual(
+            [(record['type'], record['id']) for record in map(json.loads, test_body.splitlines())],
+            [('question', self.test_question.pk), ('question', self.test_other_question.pk),
+             ('answer', self.test_answer.pk)]
+        )
+
+    def test_export_content_command(self):
+        test_output = StringIO()
+        call_command('export_content', type=['question'], tag='walls', chunk_size=1, stdout=test_output)
+        self.assertEqual(
+            [json.loads(line)['id'] for line in test_output.getvalue().splitlines()], [self.test_other_question.pk]
+        )
+
+        with tempfile.TemporaryDirectory() as test_directory:
+            test_path = os.path.join(test_directory, 'questions.csv')
+            call_command('export_content', type=['question'], format='csv', output=test_path, stderr=StringIO())
+            with open(test_path, newline='', encoding='utf-8') as test_file:
+                test_rows = list(csv.DictReader(test_file))
+
+        self.assertEqual([row['tags'] for row in test_rows], ['titans', 'walls'])
+
+    def test_import_content_command(self):
+        test_records = [
+            {'type': 'user', 'id': 'u1', 'username': 'armin', 'email': 'armin.arlert@test.com', 'first_name': 'armin'},
+            # an existing user (by email) is reused
+            {'type': 'user', 'id': 'u2', 'username': 'eren', 'email': 'eren.yaeger@test.com'},
+            # invalid users (a number or no email, a username that's too long or has invalid characters)
+            {'type': 'user', 'id': 'u3', 'username': 'mikasa', 'email': 104},
+            {'type': 'user', 'id': 'u4', 'username': 'mikasa', 'email': None},
+            {'type': 'user', 'id': 'u5', 'username': 'm' * 30, 'email': 'mikasa.ackerman@test.com'},
+            {'type': 'user', 'id': 'u6', 'username': 'mikasa ackerman', 'email': 'mikasa.ackerman@test.com'},
+            {'type': 'question', 'id': 'q1', 'user': 'u1', 'title': 'What is beyond the walls?',
+             'description': 'The ocean, apparently.', 'tags': ['titans', 'ocean'], 'accepted_answer': 'a2',
+             'created_at': '2021-01-01T10:00:00Z'},
+            # users can also be referenced by username
+            {'type': 'question', 'id': 'q2', 'user': 'commander', 'title': 'What is beyond the walls?',
+             'description': 'Asking again.', 'tags': ['ocean']},
+            # invalid questions (a tag name that's too long or that isn't a slug, a description that isn't a string)
+            {'type': 'question', 'id': 'q4', 'user': 'u1', 'title': 'Why?', 'description': '...', 'tags': ['t' * 60]},
+            {'type': 'question', 'id': 'q5', 'user': 'u1', 'title': 'Why?', 'description': '...', 'tags': ['a b']},
+            {'type': 'question', 'id': 'q6', 'user': 'u1', 'title': 'Why?', 'description': {'text': '...'}},
+            # the accepted answer of another question is skipped, the question isn't
+            {'type': 'question', 'id': 'q7', 'user': 'u1', 'title': 'Who is the strongest soldier?',
+             'description': 'Captain Levi?', 'accepted_answer': 'a1'},
+            {'type': 'answer', 'id': 'a1', 'question': 'q1', 'user': 'u2', 'content': 'Freedom.'},
+            {'type': 'answer', 'id': 'a2', 'question': 'q1', 'user': 'u1', 'content': 'Salt water.'},
+            {'type': 'answer', 'id': 'a3', 'question': 'q3', 'user': 'u1', 'content': 'Unknown question.'},
+            {'type': 'comment', 'id': 'c1', 'object_type': 'answer', 'object_id': 'a2', 'user': 'u2',
+             'content': 'You were right.'},
+            {'type': 'vote', 'object_type': 'question', 'object_id': 'q1', 'user': 'u2', 'value': 1},
+            {'type': 'vote', 'object_type': 'question', 'object_id': 'q1', 'user': 'commander', 'value': 1},
+            {'type': 'vote', 'object_type': 'question', 'object_id': 'q1', 'user': 'u2', 'value': -1},
+            {'type': 'vote', 'object_type': 'answer', 'object_id': 'a1', 'user': 'u1', 'value': -1},
+            {'type': 'titan', 'id': 't1'}
+        ]
+        with tempfile.TemporaryDirectory() as test_directory:
+            test_path = os.path.join(test_directory, 'content.ndjson')
+            with open(test_path, 'w', encoding='utf-8') as test_file:
+                test_file.writelines(json.dumps(record) + '\n' for record in test_records)
+                test_file.write('not json\n')
+
+            test_output = StringIO()
+            call_command('import_content', test_path, batch_size=2, stdout=test_output)
+
+        self.assertIn('user: 1 created, 4 skipped', test_output.getvalue())
+        self.assertIn('question: 3 created, 3 skipped', test_output.getvalue())
+        self.assertIn('1 accepted answers skipped', test_output.getvalue())
+        self.assertEqual(User.objects.filter(email='mikasa.ackerman@test.com').exists(), False)
+        self.assertIsNone(Question.objects.get(description='Captain Levi?').accepted_answer_id)
+        self.assertIn('answer: 2 created, 1 skipped', test_output.getvalue())
+        self.assertIn('vote: 3 created, 1 skipped', test_output.getvalue())
+        self.assertEqual(User.objects.filter(username='eren').exists(), False)
+        test_user = User.objects.get(username='armin')
+        self.assertEqual(test_user.has_usable_password(), False)
+        self.assertEqual(test_user.profile.bio, '')
+
+        test_question = Question.objects.get(description='The ocean, apparently.')
+        test_other_question = Question.objects.get(description='Asking again.')
+        self.assertEqual(test_question.user, test_user)
+        self.assertEqual(test_other_question.user, self.test_staff_user)
+        self.assertEqual(test_question.slug, test_question.get_slug())
+        self.assertNotEqual(test_question.slug, test_other_question.slug)
+        self.assertEqual(test_question.created_at.year, 2021)
+        self.assertEqual(set(test_question.tags.values_list('name', flat=True)), {'titans', 'ocean'})
+        self.assertEqual(Tag.objects.get(name='titans').questions_count, 2)
+        self.assertEqual(Tag.objects.get(name='ocean').questions_count, 2)
+        self.assertEqual((test_question.upvote_count, test_question.downvote_count, test_question.score), (2, 0, 2))
+        self.assertEqual(test_question.accepted_answer.content, 'Salt water.')
+        self.assertEqual(test_question.answers.get(content='Freedom.').score, -1)
+        self.assertEqual(Vote.objects.filter(user=self.test_user).count(), 1)
+        self.assertEqual(Comment.objects.get(content='You were right.').content_object, test_question.accepted_answer)
+        self.assertEqual(SearchDocument.objects.filter(question=test_question).count(), 3)
+        self.assertEqual(QuestionSignatureBand.objects.filter(question=test_question).count(), 16)
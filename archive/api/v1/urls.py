@@ -0,0 +1,9 @@
+from django.urls import path
+
+from . import views
+
+app_name = 'Archive_API_v1'
+
+urlpatterns = [
+    path('export/', views.ContentExportAPIView.as_view(), name='export')
+]
@@ -0,0 +1,54 @@
+from django.core.handlers.asgi import ASGIRequest
+from django.http import FileResponse, StreamingHttpResponse
+
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import OpenApiParameter, extend_schema
+from rest_framework import permissions, views
+
+from archive.exporters import iter_export, spool_export
+
+from .serializers import ContentExportParamsSerializer
+
+CONTENT_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv'
+}
+
+
+class ContentExportAPIView(views.APIView):
+    """
+    Endpoint for staff users to export questions, answers and comments, as newline delimited json (one record per
+    line, with a `type` field) or as csv (a single content type). The export is streamed as it's read from the
+    database (or from a temporary file under ASGI), so it isn't paginated
+    """
+    permission_classes = (permissions.IsAdminUser, )
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter('type', str, enum=['question', 'answer', 'comment'], explode=True, description='The content types to export (can be repeated), all by default'),
+            OpenApiParameter('output', str, enum=['ndjson', 'csv'], description='The export format, ndjson by default'),
+            OpenApiParameter('created_after', str, description='Only export content created at or after this ISO 8601 date or datetime'),
+            OpenApiParameter('created_before', str, description='Only export content created before this ISO 8601 date or datetime'),
+            OpenApiParameter('tag', str, description='Only export the questions with this tag, their answers and the comments on both')
+        ],
+        responses={(200, 'application/x-ndjson'): OpenApiTypes.STR, (200, 'text/csv'): OpenApiTypes.STR}
+    )
+    def get(self, request, *args, **kwargs):
+        query_params = request.query_params
+        params_serializer = ContentExportParamsSerializer(
+            data={**query_params.dict(), 'type': query_params.getlist('type')}
+        )
+        params_serializer.is_valid(raise_exception=True)
+
+        export_format = params_serializer.validated_data['output']
+        lines = iter_export(params_serializer.get_exporter(), export_format)
+        if isinstance(request._request, ASGIRequest):
+            # Django's ASGI handler iterates streaming responses on the event loop, where the exporter's queries
+            # can't run, so the export is written to a file by this view (which the handler runs in a thread) and
+            # the file is streamed instead
+            response = FileResponse(spool_export(lines), content_type=CONTENT_TYPES[export_format])
+        else:
+            response = StreamingHttpResponse(lines, content_type=CONTENT_TYPES[export_format])
+
+        response['Content-Disposition'] = f'attachment; filename="export.{export_format}"'
+        return response
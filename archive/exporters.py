@@ -0,0 +1,193 @@
+import csv
+import json
+import tempfile
+from datetime import datetime, time
+from typing import IO, Dict, Iterable, Iterator, Optional
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from comments.models import Comment
+from questans.models import Answer, Question
+
+CONTENT_TYPES = ('question', 'answer', 'comment')
+FORMATS = ('ndjson', 'csv')
+CHUNK_SIZE = 500
+
+# the fields of the records of each content type (and the columns of their csv exports), users are exported by
+# username and related objects by id
+RECORD_FIELDS = {
+    'question': (
+        'id', 'user', 'title', 'slug', 'description', 'tags', 'accepted_answer', 'upvote_count', 'downvote_count',
+        'score', 'views_count', 'created_at', 'updated_at'
+    ),
+    'answer': (
+        'id', 'user', 'question', 'content', 'upvote_count', 'downvote_count', 'score', 'created_at', 'updated_at'
+    ),
+    'comment': (
+        'id', 'user', 'object_type', 'object_id', 'content', 'upvote_count', 'downvote_count', 'score', 'created_at',
+        'updated_at'
+    )
+}
+
+
+def parse_datetime_bound(value: str) -> datetime:
+    """
+    Parses an ISO 8601 datetime or date (read as midnight, in the current time zone) for the date range filters,
+    raises ValueError for other values
+    """
+    parsed = parse_datetime(value)
+    if parsed is None:
+        date = parse_date(value)
+        if date is None:
+            raise ValueError(f'{value} is not an ISO 8601 date or datetime.')
+
+        parsed = datetime.combine(date, time.min)
+
+    return timezone.make_aware(parsed) if timezone.is_naive(parsed) else parsed
+
+
+class ContentExporter(object):
+    """
+    Exports questions, answers and comments as dicts, one content type after the other. Each content type is read
+    with a single query streamed in chunks of `chunk_size` rows (with the related rows of each chunk prefetched),
+    so memory stays flat regardless of the number of rows.
+
+    Rows can be filtered by creation date range and by tag (the tagged questions, their answers and the comments
+    on both)
+    """
+
+    def __init__(self, content_types: Iterable[str] = CONTENT_TYPES, created_after: Optional[datetime] = None,
+                 created_before: Optional[datetime] = None, tag: Optional[str] = None, chunk_size: int = CHUNK_SIZE):
+        self.content_types = [content_type for content_type in CONTENT_TYPES if content_type in set(content_types)]
+        self.created_after = created_after
+        self.created_before = created_before
+        self.tag = tag
+        self.chunk_size = chunk_size
+
+    def filter_created_at(self, queryset):
+        if self.created_after is not None:
+            queryset = queryset.filter(created_at__gte=self.created_after)
+
+        if self.created_before is not None:
+            queryset = queryset.filter(created_at__lt=self.created_before)
+
+        return queryset
+
+    def get_questions(self):
+        questions = Question.objects.all()
+        if self.tag is not None:
+            questions = questions.tagged([self.tag])
+
+        return questions
+
+    def get_answers(self):
+        answers = Answer.objects.all()
+        if self.tag is not None:
+            answers = answers.filter(question__in=self.get_questions().values('pk'))
+
+        return answers
+
+    def get_queryset(self, content_type: str):
+        if content_type == 'question':
+            queryset = self.get_questions().select_related('user').prefetch_related('tags')
+        elif content_type == 'answer':
+            queryset = self.get_answers().select_related('user')
+        else:
+            queryset = Comment.objects.select_related('user')
+            if self.tag is not None:
+                queryset = queryset.filter(
+                    content_type=ContentType.objects.get_for_model(Question),
+                    object_id__in=self.get_questions().values('pk')
+                ) | queryset.filter(
+                    content_type=ContentType.objects.get_for_model(Answer),
+                    object_id__in=self.get_answers().values('pk')
+                )
+
+        # the primary key order is backed by the primary key index, and keeps exports stable
+        return self.filter_created_at(queryset).order_by('pk')
+
+    def get_record(self, content_type: str, obj) -> Dict:
+        record = {'type': content_type}
+        for field_name in RECORD_FIELDS[content_type]:
+            if field_name == 'user':
+                value = obj.user.username
+            elif field_name == 'tags':
+                value = [tag.name for tag in obj.tags.all()]
+            elif field_name in ('question', 'accepted_answer'):
+                value = getattr(obj, f'{field_name}_id')
+            elif field_name == 'object_type':
+                # served from the content types cache
+                value = ContentType.objects.get_for_id(obj.content_type_id).model
+            else:
+                value = getattr(obj, field_name)
+
+            record[field_name] = value
+
+        return record
+
+    def iter_records(self) -> Iterator[Dict]:
+        for content_type in self.content_types:
+            for obj in self.get_queryset(content_type).iterator(chunk_size=self.chunk_size):
+                yield self.get_record(content_type, obj)
+
+
+class Echo(object):
+    """
+    A file-like object that returns what's written to it, so csv writers can produce lines one at a time
+    """
+
+    def write(self, value):
+        return value
+
+
+def iter_ndjson(records: Iterable[Dict]) -> Iterator[str]:
+    for record in records:
+        yield json.dumps(record, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n'
+
+
+def get_csv_value(value):
+    if isinstance(value, list):
+        # tags are slugs, so they can't contain spaces
+        return ' '.join(value)
+
+    if isinstance(value, datetime):
+        return value.isoformat()
+
+    return value
+
+
+def iter_csv(records: Iterable[Dict], content_type: str) -> Iterator[str]:
+    writer = csv.writer(Echo())
+    columns = RECORD_FIELDS[content_type]
+    yield writer.writerow(columns)
+    for record in records:
+        yield writer.writerow([get_csv_value(record[column]) for column in columns])
+
+
+def iter_export(exporter: ContentExporter, export_format: str) -> Iterator[str]:
+    """
+    The lines of the export. Csv exports have the columns of a single content type, so they're only supported
+    for exporters of one content type
+    """
+    if export_format == 'csv':
+        if len(exporter.content_types) != 1:
+            raise ValueError('Csv exports are limited to a single content type.')
+
+        return iter_csv(exporter.iter_records(), exporter.content_types[0])
+
+    return iter_ndjson(exporter.iter_records())
+
+
+def spool_export(lines: Iterable[str]) -> IO[bytes]:
+    """
+    Writes the lines of an export to a temporary file (on disk, so memory stays flat), returned rewound
+    """
+    file = tempfile.TemporaryFile()
+    for line in lines:
+        file.write(line.encode())
+
+    file.seek(0)
+    return file
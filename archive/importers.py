@@ -0,0 +1,409 @@
+import time
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Optional
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.contrib.contenttypes.models import ContentType
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import F, Q
+
+from archive.exporters import parse_datetime_bound
+from comments.models import Comment
+from profiles.models import Profile
+from questans.models import Answer, Question, QuestionSignatureBand, Tag
+from questans.ranking import get_hot_score
+from questans.similarity import get_minhash_signature, get_signature_bands
+from questans.tasks import recompute_hot_scores
+from search.models import SearchDocument
+from votes.models import Vote
+
+User = get_user_model()
+
+# records are created in this order, a batch of records is only written once the buffered records of the types
+# before it are, so that its references can be resolved
+IMPORT_ORDER = ('user', 'question', 'answer', 'comment', 'vote')
+BATCH_SIZE = 1000
+# the errors that make a record invalid (missing fields, unknown references, invalid values)
+RECORD_ERRORS = (KeyError, TypeError, ValueError, ValidationError)
+
+
+class ImportReport(object):
+
+    def __init__(self):
+        self.started_at = time.monotonic()
+        self.created = defaultdict(int)
+        self.skipped = defaultdict(int)
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started_at
+
+    def get_lines(self) -> List[str]:
+        elapsed = max(self.elapsed, 1e-6)
+        lines = [
+            f'{content_type}: {self.created[content_type]} created, {self.skipped[content_type]} skipped '
+            f'({self.created[content_type] / elapsed:.0f}/s)'
+            for content_type in IMPORT_ORDER
+        ]
+        if self.skipped['unknown']:
+            lines.append(f'{self.skipped["unknown"]} invalid records or records of unknown types skipped')
+
+        if self.skipped['accepted_answer']:
+            lines.append(
+                f'{self.skipped["accepted_answer"]} accepted answers skipped (unknown answers or answers of other '
+                f'questions)'
+            )
+
+        total = sum(self.created.values())
+        lines.append(f'{total} objects created in {elapsed:.2f}s ({total / elapsed:.0f}/s)')
+        return lines
+
+
+class ContentImporter(object):
+    """
+    Creates users (and their profiles), questions (with their tags), answers, comments and votes from records (the
+    dicts of an NDJSON import), with one bulk insert per content type and batch of `batch_size` records.
+
+    Records reference each other by external ids (their `id` field), which are mapped to the ids of the created
+    objects. Users can also be referenced by the username of an existing user, like they are in exports (see
+    archive.exporters), and existing users are reused for user records with a taken username or email:
+
+        {"type": "user", "id": "u1", "username": "eren", "email": "eren@example.com", "first_name": "eren", "last_name": "yaeger", "bio": ""}
+        {"type": "question", "id": "q1", "user": "u1", "title": "...", "description": "...", "tags": ["titans"], "accepted_answer": "a1", "created_at": "..."}
+        {"type": "answer", "id": "a1", "question": "q1", "user": "u1", "content": "...", "created_at": "..."}
+        {"type": "comment", "id": "c1", "object_type": "answer", "object_id": "a1", "user": "u1", "content": "...", "created_at": "..."}
+        {"type": "vote", "object_type": "question", "object_id": "q1", "user": "u1", "value": 1}
+
+    Everything save() and the signals would do is done in bulk as well (slugs, hot scores, signatures, search
+    documents, tag and vote counts), except for related questions (see the rebuild_related_questions command) and
+    reputations (which are reconciled nightly, see profiles.reputation)
+    """
+
+    def __init__(self, batch_size: int = BATCH_SIZE):
+        self.batch_size = batch_size
+        self.batches = {content_type: [] for content_type in IMPORT_ORDER}
+        self.ids: Dict[str, Dict] = {content_type: {} for content_type in IMPORT_ORDER}
+        self.content_types = {
+            content_type: ContentType.objects.get_for_model(model)
+            for content_type, model in (('question', Question), ('answer', Answer), ('comment', Comment))
+        }
+        # (question id, external answer id) pairs, set once all answers are created
+        self.accepted_answers = []
+        # the question ids of the created answers by id, to check the accepted answers against
+        self.answer_question_ids: Dict[int, int] = {}
+        self.votes = set()
+        self.report = ImportReport()
+
+    def add(self, record: Dict):
+        content_type = record.get('type')
+        if not isinstance(content_type, str) or content_type not in self.batches:
+            self.report.skipped['unknown'] += 1
+            return
+
+        self.batches[content_type].append(record)
+        if len(self.batches[content_type]) >= self.batch_size:
+            self.flush(content_type)
+
+    def flush(self, content_type: str):
+        for dependency in IMPORT_ORDER[:IMPORT_ORDER.index(content_type) + 1]:
+            records, self.batches[dependency] = self.batches[dependency], []
+            if records:
+                with transaction.atomic():
+                    getattr(self, f'create_{dependency}s')(records)
+
+    def finish(self) -> ImportReport:
+        self.flush(IMPORT_ORDER[-1])
+        questions = []
+        for question_id, answer_id in self.accepted_answers:
+            answer_pk = self.ids['answer'].get(answer_id)
+            # an accepted answer must be one of the question's answers
+            if answer_pk is None or self.answer_question_ids[answer_pk] != question_id:
+                self.report.skipped['accepted_answer'] += 1
+                continue
+
+            questions.append(Question(pk=question_id, accepted_answer_id=answer_pk))
+
+        Question.objects.bulk_update(questions, ['accepted_answer'], batch_size=self.batch_size)
+        question_ids = self.ids['question'].values()
+        if question_ids:
+            # the scores only account for the imported answers and votes once they're all created
+            recompute_hot_scores(Question.objects.filter(pk__gte=min(question_ids), pk__lte=max(question_ids)))
+
+        return self.report
+
+    def import_records(self, records: Iterable[Dict]) -> ImportReport:
+        for record in records:
+            self.add(record)
+
+        return self.finish()
+
+    def build(self, content_type: str, records: List[Dict], build_object) -> List:
+        """
+        Builds the objects of the valid records (with their `imported_created_at`), returns (record, object) pairs
+        """
+        built = []
+        for record in records:
+            try:
+                obj = build_object(record)
+                obj.imported_created_at = (
+                    parse_datetime_bound(record['created_at']) if record.get('created_at') else None
+                )
+            except RECORD_ERRORS:
+                self.report.skipped[content_type] += 1
+                continue
+
+            built.append((record, obj))
+
+        return built
+
+    def get_user_id(self, reference) -> int:
+        return self.ids['user'][reference]
+
+    def resolve_usernames(self, records: List[Dict]):
+        # references which aren't external ids of imported users are looked up as usernames, with one query
+        usernames = {record.get('user') for record in records if isinstance(record.get('user'), str)}
+        usernames -= self.ids['user'].keys()
+        self.ids['user'].update(User.objects.filter(username__in=usernames).values_list('username', 'pk'))
+
+    def restore_created_at(self, model, objects: List):
+        # auto_now_add fields are overwritten when objects are inserted, so the records' dates are written back
+        restored = []
+        for obj in objects:
+            if obj.imported_created_at is not None:
+                obj.created_at = obj.imported_created_at
+                restored.append(obj)
+
+        model.objects.bulk_update(restored, ['created_at'])
+
+    def index_documents(self, objects: List):
+        SearchDocument.objects.bulk_create([
+            SearchDocument(content_object=obj, **SearchDocument.get_document_values(obj)) for obj in objects
+        ])
+
+    def clean_field(self, model, field_name: str, value) -> str:
+        """
+        Checks a string value of a record against the model field's validators (max length, format), which bulk
+        inserts don't run
+        """
+        if not isinstance(value, str):
+            raise TypeError(f'The {field_name} must be a string.')
+
+        model._meta.get_field(field_name).run_validators(value)
+        return value
+
+    def check_reference(self, value):
+        # external ids are strings or numbers
+        if not isinstance(value, (str, int)) or isinstance(value, bool):
+            raise TypeError('References must be strings or numbers.')
+
+        return value
+
+    def create_users(self, records: List[Dict]):
+        cleaned = []
+        for record in records:
+            try:
+                cleaned.append((self.check_reference(record['id']), {
+                    'username': self.clean_field(User, 'username', record['username']),
+                    'email': User.objects.normalize_email(self.clean_field(User, 'email', record['email'])),
+                    'first_name': self.clean_field(User, 'first_name', record.get('first_name', '')),
+                    'last_name': self.clean_field(User, 'last_name', record.get('last_name', '')),
+                    'bio': self.clean_field(Profile, 'bio', record.get('bio', ''))
+                }))
+            except RECORD_ERRORS:
+                self.report.skipped['user'] += 1
+
+        existing = {}
+        for username, email, pk in User.objects.filter(
+            Q(username__in=[values['username'] for _, values in cleaned])
+            | Q(email__in=[values['email'] for _, values in cleaned])
+        ).values_list('username', 'email', 'pk'):
+            existing[username] = existing[email] = pk
+
+        # records of users that already exist (or that come earlier in the batch) are mapped to these users
+        new_users, mapped = {}, []
+        for external_id, values in cleaned:
+            username, email = values['username'], values['email']
+            user = existing.get(username) or existing.get(email) or new_users.get(username) or new_users.get(email)
+            if user is None:
+                user = User(
+                    username=username,
+                    email=email,
+                    first_name=values['first_name'],
+                    last_name=values['last_name'],
+                    # imported users reset their password to log in
+                    password=make_password(None)
+                )
+                user.bio = values['bio']
+                new_users[username] = new_users[email] = user
+
+            mapped.append((external_id, user))
+
+        users = list({user.username: user for user in new_users.values()}.values())
+        User.objects.bulk_create(users)
+        Profile.objects.bulk_create([Profile(user=user, bio=user.bio) for user in users])
+        for external_id, user in mapped:
+            self.ids['user'][external_id] = user if isinstance(user, int) else user.pk
+
+        self.report.created['user'] += len(users)
+
+    def create_questions(self, records: List[Dict]):
+        self.resolve_usernames(records)
+
+        def build_question(record):
+            if record['id'] in self.ids['question']:
+                raise ValueError('Duplicate question.')
+
+            if record.get('accepted_answer') is not None:
+                self.check_reference(record['accepted_answer'])
+
+            question = Question(
+                user_id=self.get_user_id(record['user']),
+                title=self.clean_field(Question, 'title', record['title']),
+                description=self.clean_field(Question, 'description', record['description'])
+            )
+            question.slug = question.get_slug()
+            question.minhash_signature = get_minhash_signature(f'{question.title} {question.description}')
+            tag_names = record.get('tags', [])
+            if not isinstance(tag_names, list):
+                raise TypeError('The tags must be a list of tag names.')
+
+            question.tag_names = {self.clean_field(Tag, 'name', name) for name in tag_names}
+            if '' in question.tag_names:
+                raise ValueError('Tag names can\'t be empty.')
+
+            return question
+
+        built = self.build('question', records, build_question)
+        questions = [question for _, question in built]
+        for question in questions:
+            if question.imported_created_at is not None:
+                question.last_activity_at = question.imported_created_at
+
+            question.hot_score = get_hot_score(0, 0, question.last_activity_at)
+
+        Question.objects.bulk_create(questions)
+        self.restore_created_at(Question, questions)
+        for record, question in built:
+            self.ids['question'][record['id']] = question.pk
+            if record.get('accepted_answer') is not None:
+                self.accepted_answers.append((question.pk, record['accepted_answer']))
+
+        tag_names = [name for question in questions for name in question.tag_names]
+        tags = {tag.name: tag for tag in Tag.objects.get_or_create_many(tag_names)}
+        through = Question.tags.through
+        through.objects.bulk_create([
+            through(question_id=question.pk, tag_id=tags[name].pk)
+            for question in questions for name in question.tag_names
+        ])
+        # grouped by number of questions, so the counts are updated with a few statements
+        tags_by_count = defaultdict(list)
+        for name, count in Counter(tag_names).items():
+            tags_by_count[count].append(tags[name].pk)
+
+        for count, tag_ids in tags_by_count.items():
+            Tag.objects.filter(pk__in=tag_ids).update(questions_count=F('questions_count') + count)
+
+        QuestionSignatureBand.objects.bulk_create([
+            QuestionSignatureBand(question=question, band=band, bucket=bucket)
+            for question in questions
+            for band, bucket in enumerate(get_signature_bands(question.minhash_signature))
+        ])
+        self.index_documents(questions)
+        self.report.created['question'] += len(questions)
+
+    def create_answers(self, records: List[Dict]):
+        self.resolve_usernames(records)
+
+        def build_answer(record):
+            if record['id'] in self.ids['answer']:
+                raise ValueError('Duplicate answer.')
+
+            return Answer(
+                user_id=self.get_user_id(record['user']),
+                question_id=self.ids['question'][record['question']],
+                content=self.clean_field(Answer, 'content', record['content'])
+            )
+
+        built = self.build('answer', records, build_answer)
+        answers = [answer for _, answer in built]
+        Answer.objects.bulk_create(answers)
+        self.restore_created_at(Answer, answers)
+        for record, answer in built:
+            self.ids['answer'][record['id']] = answer.pk
+            self.answer_question_ids[answer.pk] = answer.question_id
+
+        self.index_documents(answers)
+        self.report.created['answer'] += len(answers)
+
+    def create_comments(self, records: List[Dict]):
+        self.resolve_usernames(records)
+
+        def build_comment(record):
+            if record['id'] in self.ids['comment']:
+                raise ValueError('Duplicate comment.')
+
+            object_type = record['object_type']
+            if object_type not in ('question', 'answer'):
+                raise ValueError('Comments can only be on questions and answers.')
+
+            return Comment(
+                user_id=self.get_user_id(record['user']),
+                content_type=self.content_types[object_type],
+                object_id=self.ids[object_type][record['object_id']],
+                content=self.clean_field(Comment, 'content', record['content'])
+            )
+
+        built = self.build('comment', records, build_comment)
+        comments = [comment for _, comment in built]
+        Comment.objects.bulk_create(comments)
+        self.restore_created_at(Comment, comments)
+        for record, comment in built:
+            self.ids['comment'][record['id']] = comment.pk
+
+        self.report.created['comment'] += len(comments)
+
+    def create_votes(self, records: List[Dict]):
+        self.resolve_usernames(records)
+
+        def build_vote(record):
+            object_type, value = record['object_type'], int(record['value'])
+            if value not in (Vote.UPVOTE, Vote.DOWNVOTE):
+                raise ValueError('Invalid vote value.')
+
+            vote = Vote(
+                user_id=self.get_user_id(record['user']),
+                content_type=self.content_types[object_type],
+                object_id=self.ids[object_type][record['object_id']],
+                value=value
+            )
+            # the votes of the imported objects can only conflict with each other
+            key = (object_type, vote.object_id, vote.user_id)
+            if key in self.votes:
+                raise ValueError('Duplicate vote.')
+
+            self.votes.add(key)
+            vote.object_type = object_type
+            return vote
+
+        votes = [vote for _, vote in self.build('vote', records, build_vote)]
+        Vote.objects.bulk_create(votes)
+
+        # the objects' counts are updated with one statement per content type and distinct count changes
+        counts = defaultdict(lambda: [0, 0])
+        for vote in votes:
+            counts[(vote.object_type, vote.object_id)][vote.value == Vote.DOWNVOTE] += 1
+
+        objects_by_counts = defaultdict(list)
+        for (object_type, object_id), (upvotes, downvotes) in counts.items():
+            objects_by_counts[(object_type, upvotes, downvotes)].append(object_id)
+
+        for (object_type, upvotes, downvotes), object_ids in objects_by_counts.items():
+            self.content_types[object_type].model_class().objects.filter(pk__in=object_ids).update(
+                upvote_count=F('upvote_count') + upvotes,
+                downvote_count=F('downvote_count') + downvotes,
+                score=F('score') + upvotes - downvotes
+            )
+
+        self.report.created['vote'] += len(votes)
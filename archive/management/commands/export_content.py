@@ -0,0 +1,54 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from archive.exporters import (CHUNK_SIZE, CONTENT_TYPES, FORMATS,
+                               ContentExporter, iter_export,
+                               parse_datetime_bound)
+
+
+class Command(BaseCommand):
+    help = (
+        'Exports questions, answers and comments as newline delimited json (or as csv, for a single content type), '
+        'streamed in chunks so memory stays flat regardless of the number of rows'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--type', action='append', choices=CONTENT_TYPES, dest='types',
+            help='A content type to export (can be repeated), all by default'
+        )
+        parser.add_argument('--format', choices=FORMATS, default='ndjson')
+        parser.add_argument('--created-after', help='An ISO 8601 date or datetime')
+        parser.add_argument('--created-before', help='An ISO 8601 date or datetime')
+        parser.add_argument('--tag')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+        parser.add_argument('--output', help='The file to write the export to, stdout by default')
+
+    def handle(self, *args, **options):
+        try:
+            exporter = ContentExporter(
+                content_types=options['types'] or CONTENT_TYPES,
+                created_after=options['created_after'] and parse_datetime_bound(options['created_after']),
+                created_before=options['created_before'] and parse_datetime_bound(options['created_before']),
+                tag=options['tag'],
+                chunk_size=options['chunk_size']
+            )
+            lines = iter_export(exporter, options['format'])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        if options['output'] is None:
+            self.write_lines(lines, self.stdout)
+            return
+
+        with open(options['output'], 'w', encoding='utf-8', newline='') as output:
+            written = self.write_lines(lines, output)
+
+        self.stderr.write(self.style.SUCCESS(f'{written} lines written to {options["output"]}'))
+
+    def write_lines(self, lines, output):
+        written = 0
+        for line in lines:
+            output.write(line)
+            written += 1
+
+        return written
@@ -0,0 +1,47 @@
+import json
+import sys
+
+from django.core.management.base import BaseCommand
+
+from archive.importers import BATCH_SIZE, ContentImporter
+
+
+class Command(BaseCommand):
+    help = (
+        'Imports users, questions (with their tags), answers, comments and votes from newline delimited json, '
+        'with bulk inserts in batches, and reports the throughput of each content type'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='The file to import, - for stdin')
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        importer = ContentImporter(batch_size=options['batch_size'])
+        if options['path'] == '-':
+            self.import_lines(importer, sys.stdin)
+        else:
+            with open(options['path'], encoding='utf-8') as lines:
+                self.import_lines(importer, lines)
+
+        *lines, total = importer.finish().get_lines()
+        for line in lines:
+            self.stdout.write(line)
+
+        self.stdout.write(self.style.SUCCESS(total))
+
+    def import_lines(self, importer, lines):
+        for line in lines:
+            if not line.strip():
+                continue
+
+            try:
+                record = json.loads(line)
+            except ValueError:
+                importer.report.skipped['unknown'] += 1
+                continue
+
+            if isinstance(record, dict):
+                importer.add(record)
+            else:
+                importer.report.skipped['unknown'] += 1
@@ -0,0 +1,17 @@
+"""
+ASGI application of the servers started by benchmarks.async_reads: qenea_backend.asgi, against the benchmark's
+database (BENCHMARK_DATABASE) and serving the benchmark's host
+"""
+import os
+
+from benchmarks.utils import setup_django
+
+setup_django()
+
+from django.conf import settings  # noqa: E402
+from django.core.asgi import get_asgi_application  # noqa: E402
+
+settings.DATABASES['default']['NAME'] = os.environ['BENCHMARK_DATABASE']
+settings.ALLOWED_HOSTS = ['127.0.0.1']
+
+application = get_asgi_application()
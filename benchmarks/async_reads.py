@@ -0,0 +1,176 @@
+"""
+Compares the concurrent throughput of the hot read endpoints (question list and detail, answer list, profile
+detail) served by their sync views and by their async views (settings.ASYNC_READ_VIEWS), under the deployment's
+server setup: gunicorn with uvicorn workers serving qenea_backend.asgi (see scripts/run.sh).
+
+For each mode a server is started against a throwaway database file, and `--concurrency` clients (threads with a
+keep-alive connection each) request the endpoints in turn for `--duration` seconds, after a warm up.
+
+usage: python -m benchmarks.async_reads [--workers 4] [--concurrency 64] [--duration 10] [--authenticated]
+"""
+import argparse
+import http.client
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.utils import setup_django, test_database
+
+PORT = 8765
+QUESTIONS = 100
+ANSWERS_PER_QUESTION = 5
+USERS = 20
+WARM_UP_DURATION = 2
+
+
+def create_data():
+    """
+    Returns the paths requested by the clients and the key of the token of the authenticated clients
+    """
+    from django.contrib.auth import get_user_model
+
+    from rest_framework.authtoken.models import Token
+
+    from profiles.models import Profile
+    from questans.models import Answer, Question
+    from votes.models import Vote
+
+    User = get_user_model()
+    # users (and their profiles) are bulk created since creating them through the manager also processes their
+    # profile picture
+    User.objects.bulk_create([
+        User(email=f'user{i}@bench.com', username=f'user{i}', first_name='bench', last_name=f'user{i}')
+        for i in range(USERS)
+    ])
+    users = list(User.objects.order_by('pk'))
+    Profile.objects.bulk_create([Profile(user=user) for user in users])
+    users[0].profile.following.set(Profile.objects.exclude(user=users[0]))
+
+    questions = []
+    for i in range(QUESTIONS):
+        question = Question.objects.create(
+            user=users[i % USERS], title=f'Question number {i}', description='How does it work? ' * 20
+        )
+        question.set_tags([f'tag{i % 10}', f'tag{i % 7}'], is_new=True)
+        for j in range(ANSWERS_PER_QUESTION):
+            answer = Answer.objects.create(user=users[j % USERS], question=question, content='It works. ' * 20)
+            Vote.objects.toggle(user=users[0], obj=answer, value=Vote.UPVOTE)
+
+        Vote.objects.toggle(user=users[0], obj=question, value=Vote.UPVOTE)
+        questions.append(question)
+
+    paths = []
+    for i, question in enumerate(questions):
+        paths.extend([
+            '/api/v1/questions/',
+            f'/api/v1/questions/{question.slug}/',
+            f'/api/v1/questions/{question.slug}/answers/',
+            f'/api/v1/profiles/{users[i % USERS].username}/'
+        ])
+
+    return paths, Token.objects.create(user=users[0]).key
+
+
+def start_server(database: str, async_reads: bool, workers: int) -> subprocess.Popen:
+    env = {**os.environ, 'BENCHMARK_DATABASE': database, 'ASYNC_READ_VIEWS': str(async_reads)}
+    server = subprocess.Popen(
+        [
+            sys.executable, '-m', 'gunicorn', 'benchmarks.asgi', '--bind', f'127.0.0.1:{PORT}',
+            '--worker-class', 'uvicorn.workers.UvicornWorker', '--workers', str(workers)
+        ],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', PORT), timeout=1).close()
+            return server
+        except OSError:
+            time.sleep(0.2)
+
+    server.kill()
+    raise RuntimeError('The server didn\'t start')
+
+
+def run_clients(paths, headers, concurrency: int, duration: float):
+    """
+    Returns the latencies of the requests and the number of requests that didn't succeed
+    """
+    deadline = time.perf_counter() + duration
+
+    def client(index):
+        connection = http.client.HTTPConnection('127.0.0.1', PORT)
+        latencies, errors = [], 0
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            connection.request('GET', paths[index % len(paths)], headers=headers)
+            response = connection.getresponse()
+            response.read()
+            latencies.append(time.perf_counter() - start)
+            errors += response.status != 200
+            index += concurrency
+
+        connection.close()
+        return latencies, errors
+
+    with ThreadPoolExecutor(concurrency) as executor:
+        results = list(executor.map(client, range(concurrency)))
+
+    return [latency for latencies, _ in results for latency in latencies], sum(errors for _, errors in results)
+
+
+def run(workers: int, concurrency: int, duration: float, authenticated: bool):
+    from django.conf import settings
+
+    paths, token = create_data()
+    headers = {'Host': '127.0.0.1', 'Accept': 'application/json'}
+    if authenticated:
+        headers['Authorization'] = f'Token {token}'
+
+    for async_reads in (False, True):
+        server = start_server(settings.DATABASES['default']['NAME'], async_reads, workers)
+        try:
+            run_clients(paths, headers, concurrency, WARM_UP_DURATION)
+            start = time.perf_counter()
+            latencies, errors = run_clients(paths, headers, concurrency, duration)
+            elapsed = time.perf_counter() - start
+        finally:
+            server.terminate()
+            server.wait()
+
+        latencies.sort()
+        label = f'{"async" if async_reads else "sync"} read views'
+        print(
+            f'{label:<40} {len(latencies):>7} ops  {elapsed:8.3f}s  {len(latencies) / elapsed:10.1f} ops/s  '
+            f'p50 {latencies[len(latencies) // 2] * 1000:7.1f}ms  '
+            f'p95 {latencies[int(len(latencies) * 0.95)] * 1000:7.1f}ms  {errors} errors'
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--authenticated', action='store_true', help='Authenticate the clients with a token')
+    args = parser.parse_args()
+
+    setup_django()
+    from django.conf import settings
+
+    # the servers' processes use the test database, so it's a file rather than an in-memory database
+    with tempfile.TemporaryDirectory() as directory:
+        settings.DATABASES['default'].setdefault('TEST', {})['NAME'] = os.path.join(directory, 'benchmark.sqlite3')
+        with test_database():
+            run(
+                workers=args.workers, concurrency=args.concurrency, duration=args.duration,
+                authenticated=args.authenticated
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+"""
+Compares building the serializers' urls with rest_framework's reverse() against the precompiled URL templates of
+qenea_backend.reverse, for each hyperlinked route of the questans, comments and profiles serializers.
+
+The benchmark doesn't use the database.
+
+usage: python -m benchmarks.url_templates [--operations 100000]
+"""
+import argparse
+
+from benchmarks.utils import setup_django, timer
+
+ROUTES = (
+    ('Questans_API_v1:question-detail', {'slug': 'how-do-i-reverse-a-url-b5c1e0'}),
+    ('Questans_API_v1:question-answers', {'slug': 'how-do-i-reverse-a-url-b5c1e0'}),
+    ('Questans_API_v1:answer-comments', {'pk': 1234}),
+    ('Comments_API_v1:comment-detail', {'pk': 1234}),
+    ('Profiles_API_v1:profile-detail', {'username': 'bench.user'}),
+)
+
+
+def run(operations: int):
+    from django.test.utils import setup_test_environment
+
+    from rest_framework.request import Request
+    from rest_framework.reverse import reverse as api_reverse
+    from rest_framework.test import APIRequestFactory
+
+    from qenea_backend.reverse import reverse_url
+
+    # allows the test client's host
+    setup_test_environment()
+    for view_name, kwargs in ROUTES:
+        assert reverse_url(view_name, kwargs, request=Request(APIRequestFactory().get('/'))) == api_reverse(
+            view_name, kwargs=kwargs, request=Request(APIRequestFactory().get('/'))
+        )
+
+        # a request per serialized page, as the absolute base is cached on the request
+        request = Request(APIRequestFactory().get('/'))
+        with timer(f'reverse {view_name}', operations):
+            for _ in range(operations):
+                api_reverse(view_name, kwargs=kwargs, request=request)
+
+        with timer(f'template {view_name}', operations):
+            for _ in range(operations):
+                reverse_url(view_name, kwargs, request=request)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--operations', type=int, default=100000)
+    args = parser.parse_args()
+
+    setup_django()
+    run(operations=args.operations)
+
+
+if __name__ == '__main__':
+    main()
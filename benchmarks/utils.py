@@ -0,0 +1,59 @@
+import os
+import time
+from contextlib import contextmanager
+
+import django
+
+
+def setup_django():
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'qenea_backend.settings')
+    django.setup()
+
+
+@contextmanager
+def test_database():
+    """
+    Runs the benchmark against a throwaway test database (created and migrated like the one used by the test
+    runner), so benchmarks never touch development or production data
+    """
+    from django.test.utils import (setup_databases, setup_test_environment,
+                                   teardown_databases,
+                                   teardown_test_environment)
+
+    setup_test_environment()
+    old_config = setup_databases(verbosity=0, interactive=False)
+    try:
+        yield
+    finally:
+        teardown_databases(old_config, verbosity=0)
+        teardown_test_environment()
+
+
+class QueryCounter(object):
+    """
+    Database execute wrapper that counts queries (unlike CaptureQueriesContext, it has no query log limit)
+    """
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+@contextmanager
+def count_queries():
+    from django.db import connection
+
+    counter = QueryCounter()
+    with connection.execute_wrapper(counter):
+        yield counter
+
+
+@contextmanager
+def timer(label: str, operations: int):
+    start = time.perf_counter()
+    yield
+    elapsed = time.perf_counter() - start
+    print(f'{label:<40} {operations:>7} ops  {elapsed:8.3f}s  {operations / elapsed:10.1f} ops/s')
@@ -0,0 +1,70 @@
+"""
+Measures the throughput of the question vote toggle endpoints (and the number of queries each toggle costs).
+
+The benchmark only goes through the toggle views, so it can be run against older revisions of the code to compare
+vote storage implementations.
+
+usage: python -m benchmarks.vote_toggle [--users 20] [--questions 50] [--rounds 4]
+"""
+import argparse
+
+from benchmarks.utils import count_queries, setup_django, test_database, timer
+
+
+def run(users: int, questions: int, rounds: int):
+    from django.contrib.auth import get_user_model
+
+    from rest_framework.test import APIRequestFactory, force_authenticate
+
+    from questans.api.v1.views import (QuestionDownvoteToggleAPIView,
+                                       QuestionUpvoteToggleAPIView)
+    from questans.models import Question
+
+    User = get_user_model()
+    factory = APIRequestFactory()
+    upvote_view = QuestionUpvoteToggleAPIView.as_view()
+    downvote_view = QuestionDownvoteToggleAPIView.as_view()
+
+    # users are bulk created since creating them through the manager also processes their profile picture
+    User.objects.bulk_create([
+        User(email=f'user{i}@bench.com', username=f'user{i}', first_name='bench', last_name=f'user{i}')
+        for i in range(users)
+    ])
+    user_objects = list(User.objects.all())
+    slugs = [
+        Question.objects.create(user=user_objects[0], title=f'Question {i}', description='...').slug
+        for i in range(questions)
+    ]
+
+    def toggle(view, user, slug):
+        request = factory.post(f'/api/v1/questions/{slug}/toggle/')
+        force_authenticate(request, user=user)
+        return view(request, slug=slug)
+
+    operations = users * questions * rounds
+    with count_queries() as counter:
+        with timer('question vote toggles', operations):
+            for round_ in range(rounds):
+                # alternating between views makes every kind of transition happen (vote, switch, unvote)
+                view = upvote_view if round_ % 3 else downvote_view
+                for user in user_objects:
+                    for slug in slugs:
+                        toggle(view, user, slug)
+
+    print(f'{counter.count / operations:.2f} queries per toggle')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=20)
+    parser.add_argument('--questions', type=int, default=50)
+    parser.add_argument('--rounds', type=int, default=4)
+    args = parser.parse_args()
+
+    setup_django()
+    with test_database():
+        run(users=args.users, questions=args.questions, rounds=args.rounds)
+
+
+if __name__ == '__main__':
+    main()
@@ -4,7 +4,8 @@ from rest_framework.response import Response
 from .serializers import CommentSerializer
 
 
-# mixin to add comments route to viewsets
+# mixin to add comments route to viewsets, the view's sparse fieldset (see SparseFieldsetsViewMixin) applies to the
+# comments
 class ObjectCommentsViewSetMixin(object):
 
     @action(methods=['GET'], detail=True)
@@ -12,10 +13,10 @@ class ObjectCommentsViewSetMixin(object):
         obj = self.get_object()
         comments = obj.comments.select_related('user')
 
-        page = self.paginate_queryset()
+        page = self.paginate_queryset(comments)
         if page is not None:
-            serializer = CommentSerializer(page, many=True, context={'request': request})
+            serializer = self.get_sparse_serializer(CommentSerializer, page, many=True, context={'request': request})
             return self.get_paginated_response(serializer.data)
 
-        serializer = CommentSerializer(comments, many=True, context={'request': request})
+        serializer = self.get_sparse_serializer(CommentSerializer, comments, many=True, context={'request': request})
         return Response(serializer.data)
@@ -3,6 +3,8 @@ from django.contrib.contenttypes.models import ContentType
 from rest_framework import serializers
 
 from comments.models import Comment
+from qenea_backend.reverse import TemplateHyperlinkedIdentityField
+from qenea_backend.serializers import SparseFieldsetsMixin
 
 
 class ContentTypeRelatedField(serializers.RelatedField):
@@ -14,12 +16,20 @@ class ContentTypeRelatedField(serializers.RelatedField):
         return instance.model
 
 
-class CommentSerializer(serializers.HyperlinkedModelSerializer):
-    url = serializers.HyperlinkedIdentityField(view_name='Comments_API_v1:comment-detail')
+class CommentSerializer(SparseFieldsetsMixin, serializers.HyperlinkedModelSerializer):
+    url = TemplateHyperlinkedIdentityField(view_name='Comments_API_v1:comment-detail')
     user = serializers.StringRelatedField()
     content_type = ContentTypeRelatedField(queryset=ContentType.objects.all())
-    total_points = serializers.ReadOnlyField()
+    total_points = serializers.ReadOnlyField(source='score')
 
     class Meta:
         model = Comment
         fields = ('url', 'user', 'content_type', 'object_id', 'content', 'total_points', 'created_at', 'updated_at')
+
+    def update(self, instance, validated_data):
+        instance.content_type = validated_data.get('content_type', instance.content_type)
+        instance.object_id = validated_data.get('object_id', instance.object_id)
+        instance.content = validated_data.get('content', instance.content)
+        # only the editable columns are saved so that vote counts updated in the meantime aren't overwritten
+        instance.save(update_fields=['content_type', 'object_id', 'content', 'updated_at'])
+        return instance
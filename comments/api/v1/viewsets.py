@@ -1,15 +1,28 @@
 from rest_framework import permissions, viewsets
 
 from comments.models import Comment
+from qenea_backend.conditional import (ConditionalListMixin,
+                                       ConditionalRetrieveMixin)
+from qenea_backend.pagination import FeedPagination
+from qenea_backend.serializers import SparseFieldsetsViewMixin
 from questans.permissions import IsObjectUserOrReadOnly
 
 from .serializers import CommentSerializer
 
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(SparseFieldsetsViewMixin, ConditionalRetrieveMixin, ConditionalListMixin, viewsets.ModelViewSet):
     queryset = Comment.objects.select_related('user')
     serializer_class = CommentSerializer
     permission_classes = (permissions.IsAuthenticatedOrReadOnly, IsObjectUserOrReadOnly)
+    pagination_class = FeedPagination
+    etag_varies_by_viewer = False
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if not self.is_field_requested('user'):
+            queryset = queryset.select_related(None)
+
+        return queryset
 
     def list(self, request, *args, **kwargs):
         """
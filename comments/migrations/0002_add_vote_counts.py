@@ -0,0 +1,54 @@
+# Generated by Django 4.1.1 on 2026-10-18 11:00
+
+from django.db import migrations, models
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def vote_count_subquery(model, field_name):
+    through = model._meta.get_field(field_name).remote_field.through
+    # the through table's foreign key to the voted object is named after the model (e.g. question_id)
+    fk_name = f'{model._meta.model_name}_id'
+    return Coalesce(
+        Subquery(
+            through.objects.filter(**{fk_name: OuterRef('pk')}).order_by()
+            .values(fk_name).annotate(count=Count('pk')).values('count')[:1]
+        ),
+        0
+    )
+
+
+def backfill_vote_counts(apps, schema_editor):
+    for model_name in ('Comment', ):
+        model = apps.get_model('comments', model_name)
+        model.objects.update(
+            upvote_count=vote_count_subquery(model, 'upvotes'),
+            downvote_count=vote_count_subquery(model, 'downvotes')
+        )
+        model.objects.update(score=F('upvote_count') - F('downvote_count'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('comments', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='downvote_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='score',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='upvote_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_vote_counts, migrations.RunPython.noop),
+    ]
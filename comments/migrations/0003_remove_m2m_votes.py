@@ -0,0 +1,22 @@
+# Generated by Django 4.1.1 on 2026-10-18 11:04
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('comments', '0002_add_vote_counts'),
+        ('votes', '0002_copy_m2m_votes'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='comment',
+            name='downvotes',
+        ),
+        migrations.RemoveField(
+            model_name='comment',
+            name='upvotes',
+        ),
+    ]
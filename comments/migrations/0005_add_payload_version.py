@@ -0,0 +1,30 @@
+# Generated by Django 4.1.1 on 2026-10-18 11:21
+
+from django.db import migrations, models
+from django.db.models import F
+import django.utils.timezone
+
+
+def copy_updated_at(apps, schema_editor):
+    apps.get_model('comments', 'Comment').objects.update(modified_at=F('updated_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('comments', '0004_add_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='modified_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='version',
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+        migrations.RunPython(copy_updated_at, migrations.RunPython.noop),
+    ]
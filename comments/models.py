@@ -2,26 +2,55 @@ from django.conf import settings
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
 from django.db import models
+from django.db.models import Q
+
+from qenea_backend.models import VersionedModel
+from votes.models import VotableModel
 
 # Create your models here.
 
-class Comment(models.Model):
+class CommentQuerySet(models.QuerySet):
+
+    def for_objects(self, objects):
+        """
+        Filters the comments of several objects (of any commentable models) with a single query
+        """
+        object_ids = {}
+        for obj in objects:
+            object_ids.setdefault(ContentType.objects.get_for_model(obj), []).append(obj.pk)
+
+        if not object_ids:
+            return self.none()
+
+        condition = Q()
+        for content_type, pks in object_ids.items():
+            condition |= Q(content_type=content_type, object_id__in=pks)
+
+        return self.filter(condition)
+
+
+class Comment(VersionedModel, VotableModel):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='comments')
     content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE, related_name='comments')
     object_id = models.PositiveIntegerField()
     content_object = GenericForeignKey('content_type', 'object_id')
     content = models.CharField(max_length=200)
-    upvotes = models.ManyToManyField(settings.AUTH_USER_MODEL, blank=True, related_name='upvoted_comments')
-    downvotes = models.ManyToManyField(settings.AUTH_USER_MODEL, blank=True, related_name='downvoted_comments')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = CommentQuerySet.as_manager()
+
     class Meta:
         ordering = ['created_at']
+        indexes = [
+            # back the keyset pagination of an object's comments and of all comments
+            models.Index(fields=['content_type', 'object_id', 'created_at', 'id'], name='comment_object_created_idx'),
+            models.Index(fields=['created_at', 'id'], name='comment_created_at_id_idx')
+        ]
 
     def __str__(self):
         return f"{self.user}'s comment"
 
-    @property
-    def total_points(self):
-        return self.upvotes.count() - self.downvotes.count()
+    @classmethod
+    def get_vote_updates(cls):
+        return cls.get_version_updates()
@@ -1,18 +1,23 @@
 from rest_framework import serializers
-from rest_framework.reverse import reverse as api_reverse
 
-from accounts.api.v1.serializers import UserSerializer
+from accounts.api.v1.serializers import ObjectUserSerializer, UserSerializer
 from profiles.models import Profile
+from qenea_backend.reverse import reverse_url
+from qenea_backend.serializers import (SparseFieldsetsMixin,
+                                       ViewerStateListSerializer)
 
 
-class ProfileSerializer(serializers.ModelSerializer):
+class ProfileSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
     user = UserSerializer()
     following_count = serializers.ReadOnlyField(source='get_following_count')
     followers_count = serializers.ReadOnlyField(source='get_followers_count')
 
     class Meta:
         model = Profile
-        fields = ('id', 'user', 'bio', 'gender', 'picture', 'following_count', 'followers_count', 'date_of_birth')
+        fields = (
+            'id', 'user', 'bio', 'gender', 'picture', 'following_count', 'followers_count', 'date_of_birth',
+            'reputation'
+        )
 
     def update(self, instance, validated_data):
         user_data = validated_data.pop('user', None)
@@ -39,14 +44,37 @@ class ProfileFollowSerializer(serializers.Serializer):
     follow_toggle_url = serializers.SerializerMethodField()
     is_followed_by_viewer = serializers.SerializerMethodField()
 
+    viewer_following_ids = None
+
+    class Meta:
+        list_serializer_class = ViewerStateListSerializer
+
+    def preload_viewer_state(self, instances):
+        # the ids of the profiles on this page that the viewer follows, fetched in a single query
+        user_profile = self.context['request'].user.profile
+        self.viewer_following_ids = set(
+            Profile.following.through.objects.filter(
+                from_profile=user_profile, to_profile__in=[obj.pk for obj in instances]
+            ).values_list('to_profile_id', flat=True)
+        )
+
     def get_profile_url(self, obj):
         request = self.context['request']
-        return api_reverse('Profiles_API_v1:profile-detail', kwargs={'username': obj.user.username}, request=request)
+        return reverse_url('Profiles_API_v1:profile-detail', kwargs={'username': obj.user.username}, request=request)
 
     def get_follow_toggle_url(self, obj):
         request = self.context['request']
-        return api_reverse('Profiles_API_v1:follow-toggle', kwargs={'pk': obj.pk}, request=request)
+        return reverse_url('Profiles_API_v1:follow-toggle', kwargs={'pk': obj.pk}, request=request)
 
     def get_is_followed_by_viewer(self, obj):
+        if self.viewer_following_ids is not None:
+            return obj.pk in self.viewer_following_ids
+
         user_profile = self.context['request'].user.profile
         return user_profile.following.filter(pk=obj.pk).exists()
+
+
+class LeaderboardEntrySerializer(serializers.Serializer):
+    rank = serializers.IntegerField(read_only=True)
+    user = ObjectUserSerializer(read_only=True)
+    reputation = serializers.IntegerField(read_only=True)
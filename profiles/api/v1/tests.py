@@ -2,7 +2,10 @@ from rest_framework import status
 from rest_framework.reverse import reverse as api_reverse
 from rest_framework.test import APIClient, APITestCase
 
-from profiles.models import Profile
+from profiles.models import Profile, WeeklyReputation
+from profiles.reputation import reconcile_reputations
+from questans.models import Answer, Question
+from votes.models import Vote
 
 
 class ProfilesAPITestCase(APITestCase):
@@ -125,3 +128,88 @@ class ProfilesAPITestCase(APITestCase):
         self.assertEqual(test_profile.get_following_count(), test_response_data['following_count'])
         self.assertEqual(test_profile.date_of_birth, test_response_data['date_of_birth'])
 
+    def test_following_list_viewer_state(self):
+        test_first_profile = Profile.objects.get(user__email=self.test_first_auth_data['email'])
+        test_second_profile = Profile.objects.get(user__email=self.test_second_auth_data['email'])
+        test_first_profile.following.add(test_second_profile)
+        test_second_profile.following.add(test_first_profile)
+
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.test_first_auth_token}') # passing auth token
+        following_list_url = api_reverse('Profiles_API_v1:following-list', kwargs={'pk': test_second_profile.pk})
+        test_response = self.client.get(path=following_list_url)
+        self.assertEqual(test_response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(test_response.data['results']), 1)
+        # the second user follows the first user, who obviously doesn't follow themselves
+        self.assertFalse(test_response.data['results'][0]['is_followed_by_viewer'])
+
+        followers_list_url = api_reverse('Profiles_API_v1:followers-list', kwargs={'pk': test_first_profile.pk})
+        test_response = self.client.get(path=followers_list_url)
+        self.assertEqual(test_response.status_code, status.HTTP_200_OK)
+        self.assertTrue(test_response.data['results'][0]['is_followed_by_viewer'])
+
+    def test_profile_detail_conditional_get(self):
+        test_second_profile = Profile.objects.get(user__email=self.test_second_auth_data['email'])
+        test_profile_detail_url = api_reverse(
+            'Profiles_API_v1:profile-detail',
+            kwargs={'username': self.test_second_create_user_data['username']}
+        )
+        test_response = self.client.get(path=test_profile_detail_url)
+        test_etag = test_response['ETag']
+        self.assertIn('Last-Modified', test_response)
+
+        # only the validators are looked up
+        with self.assertNumQueries(1):
+            test_response = self.client.get(path=test_profile_detail_url, HTTP_IF_NONE_MATCH=test_etag)
+        self.assertEqual(test_response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(test_response['ETag'], test_etag)
+
+        # being followed changes the profile's followers count
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.test_first_auth_token}') # passing auth token
+        follow_toggle_url = api_reverse('Profiles_API_v1:follow-toggle', kwargs={'pk': test_second_profile.pk})
+        self.client.post(path=follow_toggle_url)
+        test_response = self.client.get(path=test_profile_detail_url, HTTP_IF_NONE_MATCH=test_etag)
+        self.assertEqual(test_response.status_code, status.HTTP_200_OK)
+        self.assertEqual(test_response.data['followers_count'], 1)
+        self.assertNotEqual(test_response['ETag'], test_etag)
+
+    def test_reputation_and_leaderboard(self):
+        test_first_profile = Profile.objects.get(user__email=self.test_first_auth_data['email'])
+        test_second_profile = Profile.objects.get(user__email=self.test_second_auth_data['email'])
+        test_question = Question.objects.create(
+            user=test_first_profile.user, title='What is beyond the walls?', description='Asking for a friend.'
+        )
+        test_answer = Answer.objects.create(user=test_second_profile.user, question=test_question, content='The sea.')
+        Vote.objects.toggle(user=test_first_profile.user, obj=test_answer, value=Vote.UPVOTE)
+        Vote.objects.toggle(user=test_second_profile.user, obj=test_question, value=Vote.DOWNVOTE)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.test_first_auth_token}') # passing auth token
+        self.client.post(path=api_reverse('Questans_API_v1:answer-accept-toggle', kwargs={'pk': test_answer.pk}))
+        self.client.credentials()
+
+        test_first_profile.refresh_from_db()
+        test_second_profile.refresh_from_db()
+        self.assertEqual(test_first_profile.reputation, -2)
+        self.assertEqual(test_second_profile.reputation, 25)
+        self.assertEqual(WeeklyReputation.objects.get(user=test_second_profile.user).reputation, 25)
+
+        leaderboard_url = api_reverse('Profiles_API_v1:leaderboard')
+        for test_period in ('all', 'week'):
+            # read from the top of the reputation index, users without reputation aren't listed
+            with self.assertNumQueries(1):
+                test_response = self.client.get(path=leaderboard_url, data={'period': test_period})
+            self.assertEqual(test_response.status_code, status.HTTP_200_OK)
+            self.assertEqual(
+                [(entry['rank'], entry['user']['username'], entry['reputation']) for entry in test_response.data],
+                [(1, self.test_second_create_user_data['username'], 25)]
+            )
+
+        test_response = self.client.get(path=leaderboard_url, data={'period': 'month'})
+        self.assertEqual(test_response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        # un-accepting the answer takes its points back, and drifted reputations are reconciled
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.test_first_auth_token}') # passing auth token
+        self.client.post(path=api_reverse('Questans_API_v1:answer-accept-toggle', kwargs={'pk': test_answer.pk}))
+        Profile.objects.filter(pk=test_first_profile.pk).update(reputation=100)
+        self.assertEqual(reconcile_reputations(), 1)
+        test_first_profile.refresh_from_db()
+        test_second_profile.refresh_from_db()
+        self.assertEqual((test_first_profile.reputation, test_second_profile.reputation), (-2, 10))
@@ -1,31 +1,73 @@
+from django.utils import timezone
+
+from drf_spectacular.utils import OpenApiParameter, extend_schema
 from rest_framework import generics, permissions, status, views
-from rest_framework.exceptions import NotFound
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.response import Response
 
 from profiles.messages import Messages
-from profiles.models import Profile
+from profiles.models import Profile, WeeklyReputation
+from profiles.reputation import LEADERBOARD_SIZE, get_week
+from qenea_backend.async_views import (AsyncAPIViewMixin,
+                                       AsyncGenericAPIViewMixin)
+from qenea_backend.conditional import ConditionalRetrieveMixin
+from qenea_backend.serializers import SparseFieldsetsViewMixin
 
-from .serializers import ProfileFollowSerializer, ProfileSerializer
+from .serializers import (LeaderboardEntrySerializer, ProfileFollowSerializer,
+                          ProfileSerializer)
 
 
-class ProfileDetailAPIView(generics.RetrieveAPIView):
+class ProfileDetailAPIView(SparseFieldsetsViewMixin, ConditionalRetrieveMixin, generics.RetrieveAPIView):
     """
     Endpoint to view the profile information of users
     """
     permission_classes = (permissions.AllowAny, )
     serializer_class = ProfileSerializer
+    etag_field = 'updated_at'
+    last_modified_field = 'updated_at'
+    etag_varies_by_viewer = False
+
+    def get_validator_queryset(self):
+        return Profile.objects.filter(user__username=self.kwargs['username'])
 
     def get_object(self):
         username = self.kwargs['username']
+        profiles = Profile.objects.select_related('user') if self.is_field_requested('user') else Profile.objects
         try:
-            profile = Profile.objects.select_related('user').get(user__username=username)
+            profile = profiles.get(user__username=username)
         except Profile.DoesNotExist:
             raise NotFound('Oops! Looks like there is no user with that username')
 
         return profile
 
 
-class ProfileRetrieveUpdateAPIView(generics.RetrieveUpdateAPIView):
+class AsyncProfileDetailAPIView(AsyncAPIViewMixin, ProfileDetailAPIView, AsyncGenericAPIViewMixin):
+    """
+    The async retrieve action of ProfileDetailAPIView, see qenea_backend.async_views
+    """
+
+    async def aget_object(self):
+        username = self.kwargs['username']
+        profiles = Profile.objects.select_related('user') if self.is_field_requested('user') else Profile.objects
+        try:
+            profile = await profiles.aget(user__username=username)
+        except Profile.DoesNotExist:
+            raise NotFound('Oops! Looks like there is no user with that username')
+
+        # counted beforehand, as the serializer would count them lazily
+        if self.is_field_requested('following_count'):
+            profile.following_count = await profile.following.acount()
+
+        if self.is_field_requested('followers_count'):
+            profile.followers_count = await profile.followers.acount()
+
+        return profile
+
+    async def get(self, request, *args, **kwargs):
+        return await self.aretrieve(request, *args, **kwargs)
+
+
+class ProfileRetrieveUpdateAPIView(SparseFieldsetsViewMixin, generics.RetrieveUpdateAPIView):
     """
     Endpoint for logged in users to view and update their profile information
     """
@@ -33,7 +75,8 @@ class ProfileRetrieveUpdateAPIView(generics.RetrieveUpdateAPIView):
     serializer_class = ProfileSerializer
 
     def get_object(self):
-        return Profile.objects.select_related('user').get(user=self.request.user)
+        profiles = Profile.objects.select_related('user') if self.is_field_requested('user') else Profile.objects
+        return profiles.get(user=self.request.user)
 
 
 class ProfileFollowToggleAPIView(views.APIView):
@@ -62,6 +105,8 @@ class ProfileFollowToggleAPIView(views.APIView):
         else:
             user_profile.following.add(obj)
 
+        # the follow counts are part of both profiles' payload
+        Profile.objects.filter(pk__in=[user_profile.pk, obj.pk]).update(updated_at=timezone.now())
         return Response(data={'following': following}, status=status.HTTP_200_OK)
 
 
@@ -97,3 +142,39 @@ class ProfileFollowingListAPIView(generics.ListAPIView):
             raise NotFound(Messages.PROFILE_NOT_FOUND_ERROR)
 
         return profile.following.select_related('user')
+
+
+class LeaderboardAPIView(generics.ListAPIView):
+    """
+    Endpoint that provides users (unauthenticated or authenticated) with the users of highest reputation, of all
+    time or of the current week
+    """
+    permission_classes = (permissions.AllowAny, )
+    serializer_class = LeaderboardEntrySerializer
+    pagination_class = None
+    period_query_param = 'period'
+
+    def get_queryset(self):
+        # both leaderboards are read from the top of an index on the reputations, rather than sorting the users
+        period = self.request.query_params.get(self.period_query_param, 'all')
+        if period == 'all':
+            entries = Profile.objects.filter(reputation__gt=0).select_related('user').order_by('-reputation', 'id')
+        elif period == 'week':
+            entries = (
+                WeeklyReputation.objects.filter(week=get_week(), reputation__gt=0).select_related('user__profile')
+                .order_by('-reputation', 'user')
+            )
+        else:
+            raise ValidationError({self.period_query_param: 'The period must be all or week.'})
+
+        entries = list(entries[:LEADERBOARD_SIZE])
+        for rank, entry in enumerate(entries, start=1):
+            entry.rank = rank
+
+        return entries
+
+    @extend_schema(parameters=[
+        OpenApiParameter('period', str, enum=['all', 'week'], description='All time (default) or the current week')
+    ])
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
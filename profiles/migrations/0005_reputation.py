@@ -0,0 +1,46 @@
+# Generated by Django 4.1.1 on 2026-10-18 11:45
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('profiles', '0004_profile_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WeeklyReputation',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('week', models.DateField()),
+                ('reputation', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='reputation',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='profile',
+            index=models.Index(fields=['-reputation', 'id'], name='profile_reputation_id_idx'),
+        ),
+        migrations.AddField(
+            model_name='weeklyreputation',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='weeklyreputation',
+            index=models.Index(fields=['week', '-reputation', 'user'], name='weekly_reputation_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='weeklyreputation',
+            constraint=models.UniqueConstraint(fields=('user', 'week'), name='unique_user_week_reputation'),
+        ),
+    ]
@@ -22,14 +22,32 @@ class Profile(models.Model):
     picture = models.ImageField(_('picture'), default='default_pp.png', upload_to='profile_pictures')
     following = models.ManyToManyField('self', symmetrical=False, related_name='followers', blank=True)
     date_of_birth = models.DateField(_('date of birth'), blank=True, null=True)
+    # maintained incrementally as the user's content is voted on and their answers are accepted (and reconciled
+    # nightly), see profiles.reputation
+    reputation = models.IntegerField(default=0, editable=False)
+    # also set when the profile is followed or unfollowed, as the follow counts are part of its payload
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # backs the all-time leaderboard
+            models.Index(fields=['-reputation', 'id'], name='profile_reputation_id_idx')
+        ]
 
     def __str__(self):
         return f'{self.user}\'s profile'
 
     def get_following_count(self):
+        # profiles can already carry the counts (see profiles.api.v1.views.AsyncProfileDetailAPIView)
+        if hasattr(self, 'following_count'):
+            return self.following_count
+
         return self.following.count()
 
     def get_followers_count(self):
+        if hasattr(self, 'followers_count'):
+            return self.followers_count
+
         return self.followers.count()
 
     def save(self, *args, **kwargs):
@@ -41,3 +59,24 @@ class Profile(models.Model):
             output_size = (dimension, dimension)
             image = img.resize(output_size, Image.LANCZOS)
             image.save(self.picture.path, optimize=True)
+
+
+class WeeklyReputation(models.Model):
+    """
+    The reputation a user gained (or lost) in a week, from its monday, for the weekly leaderboard
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='+')
+    week = models.DateField()
+    reputation = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'week'], name='unique_user_week_reputation')
+        ]
+        indexes = [
+            # backs the weekly leaderboard
+            models.Index(fields=['week', '-reputation', 'user'], name='weekly_reputation_idx')
+        ]
+
+    def __str__(self):
+        return f'{self.user}\'s reputation in the week of {self.week}'
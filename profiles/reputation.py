@@ -0,0 +1,112 @@
+from collections import defaultdict
+from datetime import date, timedelta
+from typing import Dict, Optional
+
+from django.db.models import Count, F, Sum
+from django.utils import timezone
+
+from profiles.models import Profile, WeeklyReputation
+
+# Reputation is maintained incrementally: the vote toggles (and the write-behind votes task) and the answer accept
+# toggle add the change of points to the owners' profiles (and to their reputation of the current week) in the
+# same transaction as the change itself, with one statement per distinct change, so reading a reputation or the
+# leaderboards never aggregates votes. Changes that bypass those paths (deleted content, imports) are corrected by
+# the nightly reconciliation of the all-time reputations, which recomputes them from the denormalized vote counts.
+#
+# the points of an upvote and of a downvote on the content of each model
+VOTE_POINTS = {
+    'question': (5, -2),
+    'answer': (10, -2),
+    'comment': (1, 0)
+}
+ACCEPTED_ANSWER_POINTS = 15
+LEADERBOARD_SIZE = 100
+BATCH_SIZE = 1000
+
+
+def get_week(day: Optional[date] = None) -> date:
+    # weeks start on mondays
+    day = timezone.localdate() if day is None else day
+    return day - timedelta(days=day.weekday())
+
+
+def get_vote_points(model, upvotes: int, downvotes: int) -> int:
+    """
+    The points of a change of `upvotes` upvotes and `downvotes` downvotes (either can be negative) on an object of
+    the model
+    """
+    upvote_points, downvote_points = VOTE_POINTS.get(model._meta.model_name, (0, 0))
+    return upvotes * upvote_points + downvotes * downvote_points
+
+
+def add_reputation(points_by_user: Dict[int, int]):
+    """
+    Adds points to the users' all-time and weekly reputations, in the transaction of the change they're for
+    """
+    users_by_points = defaultdict(list)
+    for user_id, points in points_by_user.items():
+        if points:
+            users_by_points[points].append(user_id)
+
+    if not users_by_points:
+        return
+
+    week = get_week()
+    WeeklyReputation.objects.bulk_create([
+        WeeklyReputation(user_id=user_id, week=week)
+        for user_ids in users_by_points.values() for user_id in user_ids
+    ], ignore_conflicts=True)
+    for points, user_ids in users_by_points.items():
+        # the reputation is part of the profile's payload
+        Profile.objects.filter(user__in=user_ids).update(reputation=F('reputation') + points, updated_at=timezone.now())
+        WeeklyReputation.objects.filter(user__in=user_ids, week=week).update(reputation=F('reputation') + points)
+
+
+def get_reputations() -> Dict[int, int]:
+    """
+    Computes the all-time reputation of every user with voted content or accepted answers, from the content's vote
+    counts (a few GROUP BY queries) rather than from the votes. Accepting one's own answer earns no points
+    """
+    # imported here, as the content models import this module (through votes.models)
+    from comments.models import Comment
+    from questans.models import Answer, Question
+
+    reputations = defaultdict(int)
+    for model in (Question, Answer, Comment):
+        upvote_points, downvote_points = VOTE_POINTS[model._meta.model_name]
+        counts = (
+            model.objects.order_by().values('user_id')
+            .annotate(upvotes=Sum('upvote_count'), downvotes=Sum('downvote_count'))
+            .values_list('user_id', 'upvotes', 'downvotes')
+        )
+        for user_id, upvotes, downvotes in counts:
+            reputations[user_id] += upvotes * upvote_points + downvotes * downvote_points
+
+    accepted_answers = (
+        Question.objects.filter(accepted_answer__isnull=False).exclude(accepted_answer__user=F('user'))
+        .order_by().values('accepted_answer__user_id').annotate(count=Count('pk'))
+        .values_list('accepted_answer__user_id', 'count')
+    )
+    for user_id, count in accepted_answers:
+        reputations[user_id] += count * ACCEPTED_ANSWER_POINTS
+
+    return reputations
+
+
+def reconcile_reputations() -> int:
+    """
+    Corrects the all-time reputations that drifted from the ones computed from the vote counts, and returns the
+    number of profiles corrected. The weekly reputations aren't reconciled, as votes and accepts aren't dated
+    """
+    reputations = get_reputations()
+    corrected = []
+    profiles = Profile.objects.only('pk', 'user_id', 'reputation').order_by('pk')
+    for profile in profiles.iterator(chunk_size=BATCH_SIZE):
+        reputation = reputations.get(profile.user_id, 0)
+        if profile.reputation != reputation:
+            profile.reputation = reputation
+            profile.updated_at = timezone.now()
+            corrected.append(profile)
+
+    Profile.objects.bulk_update(corrected, ['reputation', 'updated_at'], batch_size=BATCH_SIZE)
+    return len(corrected)
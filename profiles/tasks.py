@@ -0,0 +1,16 @@
+from celery import shared_task
+from celery.utils.log import get_task_logger
+
+from profiles.reputation import reconcile_reputations
+
+logger = get_task_logger(__name__)
+
+
+@shared_task(name='reconcile reputations')
+def reconcile():
+    """
+    Corrects the reputations that drifted from the users' vote counts and accepted answers, see profiles.reputation
+    """
+    corrected = reconcile_reputations()
+    logger.info(f'corrected the reputations of {corrected} users')
+    return corrected
@@ -0,0 +1,203 @@
+import inspect
+from functools import wraps
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.http import Http404
+from django.utils.translation import gettext_lazy as _
+
+from asgiref.sync import sync_to_async
+from rest_framework import exceptions
+from rest_framework.authentication import (SessionAuthentication,
+                                           TokenAuthentication,
+                                           get_authorization_header)
+from rest_framework.response import Response
+
+# Async read path. Under ASGI (see scripts/run.sh), Django runs sync views in a thread for each request, the async
+# views below run on the event loop and only hand their queries to the async ORM. They're subclasses of the sync
+# views, so they share their serializers, querysets and options, and only replace the parts that do I/O with async
+# counterparts (`aget_object`, `apaginate_queryset`, `alist`, `aretrieve`...). Serializers must not query the
+# database lazily on this path, what they read is fetched (or preloaded, see `apreload_viewer_state`) beforehand.
+#
+# The read views are mounted with `read_view` on the routes of the sync views, which keep serving the other methods
+# (and every request when settings.ASYNC_READ_VIEWS is off)
+READ_METHODS = ('GET', 'HEAD')
+
+
+class AsyncTokenAuthentication(TokenAuthentication):
+    """
+    Token authentication with the token looked up by the async ORM
+    """
+
+    async def aauthenticate(self, request):
+        auth = get_authorization_header(request).split()
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return None
+
+        if len(auth) != 2:
+            raise exceptions.AuthenticationFailed(_('Invalid token header. Token string should not contain spaces.'))
+
+        try:
+            key = auth[1].decode()
+        except UnicodeError:
+            raise exceptions.AuthenticationFailed(
+                _('Invalid token header. Token string should not contain invalid characters.')
+            )
+
+        model = self.get_model()
+        try:
+            token = await model.objects.select_related('user').aget(key=key)
+        except model.DoesNotExist:
+            raise exceptions.AuthenticationFailed(_('Invalid token.'))
+
+        if not token.user.is_active:
+            raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+
+        return token.user, token
+
+
+class AsyncSessionAuthentication(SessionAuthentication):
+    """
+    Session authentication, with the session loaded in a thread (the session backends aren't async). Requests
+    without a session cookie are anonymous without loading anything
+    """
+
+    async def aauthenticate(self, request):
+        if settings.SESSION_COOKIE_NAME not in request.COOKIES:
+            return None
+
+        return await sync_to_async(self.authenticate)(request)
+
+
+async def apreload_viewer_state(serializer, instances):
+    # the async counterpart of ViewerStateListSerializer's preload, also for single objects
+    if hasattr(serializer, 'apreload_viewer_state'):
+        await serializer.apreload_viewer_state(instances)
+
+
+class AsyncAPIViewMixin(object):
+    """
+    Makes a DRF view's dispatch async: the request is authenticated with the authenticators' `aauthenticate`, and
+    the handler (an async action) is awaited. Goes before the view's class in the bases
+    """
+    authentication_classes = (AsyncTokenAuthentication, AsyncSessionAuthentication)
+
+    async def aperform_authentication(self, request):
+        # Request._authenticate, authenticators without `aauthenticate` are run in a thread
+        for authenticator in request.authenticators:
+            authenticate = getattr(authenticator, 'aauthenticate', None) or sync_to_async(authenticator.authenticate)
+            try:
+                user_auth_tuple = await authenticate(request)
+            except exceptions.APIException:
+                request._not_authenticated()
+                raise
+
+            if user_auth_tuple is not None:
+                request._authenticator = authenticator
+                request.user, request.auth = user_auth_tuple
+                return
+
+        request._not_authenticated()
+
+    async def ainitial(self, request, *args, **kwargs):
+        self.format_kwarg = self.get_format_suffix(**kwargs)
+        request.accepted_renderer, request.accepted_media_type = self.perform_content_negotiation(request)
+        request.version, request.versioning_scheme = self.determine_version(request, *args, **kwargs)
+        await self.aperform_authentication(request)
+        self.check_permissions(request)
+        self.check_throttles(request)
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+        try:
+            await self.ainitial(request, *args, **kwargs)
+            handler = self.http_method_not_allowed
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+
+            # options and method not allowed are sync
+            response = handler(request, *args, **kwargs)
+            if inspect.isawaitable(response):
+                response = await response
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+
+class AsyncGenericAPIViewMixin(object):
+    """
+    The async counterparts of GenericAPIView's and the list and retrieve mixins' methods. Goes after the view's
+    class in the bases, so that the view's own async overrides (e.g. ConditionalListMixin's `alist`) come first
+    """
+
+    async def aget_object(self):
+        queryset = self.filter_queryset(self.get_queryset())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            obj = await queryset.aget(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        except (queryset.model.DoesNotExist, TypeError, ValueError, ValidationError):
+            raise Http404
+
+        self.check_object_permissions(self.request, obj)
+        return obj
+
+    async def apaginate_queryset(self, queryset):
+        if self.paginator is None:
+            return None
+
+        return await self.paginator.apaginate_queryset(queryset, self.request, view=self)
+
+    async def alist(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = await self.apaginate_queryset(queryset)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            await apreload_viewer_state(serializer, page)
+            return self.get_paginated_response(serializer.data)
+
+        instances = [obj async for obj in queryset]
+        serializer = self.get_serializer(instances, many=True)
+        await apreload_viewer_state(serializer, instances)
+        return Response(serializer.data)
+
+    async def aretrieve(self, request, *args, **kwargs):
+        instance = await self.aget_object()
+        serializer = self.get_serializer(instance)
+        await apreload_viewer_state(serializer, [instance])
+        return Response(serializer.data)
+
+
+def read_view(async_view, view):
+    """
+    Serves the read requests of `view`'s route with `async_view` (when settings.ASYNC_READ_VIEWS is on), and the
+    others with `view`, in a thread like Django runs sync views. The returned view passes for `view` (e.g. for the
+    schema generator)
+    """
+    sync_view = sync_to_async(view)
+
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if request.method in READ_METHODS and settings.ASYNC_READ_VIEWS:
+            return await async_view(request, *args, **kwargs)
+
+        return await sync_view(request, *args, **kwargs)
+
+    return wrapper
+
+
+def with_read_views(patterns, async_views):
+    """
+    Mounts `read_view`s on the url patterns (e.g. a router's) named in `async_views`, a dict of async views by
+    route name
+    """
+    for pattern in patterns:
+        if pattern.name in async_views:
+            pattern.callback = read_view(async_views[pattern.name], pattern.callback)
+
+    return patterns
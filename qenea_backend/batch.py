@@ -0,0 +1,115 @@
+import asyncio
+import json
+from io import BytesIO
+from urllib.parse import urlsplit
+
+from django.core.handlers.wsgi import WSGIRequest
+from django.db import transaction
+from django.urls import Resolver404, resolve
+
+from asgiref.sync import async_to_sync
+from drf_spectacular.utils import extend_schema
+from rest_framework import permissions, serializers, status, views
+from rest_framework.response import Response
+
+API_PREFIX = '/api/v1/'
+BATCH_MAX_REQUESTS = 20
+# the headers of the batch request that aren't passed on to its sub-requests: the conditional headers (which are for
+# the batch's response) and the body's. The credentials (the Authorization header and the session cookie) are passed
+# on, so the sub-requests are authenticated by their views like the batch is
+BATCH_EXCLUDED_HEADERS = ('HTTP_IF_', 'CONTENT_')
+
+
+class BatchItemSerializer(serializers.Serializer):
+    method = serializers.ChoiceField(choices=('GET', 'POST', 'PUT', 'PATCH', 'DELETE'))
+    # relative to /api/v1/ (or starting with it), with an optional query string
+    path = serializers.CharField()
+    body = serializers.JSONField(required=False)
+
+
+class BatchSerializer(serializers.Serializer):
+    requests = serializers.ListField(child=BatchItemSerializer(), min_length=1, max_length=BATCH_MAX_REQUESTS)
+    # whether the sub-requests are run in a single transaction, rolled back (and the rest of them skipped) as soon
+    # as one of them fails
+    atomic = serializers.BooleanField(default=False)
+
+
+class BatchAPIView(views.APIView):
+    """
+    Endpoint that runs a list of v1 API requests in-process, in order, and returns their status codes and bodies.
+    The sub-requests don't go through the middleware, they're authenticated with the batch's credentials by their
+    views (and go through their permissions and throttles)
+    """
+    permission_classes = (permissions.AllowAny, )
+
+    def get_sub_request(self, item):
+        request = self.request
+        url = urlsplit(item['path'])
+        path = url.path.lstrip('/')
+        if path.startswith(API_PREFIX.lstrip('/')):
+            path = path[len(API_PREFIX) - 1:]
+
+        body = json.dumps(item['body']).encode() if 'body' in item else b''
+        environ = {key: value for key, value in request.META.items() if not key.startswith(BATCH_EXCLUDED_HEADERS)}
+        environ.update({
+            'REQUEST_METHOD': item['method'],
+            'PATH_INFO': f'{API_PREFIX}{path}',
+            'QUERY_STRING': url.query,
+            'HTTP_ACCEPT': 'application/json',
+            'CONTENT_TYPE': 'application/json',
+            'CONTENT_LENGTH': str(len(body)),
+            'wsgi.input': BytesIO(body),
+            # not in the META of ASGI requests
+            'wsgi.url_scheme': request.scheme
+        })
+        sub_request = WSGIRequest(environ)
+        # what the session and authentication middleware would have set, for session authentication. The batch's
+        # request was checked against CSRF if it was authenticated with the session, so its sub-requests aren't
+        sub_request.session = request._request.session
+        sub_request.user = request._request.user
+        sub_request._dont_enforce_csrf_checks = True
+        return sub_request
+
+    def dispatch_item(self, item) -> Response:
+        sub_request = self.get_sub_request(item)
+        try:
+            match = resolve(sub_request.path_info)
+        except Resolver404:
+            return Response({'detail': 'Not found.'}, status=status.HTTP_404_NOT_FOUND)
+
+        if getattr(match.func, 'view_class', None) is type(self):
+            return Response({'detail': 'Batches can\'t be nested.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        view = match.func
+        if asyncio.iscoroutinefunction(view):
+            # async views (see qenea_backend.async_views) run their queries in this thread, so in the batch's
+            # transaction
+            view = async_to_sync(view)
+
+        return view(sub_request, *match.args, **match.kwargs)
+
+    def get_item_result(self, response) -> dict:
+        # non api responses (like streaming exports) are only reported by status
+        return {'status': response.status_code, 'body': getattr(response, 'data', None)}
+
+    @extend_schema(request=BatchSerializer, responses=None)
+    def post(self, request, *args, **kwargs):
+        serializer = BatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        items, atomic = serializer.validated_data['requests'], serializer.validated_data['atomic']
+        if not atomic:
+            results = [self.get_item_result(self.dispatch_item(item)) for item in items]
+            return Response({'committed': True, 'responses': results}, status=status.HTTP_200_OK)
+
+        results = []
+        with transaction.atomic():
+            for item in items:
+                results.append(self.get_item_result(self.dispatch_item(item)))
+                if results[-1]['status'] >= 400:
+                    transaction.set_rollback(True)
+                    break
+
+        committed = len(results) == len(items) and results[-1]['status'] < 400
+        # the sub-requests after a failed one aren't run
+        results.extend({'status': status.HTTP_424_FAILED_DEPENDENCY, 'body': None} for _ in items[len(results):])
+        return Response({'committed': committed, 'responses': results}, status=status.HTTP_200_OK)
@@ -0,0 +1,117 @@
+from typing import Dict
+
+from django.conf import settings
+from django.core.cache import cache
+
+from asgiref.sync import sync_to_async
+from rest_framework.response import Response
+
+from qenea_backend.async_views import apreload_viewer_state
+
+RESPONSE_CACHE_PREFIX = 'response'
+
+
+def get_response_cache_stats(name: str) -> Dict[str, int]:
+    """
+    Returns the number of cache hits and misses recorded for the responses cached under `name`
+    """
+    counters = cache.get_many([f'{RESPONSE_CACHE_PREFIX}:{name}:hits', f'{RESPONSE_CACHE_PREFIX}:{name}:misses'])
+    return {
+        'hits': counters.get(f'{RESPONSE_CACHE_PREFIX}:{name}:hits', 0),
+        'misses': counters.get(f'{RESPONSE_CACHE_PREFIX}:{name}:misses', 0)
+    }
+
+
+def increment_counter(key: str):
+    # add() only sets the counter if it doesn't exist yet, so concurrent increments aren't lost
+    cache.add(key, 0, timeout=None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # the counter was evicted between the two calls
+        cache.set(key, 1, timeout=None)
+
+
+async def aincrement_counter(key: str):
+    # increment_counter, with the cache's async methods
+    await cache.aadd(key, 0, timeout=None)
+    try:
+        await cache.aincr(key)
+    except ValueError:
+        await cache.aset(key, 1, timeout=None)
+
+
+class VersionedCacheRetrieveMixin(object):
+    """
+    Caches the viewer independent part of the retrieve action's payload, keyed by the object's `version` (which is
+    bumped whenever something in the payload changes), so cached payloads never have to be invalidated. The
+    `viewer_fields` are computed on every request and merged into the cached payload.
+
+    The payload also holds data of related objects which doesn't bump the version (e.g. the user's profile
+    picture), which is why entries expire after RESPONSE_CACHE_TIMEOUT seconds
+    """
+    cache_name: str = None
+    viewer_fields = ('is_upvoted_by_viewer', 'is_downvoted_by_viewer')
+
+    def get_cache_key(self, instance):
+        # the payload holds absolute urls, so it also depends on the host the request was made to
+        request = self.request
+        return (
+            f'{RESPONSE_CACHE_PREFIX}:{self.cache_name}:{instance.pk}:{instance.version}:'
+            f'{request.scheme}:{request.get_host()}'
+        )
+
+    def is_sparse(self) -> bool:
+        # overridden by SparseFieldsetsViewMixin, the payloads of sparse fieldsets are served from the cached full
+        # payload but aren't cached themselves
+        return False
+
+    def get_counter_key(self, name: str) -> str:
+        return f'{RESPONSE_CACHE_PREFIX}:{self.cache_name}:{name}'
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        serializer = self.get_serializer(instance)
+        cache_key = self.get_cache_key(instance)
+        data = cache.get(cache_key)
+        if data is None:
+            increment_counter(self.get_counter_key('misses'))
+            data = serializer.data
+            if not self.is_sparse():
+                cache.set(cache_key, self.get_cache_data(data), timeout=settings.RESPONSE_CACHE_TIMEOUT)
+
+            return Response(data)
+
+        increment_counter(self.get_counter_key('hits'))
+        return self.get_cached_response(instance, serializer, data)
+
+    async def aretrieve(self, request, *args, **kwargs):
+        instance = await self.aget_object()
+        serializer = self.get_serializer(instance)
+        await apreload_viewer_state(serializer, [instance])
+        cache_key = self.get_cache_key(instance)
+        data = await cache.aget(cache_key)
+        if data is None:
+            await aincrement_counter(self.get_counter_key('misses'))
+            # the full payload can read relations that aren't fetched with the object (e.g. the question's tags),
+            # so on misses it's serialized in a thread
+            data = await sync_to_async(lambda: serializer.data)()
+            if not self.is_sparse():
+                await cache.aset(cache_key, self.get_cache_data(data), timeout=settings.RESPONSE_CACHE_TIMEOUT)
+
+            return Response(data)
+
+        await aincrement_counter(self.get_counter_key('hits'))
+        return self.get_cached_response(instance, serializer, data)
+
+    def get_cache_data(self, data):
+        return {name: value for name, value in data.items() if name not in self.viewer_fields}
+
+    def get_cached_response(self, instance, serializer, data):
+        for name in self.viewer_fields:
+            if name in serializer.fields:
+                field = serializer.fields[name]
+                data[name] = field.to_representation(field.get_attribute(instance))
+
+        # the fields are put back in the serializer's order
+        return Response({name: data[name] for name in serializer.fields if name in data})
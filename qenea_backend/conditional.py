@@ -0,0 +1,177 @@
+import hashlib
+from datetime import datetime
+from typing import Optional, Tuple
+
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+
+
+class ConditionalResponseMixin(object):
+    """
+    Base for the conditional GET mixins: answers requests whose If-None-Match (or If-Modified-Since) validators
+    still match with 304 Not Modified, and adds the ETag and Last-Modified headers to the other responses.
+
+    ETags are weak (the payload of an unchanged object can still differ in ways clients don't care about), and
+    also vary with the viewer (when the payload has viewer specific fields) and the renderer
+    """
+    etag_varies_by_viewer = True
+
+    def make_etag(self, *parts) -> str:
+        request = self.request
+        if self.etag_varies_by_viewer:
+            parts = (*parts, request.user.pk)
+
+        parts = (*parts, request.accepted_renderer.format)
+        return 'W/"%s"' % hashlib.md5(':'.join(map(str, parts)).encode()).hexdigest()
+
+    def get_conditional_response(self, etag: Optional[str], last_modified: Optional[datetime] = None):
+        if etag is None:
+            return None
+
+        last_modified = int(last_modified.timestamp()) if last_modified else None
+        response = get_conditional_response(self.request, etag=etag, last_modified=last_modified)
+        if response is not None:
+            self.set_validator_headers(response, etag, last_modified)
+
+        return response
+
+    def set_validator_headers(self, response, etag: Optional[str], last_modified: Optional[int]):
+        if etag is None:
+            return
+
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+
+        if self.etag_varies_by_viewer:
+            patch_vary_headers(response, ('Authorization', ))
+
+
+class ConditionalRetrieveMixin(ConditionalResponseMixin):
+    """
+    Conditional GET for the retrieve action. The validators are the object's `etag_field` and
+    `last_modified_field`, read with a single (indexed) query on the object's row before anything is serialized
+    """
+    etag_field = 'version'
+    last_modified_field = 'modified_at'
+
+    def get_validator_queryset(self):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        return self.get_queryset().filter(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+
+    def get_validators(self) -> Tuple[Optional[str], Optional[datetime]]:
+        row = self.get_validator_queryset().values_list(self.etag_field, self.last_modified_field).first()
+        return self.make_validators(row)
+
+    async def aget_validators(self) -> Tuple[Optional[str], Optional[datetime]]:
+        row = await self.get_validator_queryset().values_list(self.etag_field, self.last_modified_field).afirst()
+        return self.make_validators(row)
+
+    def make_validators(self, row) -> Tuple[Optional[str], Optional[datetime]]:
+        if row is None:
+            # left for the retrieve action to respond with 404
+            return None, None
+
+        etag_value, last_modified = row
+        return self.make_etag(etag_value), last_modified
+
+    def retrieve(self, request, *args, **kwargs):
+        etag, last_modified = self.get_validators()
+        response = self.get_conditional_response(etag, last_modified)
+        if response is not None:
+            return response
+
+        response = super().retrieve(request, *args, **kwargs)
+        self.set_validator_headers(response, etag, int(last_modified.timestamp()) if last_modified else None)
+        return response
+
+    async def aretrieve(self, request, *args, **kwargs):
+        etag, last_modified = await self.aget_validators()
+        response = self.get_conditional_response(etag, last_modified)
+        if response is not None:
+            return response
+
+        response = await super().aretrieve(request, *args, **kwargs)
+        self.set_validator_headers(response, etag, int(last_modified.timestamp()) if last_modified else None)
+        return response
+
+
+class ConditionalListMixin(ConditionalResponseMixin):
+    """
+    Conditional GET for the first page of the list action (later pages aren't polled). The ETag is computed from
+    the `list_etag_fields` (primary key and version) of the rows of the page and the total count of page number
+    pages. There's no Last-Modified, as an object leaving the page doesn't make the page any more recent.
+
+    For conditional requests the ETag is computed with `values_list` queries before anything is serialized, for the
+    others it's computed from the page that is served, at no extra cost
+    """
+    list_etag_fields = ('pk', 'version')
+    etag_page = None
+
+    def is_first_page(self):
+        query_params = self.request.query_params
+        return (query_params.get(self.paginator.page_number_paginator.page_query_param, '1') == '1'
+                and self.paginator.keyset_paginator.cursor_query_param not in query_params)
+
+    def is_conditional_request(self):
+        return 'HTTP_IF_NONE_MATCH' in self.request.META
+
+    def make_list_etag(self, count, rows):
+        return self.make_etag(self.request.get_full_path(), count, *rows)
+
+    def get_list_etag_rows(self, queryset):
+        return queryset.values_list(*self.list_etag_fields)[:self.paginator.get_page_size(self.request)]
+
+    def get_list_etag(self, queryset) -> str:
+        count = None if self.paginator.is_cursor_mode(self.request) else queryset.count()
+        return self.make_list_etag(count, [tuple(row) for row in self.get_list_etag_rows(queryset)])
+
+    async def aget_list_etag(self, queryset) -> str:
+        count = None if self.paginator.is_cursor_mode(self.request) else await queryset.acount()
+        return self.make_list_etag(count, [tuple(row) async for row in self.get_list_etag_rows(queryset)])
+
+    def paginate_queryset(self, queryset):
+        self.etag_page = super().paginate_queryset(queryset)
+        return self.etag_page
+
+    async def apaginate_queryset(self, queryset):
+        self.etag_page = await super().apaginate_queryset(queryset)
+        return self.etag_page
+
+    def get_page_etag(self, response) -> Optional[str]:
+        # the ETag of the page that was served
+        if self.etag_page is None:
+            return None
+
+        rows = [tuple(getattr(obj, name) for name in self.list_etag_fields) for obj in self.etag_page]
+        return self.make_list_etag(response.data.get('count'), rows)
+
+    def list(self, request, *args, **kwargs):
+        if not self.is_first_page():
+            return super().list(request, *args, **kwargs)
+
+        etag = None
+        if self.is_conditional_request():
+            etag = self.get_list_etag(self.filter_queryset(self.get_queryset()))
+            response = self.get_conditional_response(etag)
+            if response is not None:
+                return response
+
+        response = super().list(request, *args, **kwargs)
+        self.set_validator_headers(response, etag or self.get_page_etag(response), None)
+        return response
+
+    async def alist(self, request, *args, **kwargs):
+        if not self.is_first_page():
+            return await super().alist(request, *args, **kwargs)
+
+        etag = None
+        if self.is_conditional_request():
+            etag = await self.aget_list_etag(self.filter_queryset(self.get_queryset()))
+            response = self.get_conditional_response(etag)
+            if response is not None:
+                return response
+
+        response = await super().alist(request, *args, **kwargs)
+        self.set_validator_headers(response, etag or self.get_page_etag(response), None)
+        return response
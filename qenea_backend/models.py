@@ -0,0 +1,37 @@
+from django.db import models
+from django.db.models import F
+from django.utils import timezone
+
+
+class VersionedModel(models.Model):
+    """
+    Abstract base for models whose API payload is cached and validated by version (see qenea_backend.cache and
+    qenea_backend.conditional). Saving an existing object bumps its version and modification time, other changes
+    to the payload (votes, answers, comments) bump them with the updates of `get_version_updates()`
+    """
+    version = models.PositiveIntegerField(default=1, editable=False)
+    # unlike `updated_at` (the last edit), also changes when the object is voted on, answered or commented on
+    modified_at = models.DateTimeField(default=timezone.now, editable=False)
+
+    class Meta:
+        abstract = True
+
+    @staticmethod
+    def get_version_updates() -> dict:
+        # the version is incremented by the database, so concurrent bumps aren't lost
+        return {'version': F('version') + 1, 'modified_at': timezone.now()}
+
+    def save(self, *args, **kwargs):
+        if self._state.adding:
+            return super().save(*args, **kwargs)
+
+        version_updates = self.get_version_updates()
+        for name, value in version_updates.items():
+            setattr(self, name, value)
+
+        if kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = [*kwargs['update_fields'], *version_updates]
+
+        super().save(*args, **kwargs)
+        # the version is left unloaded (a deferred field) rather than refreshed, it's only queried when it's read
+        del self.__dict__['version']
@@ -1,7 +1,293 @@
-from rest_framework.pagination import PageNumberPagination
+import datetime
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import OrderedDict
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.paginator import InvalidPage
+from django.db.models import Q
+from django.utils.translation import gettext_lazy as _
+
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
 
 
 class DefaultPageNumberPagination(PageNumberPagination):
     page_size = 10
     page_size_query_param = 'size'
     max_page_size = 100
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """
+        paginate_queryset, with the count and the page's rows fetched with the async ORM
+        """
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        paginator = self.django_paginator_class(queryset, page_size)
+        # set beforehand, so the paginator doesn't count the rows itself
+        paginator.count = await queryset.acount()
+        page_number = self.get_page_number(request, paginator)
+        try:
+            self.page = paginator.page(page_number)
+        except InvalidPage as exc:
+            raise NotFound(self.invalid_page_message.format(page_number=page_number, message=str(exc)))
+
+        if paginator.num_pages > 1 and self.template is not None:
+            self.display_page_controls = True
+
+        self.request = request
+        self.page.object_list = [obj async for obj in self.page.object_list]
+        return list(self.page)
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset (seek) pagination. Pages are selected with a `WHERE (ordering columns) < (last row's values)` condition
+    on the queryset's ordering (with the primary key as the tie-breaker), so unlike page numbers there's no
+    COUNT(*) and no OFFSET scan, and deep pages cost the same as the first one when the ordering is backed by
+    an index.
+
+    The cursors are opaque to clients (base64 encoded JSON). Ordering fields must be non-nullable model fields
+    or annotations of the queryset
+    """
+    cursor_query_param = 'cursor'
+    page_size = 10
+    page_size_query_param = 'size'
+    max_page_size = 100
+    invalid_cursor_message = _('Invalid cursor')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        queryset, position = self.get_page_queryset(queryset, request)
+        # an extra row is fetched to know whether there's a page after this one
+        return self.set_page(list(queryset[:self.page_size + 1]), position)
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        queryset, position = self.get_page_queryset(queryset, request)
+        return self.set_page([obj async for obj in queryset[:self.page_size + 1]], position)
+
+    def get_page_queryset(self, queryset, request):
+        """
+        Returns the queryset of the requested page (without its size limit) and the cursor's position
+        """
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.model = queryset.model
+        self.ordering = self.get_ordering(queryset)
+        position, self.reverse = self.decode_cursor(request)
+
+        ordering = self.ordering
+        if self.reverse:
+            ordering = [(field_name, not descending) for field_name, descending in ordering]
+
+        queryset = queryset.order_by(*[f'-{name}' if descending else name for name, descending in ordering])
+        if position is not None:
+            queryset = queryset.filter(self.get_position_filter(ordering, position))
+
+        return queryset, position
+
+    def set_page(self, results, position):
+        has_more = len(results) > self.page_size
+        self.page = results[:self.page_size]
+        if self.reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = position is not None, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+
+        return self.page
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+            if page_size > 0:
+                return min(page_size, self.max_page_size)
+        except (KeyError, ValueError):
+            pass
+
+        return self.page_size
+
+    def get_ordering(self, queryset):
+        """
+        Returns the queryset's ordering as (field name, descending) pairs, ending with the primary key
+        """
+        order_by = queryset.query.order_by or queryset.model._meta.ordering
+        ordering = []
+        for field_name in order_by:
+            assert isinstance(field_name, str) and '__' not in field_name, (
+                'Keyset pagination only supports ordering by fields of the model or annotations.'
+            )
+            name = field_name.lstrip('-')
+            if name == queryset.model._meta.pk.name:
+                name = 'pk'
+
+            ordering.append((name, field_name.startswith('-')))
+
+        if not ordering or ordering[-1][0] != 'pk':
+            ordering.append(('pk', ordering[-1][1] if ordering else False))
+
+        return ordering
+
+    def get_position_filter(self, ordering, position):
+        # (a, b) < (x, y) is expanded to a < x OR (a = x AND b < y), which also supports mixed directions
+        condition = Q()
+        for index, (field_name, descending) in enumerate(ordering):
+            lookup = Q(**{f'{field_name}__{"lt" if descending else "gt"}': position[index]})
+            for previous_index in range(index):
+                lookup &= Q(**{ordering[previous_index][0]: position[previous_index]})
+
+            condition |= lookup
+
+        return condition
+
+    def get_position(self, instance):
+        return [getattr(instance, field_name) for field_name, _ in self.ordering]
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None, False
+
+        try:
+            cursor = json.loads(urlsafe_b64decode(encoded.encode('ascii')))
+            values, reverse = cursor['p'], bool(cursor.get('r'))
+            if len(values) != len(self.ordering):
+                raise ValueError
+
+            position = [self.to_python(field_name, value) for (field_name, _), value in zip(self.ordering, values)]
+            return position, reverse
+        except (TypeError, ValueError, KeyError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def to_python(self, field_name, value):
+        try:
+            field = self.model._meta.pk if field_name == 'pk' else self.model._meta.get_field(field_name)
+        except FieldDoesNotExist:
+            # annotations are stored as plain JSON values (numbers or booleans)
+            return value
+
+        return field.to_python(value)
+
+    def encode_cursor(self, position, reverse=False):
+        # datetimes are encoded with their full precision (DjangoJSONEncoder drops microseconds), otherwise rows
+        # created within the same millisecond could be skipped
+        cursor = {'p': [value.isoformat() if isinstance(value, datetime.datetime) else value for value in position]}
+        if reverse:
+            cursor['r'] = 1
+
+        encoded = urlsafe_b64encode(json.dumps(cursor).encode('ascii')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+
+        return self.encode_cursor(self.get_position(self.page[-1]))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+
+        return self.encode_cursor(self.get_position(self.page[0]), reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data)
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                'name': self.cursor_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'The pagination cursor value.',
+                'schema': {'type': 'string'},
+            },
+            {
+                'name': self.page_size_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'Number of results to return per page.',
+                'schema': {'type': 'integer'},
+            }
+        ]
+
+
+class FeedPagination(BasePagination):
+    """
+    Page number pagination by default (for backward compatibility), or keyset pagination for clients that opt
+    into it with `?pagination=cursor` (the `next` and `previous` links keep the parameter)
+    """
+    mode_query_param = 'pagination'
+    cursor_mode = 'cursor'
+
+    def __init__(self):
+        self.page_number_paginator = DefaultPageNumberPagination()
+        self.keyset_paginator = KeysetPagination()
+        self.paginator = self.page_number_paginator
+
+    def is_cursor_mode(self, request):
+        query_params = request.query_params
+        return (query_params.get(self.mode_query_param) == self.cursor_mode
+                or self.keyset_paginator.cursor_query_param in query_params)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.is_cursor_mode(request):
+            self.paginator = self.keyset_paginator
+
+        return self.paginator.paginate_queryset(queryset, request, view=view)
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        if self.is_cursor_mode(request):
+            self.paginator = self.keyset_paginator
+
+        return await self.paginator.apaginate_queryset(queryset, request, view=view)
+
+    def get_page_size(self, request):
+        # both paginators read the page size from the same query parameter
+        return self.page_number_paginator.get_page_size(request)
+
+    def get_paginated_response(self, data):
+        return self.paginator.get_paginated_response(data)
+
+    def get_paginated_response_schema(self, schema):
+        return self.page_number_paginator.get_paginated_response_schema(schema)
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            *self.page_number_paginator.get_schema_operation_parameters(view),
+            {
+                'name': self.mode_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'Set to "cursor" to paginate with cursors instead of page numbers.',
+                'schema': {'type': 'string', 'enum': [self.cursor_mode]},
+            },
+            {
+                'name': self.keyset_paginator.cursor_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'The pagination cursor value.',
+                'schema': {'type': 'string'},
+            }
+        ]
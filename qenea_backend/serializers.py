@@ -0,0 +1,110 @@
+from typing import Iterable, Optional, Set, Tuple
+
+from django.db import models
+
+from rest_framework import permissions, serializers
+from rest_framework.exceptions import ValidationError
+
+
+class ViewerStateListSerializer(serializers.ListSerializer):
+    """
+    List serializer that lets its child resolve the viewer-specific state of a whole page in bulk (through the
+    child's `preload_viewer_state` method) before each object is represented, instead of once per object
+    """
+
+    viewer_state_preloaded = False
+
+    def to_representation(self, data):
+        iterable = data.all() if isinstance(data, models.Manager) else data
+        instances = list(iterable)
+        if not self.viewer_state_preloaded:
+            self.child.preload_viewer_state(instances)
+
+        return [self.child.to_representation(item) for item in instances]
+
+    async def apreload_viewer_state(self, instances):
+        # for async views, which preload the page's viewer state (with the child's `apreload_viewer_state`) before
+        # it's represented
+        await self.child.apreload_viewer_state(instances)
+        self.viewer_state_preloaded = True
+
+
+class SparseFieldsetsMixin(object):
+    """
+    Lets serializers be instantiated with the names of the only fields to represent (`fields`) and of the fields not
+    to represent (`omit`). The other fields are removed from the serializer, so they aren't computed at all
+    """
+
+    def __init__(self, *args, fields: Optional[Iterable[str]] = None, omit: Optional[Iterable[str]] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is None and not omit:
+            return
+
+        fields, omit = None if fields is None else set(fields), set(omit or ())
+        # invalid names are reported under the argument they were given in
+        errors = {}
+        for argument, names in (('fields', fields or set()), ('omit', omit)):
+            invalid_fields = names.difference(self.fields)
+            if invalid_fields:
+                errors[argument] = (
+                    f'Invalid field(s): {", ".join(sorted(invalid_fields))}. The options are: {", ".join(self.fields)}.'
+                )
+
+        if errors:
+            raise ValidationError(errors)
+
+        for name in list(self.fields):
+            if (fields is not None and name not in fields) or name in omit:
+                self.fields.pop(name)
+
+
+class SparseFieldsetsViewMixin(object):
+    """
+    Reads the sparse fieldset of safe requests from the `fields` and `omit` query parameters (comma separated field
+    names) and passes it to the view's serializer (see SparseFieldsetsMixin). Views can check which fields are
+    represented with `is_field_requested`, to skip the joins and prefetches of the others
+    """
+    fields_query_param = 'fields'
+    omit_query_param = 'omit'
+
+    def get_sparse_fieldset(self) -> Tuple[Optional[Set[str]], Set[str]]:
+        if self.request.method not in permissions.SAFE_METHODS:
+            # the fields of writes are all validated and represented
+            return None, set()
+
+        def parse(query_param):
+            value = self.request.query_params.get(query_param)
+            return None if value is None else {name.strip() for name in value.split(',') if name.strip()}
+
+        return parse(self.fields_query_param), parse(self.omit_query_param) or set()
+
+    def is_sparse(self) -> bool:
+        fields, omit = self.get_sparse_fieldset()
+        return fields is not None or bool(omit)
+
+    def is_field_requested(self, name: str) -> bool:
+        fields, omit = self.get_sparse_fieldset()
+        return (fields is None or name in fields) and name not in omit
+
+    def get_serializer(self, *args, **kwargs):
+        return self.get_sparse_serializer(super().get_serializer, *args, **kwargs)
+
+    def get_sparse_serializer(self, serializer_class, *args, **kwargs):
+        """
+        Instantiates `serializer_class` (a SparseFieldsetsMixin serializer, or a callable returning one) with the
+        sparse fieldset, for the serializers of actions that don't use `get_serializer`. Invalid field names are
+        reported under the query parameter they were given in
+        """
+        fields, omit = self.get_sparse_fieldset()
+        kwargs.setdefault('fields', fields)
+        kwargs.setdefault('omit', omit)
+        try:
+            return serializer_class(*args, **kwargs)
+        except ValidationError as exc:
+            query_params = {'fields': self.fields_query_param, 'omit': self.omit_query_param}
+            raise ValidationError({query_params.get(key, key): detail for key, detail in exc.detail.items()})
+
+    def make_etag(self, *parts) -> str:
+        # the payload of a sparse fieldset differs from the full one
+        fields, omit = self.get_sparse_fieldset()
+        return super().make_etag(*parts, sorted(fields) if fields is not None else None, sorted(omit))
@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/3.1/ref/settings/
 
 from pathlib import Path
 
+from celery.schedules import crontab
 from decouple import config
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -49,7 +50,10 @@ INSTALLED_APPS = [
     'accounts.apps.AccountsConfig',
     'profiles.apps.ProfilesConfig',
     'questans.apps.QuestansConfig',
-    'comments.apps.CommentsConfig'
+    'comments.apps.CommentsConfig',
+    'votes.apps.VotesConfig',
+    'search.apps.SearchConfig',
+    'archive.apps.ArchiveConfig'
 ]
 
 MIDDLEWARE = [
@@ -104,6 +108,23 @@ DATABASES = {
 }
 
 
+# Cache
+# Redis when a url is configured (in production), otherwise an in-memory cache (for development and tests)
+REDIS_CACHE_URL = config('REDIS_CACHE_URL', default='')
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': REDIS_CACHE_URL
+    } if REDIS_CACHE_URL else {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'
+    }
+}
+
+# how long (in seconds) cached question and answer payloads are kept, see qenea_backend.cache
+RESPONSE_CACHE_TIMEOUT = 600
+
+
 # Rest framework
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
@@ -205,6 +226,45 @@ CELERY_RESULT_SERIALIZER = 'json'
 
 CELERY_TASK_SERIALIZER = 'json'
 
+CELERY_BEAT_SCHEDULE = {
+    'update-question-hot-scores': {
+        'task': 'update question hot scores',
+        'schedule': 300.0
+    },
+    # shorter than questans.view_counts.FLUSH_LOCK_TIMEOUT
+    'flush-question-views': {
+        'task': 'flush question views',
+        'schedule': 60.0
+    },
+    # shorter than votes.write_behind.APPLY_LOCK_TIMEOUT
+    'apply-pending-votes': {
+        'task': 'apply pending votes',
+        'schedule': 5.0
+    },
+    'reconcile-reputations': {
+        'task': 'reconcile reputations',
+        'schedule': crontab(hour=3, minute=0)
+    }
+}
+
+# how far back (in seconds) the hot scores task looks for question activity, longer than its schedule interval
+# so that runs overlap
+HOT_SCORE_ACTIVITY_WINDOW = 900
+
+# the length (in seconds) of the buckets question views are buffered in, and how long buffered views are kept
+# when they aren't flushed (e.g. while the workers are down), see questans.view_counts
+QUESTION_VIEWS_BUFFER_INTERVAL = 30
+
+QUESTION_VIEWS_BUFFER_TIMEOUT = 3600
+
+# whether vote toggles are enqueued and applied in batches by the apply pending votes task (their endpoints then
+# respond with 202 and the expected vote state) rather than applied in the request, see votes.write_behind
+VOTE_WRITE_BEHIND = config('VOTE_WRITE_BEHIND', default=False, cast=bool)
+
+# whether the read requests of the hot read endpoints are served by their async views (the sync views serve them
+# otherwise), see qenea_backend.async_views
+ASYNC_READ_VIEWS = config('ASYNC_READ_VIEWS', default=True, cast=bool)
+
 
 # DRF_SPECTACULAR SETTINGS
 SPECTACULAR_SETTINGS = {
@@ -19,11 +19,16 @@ from django.urls import include, path
 from drf_spectacular.views import (SpectacularAPIView, SpectacularRedocView,
                                    SpectacularSwaggerView)
 
+from qenea_backend.batch import BatchAPIView
+
 v1_urls = [
     path('', include('accounts.api.v1.urls')),
+    path('', include('archive.api.v1.urls')),
     path('', include('comments.api.v1.urls')),
     path('', include('profiles.api.v1.urls')),
-    path('', include('questans.api.v1.urls'))
+    path('', include('questans.api.v1.urls')),
+    path('', include('search.api.v1.urls')),
+    path('batch/', BatchAPIView.as_view(), name='batch')
 ]
 
 urlpatterns = [
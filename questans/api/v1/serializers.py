@@ -1,13 +1,19 @@
-from typing import List
+from typing import Callable, List, Optional
 
+from django.contrib.contenttypes.models import ContentType
 from django.db import transaction
 
 from rest_framework import serializers
-from rest_framework.reverse import reverse as api_reverse
 
 from accounts.api.v1.serializers import ObjectUserSerializer
-from questans.models import Answer, Question, Tag
+from qenea_backend.reverse import (TemplateHyperlinkedIdentityField,
+                                   TemplateHyperlinkedRelatedField,
+                                   reverse_url)
+from qenea_backend.serializers import (SparseFieldsetsMixin,
+                                       ViewerStateListSerializer)
+from questans.models import Answer, Question, RelatedQuestion, Tag
 from questans.validators import validate_tag
+from votes.models import Vote
 
 
 # custom list serializer to enable passing a list of strings (valid tag strings) to an object's tags field
@@ -20,27 +26,125 @@ class TagListSerializer(serializers.ListSerializer):
         self.child.validators.append(validate_tag)
 
 
-class QuestionListSerializer(serializers.ModelSerializer):
+class TagSerializer(serializers.ModelSerializer):
+    total_questions = serializers.ReadOnlyField(source='questions_count')
+
+    class Meta:
+        model = Tag
+        fields = ('name', 'total_questions')
+
+
+class ViewerVoteStateMixin(object):
+    """
+    Resolves `is_upvoted_by_viewer` and `is_downvoted_by_viewer`. When serializing a list, the viewer's votes for
+    the whole page are fetched with a single query (see ViewerStateListSerializer), otherwise the votes are
+    fetched for each object when it is first represented
+    """
+    viewer_votes = None
+    viewer_vote_fields = ('is_upvoted_by_viewer', 'is_downvoted_by_viewer')
+
+    def get_viewer_votes(self, instances):
+        """
+        Returns the viewer's votes on the objects (a values list query of their ids and values, without the content
+        type filter), or None when there's nothing to look up
+        """
+        if not set(self.viewer_vote_fields).intersection(self.fields):
+            # left out of a sparse fieldset
+            return None
+
+        user = self.context['request'].user
+        if self.viewer_votes is None:
+            self.viewer_votes = {}
+
+        pks = [obj.pk for obj in instances]
+        # objects without a vote are stored as 0 so that they aren't looked up again
+        self.viewer_votes.update(dict.fromkeys(pks, 0))
+        if not user.is_authenticated:
+            return None
+
+        return Vote.objects.filter(user=user, object_id__in=pks).values_list('object_id', 'value')
+
+    def preload_viewer_state(self, instances):
+        votes = self.get_viewer_votes(instances)
+        if votes is not None:
+            content_type = ContentType.objects.get_for_model(self.Meta.model)
+            self.viewer_votes.update(votes.filter(content_type=content_type))
+
+    async def apreload_viewer_state(self, instances):
+        votes = self.get_viewer_votes(instances)
+        if votes is not None:
+            # the content type is joined rather than looked up, as the lookup (until it's cached) isn't async
+            opts = self.Meta.model._meta
+            votes = votes.filter(content_type__app_label=opts.app_label, content_type__model=opts.model_name)
+            self.viewer_votes.update([vote async for vote in votes])
+
+    def get_viewer_vote(self, obj):
+        if self.viewer_votes is None or obj.pk not in self.viewer_votes:
+            self.preload_viewer_state([obj])
+
+        return self.viewer_votes[obj.pk]
+
+    def get_is_upvoted_by_viewer(self, obj):
+        return self.get_viewer_vote(obj) == Vote.UPVOTE
+
+    def get_is_downvoted_by_viewer(self, obj):
+        return self.get_viewer_vote(obj) == Vote.DOWNVOTE
+
+
+class QuestionListSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
     user = ObjectUserSerializer(read_only=True)
     description = serializers.ReadOnlyField(source='get_description_summary')
-    total_points = serializers.ReadOnlyField()
+    total_points = serializers.ReadOnlyField(source='score')
     total_answers = serializers.ReadOnlyField()
+    total_views = serializers.ReadOnlyField(source='views_count')
     tags = TagListSerializer()
 
     class Meta:
         model = Question
-        fields = ('user', 'slug', 'title', 'description', 'total_points', 'total_answers', 'tags', 'created_at')
+        fields = ('user', 'slug', 'title', 'description', 'total_points', 'total_answers', 'total_views', 'tags', 'created_at')
+
+
+class RelatedQuestionSerializer(serializers.ModelSerializer):
+    url = TemplateHyperlinkedRelatedField(
+        source='related',
+        view_name='Questans_API_v1:question-detail',
+        lookup_field='slug',
+        read_only=True
+    )
+    slug = serializers.CharField(source='related.slug', read_only=True)
+    title = serializers.CharField(source='related.title', read_only=True)
+    total_points = serializers.IntegerField(source='related.score', read_only=True)
+    similarity = serializers.FloatField(source='score', read_only=True)
+
+    class Meta:
+        model = RelatedQuestion
+        fields = ('url', 'slug', 'title', 'total_points', 'similarity')
+
+
+class DuplicateQuestionSerializer(serializers.HyperlinkedModelSerializer):
+    url = TemplateHyperlinkedIdentityField(
+        view_name='Questans_API_v1:question-detail',
+        lookup_field='slug'
+    )
+    similarity = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = Question
+        fields = ('url', 'slug', 'title', 'similarity')
 
 
-class QuestionSerializer(serializers.HyperlinkedModelSerializer):
-    url = serializers.HyperlinkedIdentityField(
+class QuestionSerializer(SparseFieldsetsMixin, ViewerVoteStateMixin, serializers.HyperlinkedModelSerializer):
+    url = TemplateHyperlinkedIdentityField(
         view_name='Questans_API_v1:question-detail',
         lookup_field='slug'
     )
     user = ObjectUserSerializer(read_only=True)
-    total_points = serializers.ReadOnlyField()
+    total_points = serializers.ReadOnlyField(source='score')
     total_answers = serializers.ReadOnlyField()
+    # doesn't bump the question's version, so cached payloads can lag by RESPONSE_CACHE_TIMEOUT more
+    total_views = serializers.ReadOnlyField(source='views_count')
     tags = TagListSerializer()
+    accepted_answer = serializers.PrimaryKeyRelatedField(read_only=True)
     answers = serializers.SerializerMethodField(method_name='get_answers_url')
     comments = serializers.SerializerMethodField(method_name='get_comments_url')
     is_upvoted_by_viewer = serializers.SerializerMethodField()
@@ -48,53 +152,53 @@ class QuestionSerializer(serializers.HyperlinkedModelSerializer):
 
     class Meta:
         model = Question
-        fields = ('url', 'user', 'slug', 'title', 'description', 'total_points', 'total_answers', 'tags', 'answers', 'comments', 'created_at', 'updated_at', 'is_upvoted_by_viewer', 'is_downvoted_by_viewer')
+        fields = ('url', 'user', 'slug', 'title', 'description', 'total_points', 'total_answers', 'total_views', 'tags', 'accepted_answer', 'answers', 'comments', 'created_at', 'updated_at', 'is_upvoted_by_viewer', 'is_downvoted_by_viewer')
+        list_serializer_class = ViewerStateListSerializer
 
     @transaction.atomic
     def create(self, validated_data):
         tags_data: List[str] = validated_data.pop('tags')
         instance = Question.objects.create(**validated_data)
-        tag_objects = [Tag.objects.get_or_create(name=tag)[0] for tag in tags_data]
-        instance.tags.set(tag_objects)
+        instance.set_tags(tags_data, is_new=True)
+        # only looked up (and represented) when the question is created
+        instance.likely_duplicates = Question.objects.likely_duplicates(instance)
         return instance
 
     @transaction.atomic
     def update(self, instance, validated_data):
-        tags_data: List[str] = validated_data.pop('tags')
+        tags_data: Optional[List[str]] = validated_data.pop('tags', None)
         instance.title = validated_data.get('title', instance.title)
         instance.description = validated_data.get('description', instance.description)
-        instance.save()
-        tag_objects = [Tag.objects.get_or_create(name=tag)[0] for tag in tags_data]
-        instance.tags.set(tag_objects)
+        # only the editable columns are saved so that vote counts updated in the meantime aren't overwritten
+        instance.save(update_fields=['title', 'slug', 'description', 'updated_at'])
+        if tags_data is not None:
+            instance.set_tags(tags_data)
+
         return instance
 
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        if hasattr(instance, 'likely_duplicates'):
+            data['likely_duplicates'] = DuplicateQuestionSerializer(
+                instance.likely_duplicates, many=True, context=self.context
+            ).data
+
+        return data
+
     def get_answers_url(self, obj):
         request = self.context['request']
-        return api_reverse('Questans_API_v1:question-answers', kwargs={'slug': obj.slug}, request=request)
+        return reverse_url('Questans_API_v1:question-answers', kwargs={'slug': obj.slug}, request=request)
 
     def get_comments_url(self, obj):
         request = self.context['request']
-        return api_reverse('Questans_API_v1:question-comments', kwargs={'slug': obj.slug}, request=request)
-
-    def get_is_upvoted_by_viewer(self, obj):
-        user = self.context['request'].user
-        if user.is_authenticated:
-            return obj.upvotes.filter(pk=user.pk).exists()
-
-        return False
-
-    def get_is_downvoted_by_viewer(self, obj):
-        user = self.context['request'].user
-        if user.is_authenticated:
-            return obj.downvotes.filter(pk=user.pk).exists()
+        return reverse_url('Questans_API_v1:question-comments', kwargs={'slug': obj.slug}, request=request)
 
-        return False
 
-
-class AnswerSerializer(serializers.ModelSerializer):
+class AnswerSerializer(SparseFieldsetsMixin, ViewerVoteStateMixin, serializers.ModelSerializer):
     user = ObjectUserSerializer(read_only=True)
     question = serializers.SlugRelatedField(slug_field='slug', queryset=Question.objects.all())
-    total_points = serializers.ReadOnlyField()
+    is_accepted = serializers.BooleanField(read_only=True)
+    total_points = serializers.ReadOnlyField(source='score')
     comments = serializers.SerializerMethodField(method_name='get_comments_url')
     is_upvoted_by_viewer = serializers.SerializerMethodField()
     is_downvoted_by_viewer = serializers.SerializerMethodField()
@@ -102,22 +206,38 @@ class AnswerSerializer(serializers.ModelSerializer):
     class Meta:
         model = Answer
         fields = ('id', 'user', 'question', 'content', 'is_accepted', 'total_points', 'comments', 'created_at', 'updated_at', 'is_upvoted_by_viewer', 'is_downvoted_by_viewer')
-        read_only_fields = ('id', 'is_accepted')
+        read_only_fields = ('id', )
+        list_serializer_class = ViewerStateListSerializer
+
+    @transaction.atomic
+    def update(self, instance, validated_data):
+        previous_question_id = instance.question_id
+        instance.question = validated_data.get('question', instance.question)
+        instance.content = validated_data.get('content', instance.content)
+        instance.save(update_fields=['question', 'content', 'updated_at'])
+        if instance.question_id != previous_question_id:
+            # an answer moved to another question is no longer accepted
+            Question.objects.filter(pk=previous_question_id, accepted_answer=instance).update(
+                accepted_answer=None, **Question.get_version_updates()
+            )
+
+        return instance
 
     def get_comments_url(self, obj):
         request = self.context['request']
-        return api_reverse('Questans_API_v1:answer-comments', kwargs={'pk': obj.pk}, request=request)
+        return reverse_url('Questans_API_v1:answer-comments', kwargs={'pk': obj.pk}, request=request)
 
-    def get_is_upvoted_by_viewer(self, obj):
-        user = self.context['request'].user
-        if user.is_authenticated:
-            return obj.upvotes.filter(pk=user.pk).exists()
-        
-        return False
 
-    def get_is_downvoted_by_viewer(self, obj):
-        user = self.context['request'].user
-        if user.is_authenticated:
-            return obj.downvotes.filter(pk=user.pk).exists()
+def get_answer_select_related(is_field_requested: Callable[[str], bool], user: str = 'user') -> List[str]:
+    """
+    The relations AnswerSerializer reads for the fields it represents (`user` being the path the user is selected
+    with), to select with the answers
+    """
+    related = []
+    if is_field_requested('user'):
+        related.append(user)
+
+    if is_field_requested('question') or is_field_requested('is_accepted'):
+        related.append('question')
 
-        return False
+    return related
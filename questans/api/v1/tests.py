@@ -0,0 +1,870 @@
+import time
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.request import Request
+from rest_framework.reverse import reverse as api_reverse
+from rest_framework.test import APIClient, APIRequestFactory, APITestCase
+
+from comments.models import Comment
+from qenea_backend.cache import get_response_cache_stats
+from qenea_backend.reverse import reverse_url
+from questans.api.v1.views import AnswerAcceptToggleAPIView
+from questans.models import Answer, Question, QuestionSignatureBand, Tag
+from questans.similarity import MINHASH_BANDS
+from questans.tasks import update_hot_scores
+from questans.view_counts import flush_question_views
+from votes.models import PendingVote, Vote
+from votes.write_behind import apply_pending_votes
+
+User = get_user_model()
+
+
+class QuestansAPITestCase(APITestCase):
+
+    def setUp(self) -> None:
+        # cached payloads are keyed by primary keys, which are reused by the objects of the next tests
+        cache.clear()
+        self.client = APIClient()
+        self.test_password = 'Password@001'
+
+        self.test_first_user = User.objects.create_user(
+            email='eren.yaeger@test.com',
+            password=self.test_password,
+            first_name='eren',
+            last_name='yaeger',
+            username='mr_freedom'
+        )
+        self.test_second_user = User.objects.create_user(
+            email='uzumaki.naruto@test.com',
+            password=self.test_password,
+            first_name='naruto',
+            last_name='uzumaki',
+            username='kyubi_no_jinchuriki'
+        )
+        self.test_first_auth_token = Token.objects.create(user=self.test_first_user).key
+        self.test_second_auth_token = Token.objects.create(user=self.test_second_user).key
+
+        self.test_question = Question.objects.create(
+            user=self.test_first_user,
+            title='How do titans work?',
+            description='Where do they come from and why are they so big?'
+        )
+        self.test_answer = Answer.objects.create(
+            user=self.test_second_user,
+            question=self.test_question,
+            content='Nobody really knows.'
+        )
+
+    def test_question_vote_toggles_update_counts(self):
+        upvote_url = api_reverse('Questans_API_v1:question-upvote-toggle', kwargs={'slug': self.test_question.slug})
+        downvote_url = api_reverse('Questans_API_v1:question-downvote-toggle', kwargs={'slug': self.test_question.slug})
+
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.test_first_auth_token}')
+        test_response = self.client.post(path=upvote_url)
+        self.assertEqual(test_response.status_code, status.HTTP_204_NO_CONTENT)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.test_second_auth_token}')
+        self.client.post(path=upvote_url)
+        self.test_question.refresh_from_db()
+        self.assertEqual(self.test_question.upvote_count, 2)
+        self.assertEqual(self.test_question.downvote_count, 0)
+        self.assertEqual(self.test_question.score, 2)
+
+        # switching from an upvote to a downvote removes the upvote
+        self.client.post(path=downvote_url)
+        self.test_question.refresh_from_db()
+        self.assertEqual(self.test_question.upvote_count, 1)
+        self.assertEqual(self.test_question.downvote_count, 1)
+        self.assertEqual(self.test_question.score, 0)
+
+        # toggling the downvote again removes it
+        self.client.post(path=downvote_url)
+        self.test_question.refresh_from_db()
+        self.assertEqual(self.test_question.downvote_count, 0)
+        self.assertEqual(self.test_question.score, 1)
+
+        detail_url = api_reverse('Questans_API_v1:question-detail', kwargs={'slug': self.test_question.slug})
+        test_response = self.client.get(path=detail_url)
+        self.assertEqual(test_response.data['total_points'], 1)
+        self.assertFalse(test_response.data['is_upvoted_by_viewer'])
+        self.assertFalse(test_response.data['is_downvoted_by_viewer'])
+        self.assertEqual(Vote.objects.for_object(self.test_question).count(), 1)
+
+    @override_settings(VOTE_WRITE_BEHIND=True)
+    def test_vote_toggles_write_behind(self):
+        upvote_url = api_reverse('Questans_API_v1:question-upvote-toggle', kwargs={'slug': self.test_question.slug})
+        downvote_url = api_reverse('Questans_API_v1:question-downvote-toggle', kwargs={'slug': self.test_question.slug})
+        answer_upvote_url = api_reverse('Questans_API_v1:answer-upvote-toggle', kwargs={'pk': self.test_answer.pk})
+        Vote.objects.toggle(user=self.test_second_user, obj=self.test_question, value=Vote.UPVOTE)
+
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.test_first_auth_token}')
+        test_response = self.client.post(path=upvote_url)
+        self.assertEqual(test_response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(test_response.data, {'is_upvoted_by_viewer': True, 'is_downvoted_by_viewer': False})
+        # the expected state accounts for the pending toggles
+        test_response = self.client.post(path=downvote_url)
+        self.assertEqual(test_response.data, {'is_upvoted_by_viewer': False, 'is_downvoted_by_viewer': True})
+        self.client.post(path=answer_upvote_url)
+        self.client.post(path=answer_upvote_url)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.test_second_auth_token}')
+        test_response = self.client.post(path=upvote_url)
+        self.assertEqual(test_response.data, {'is_upvoted_by_viewer': False, 'is_downvoted_by_viewer': False})
+        self.assertEqual(Vote.objects.for_object(self.test_question).count(), 1)
+
+        # savepoint + pending votes + objects (by content type) + votes + delete + insert + question update +
+        # reputation updates (weekly row insert, profile and weekly updates) + outbox delete + release, the canceled
+        # answer upvote isn't written
+        with self.assertNumQueries(13):
+            self.assertEqual(apply_pending_votes(), 5)
+
+        self.test_question.refresh_from_db()
+        self.assertEqual((self.test_question.upvote_count, self.test_question.downvote_count), (0, 1))
+        self.assertEqual(self.test_question.score, -1)
+        self.assertEqual(
+            list(Vote.objects.for_object(self.test_question).values_list('user', 'value')),
+            [(self.test_first_user.pk, Vote.DOWNVOTE)]
+        )
+        self.assertEqual(Vote.objects.for_object(self.test_answer).exists(), False)
+        self.assertEqual(PendingVote.objects.exists(), False)
+
+    def test_answer_vote_toggles_update_counts(self):
+        downvote_url = api_reverse('Questans_API_v1:answer-downvote-toggle', kwargs={'pk': self.test_answer.pk})
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.test_first_auth_token}')
+        test_response = self.client.post(path=downvote_url)
+        self.assertEqual(test_response.status_code, status.HTTP_204_NO_CONTENT)
+        self.test_answer.refresh_from_db()
+        self.assertEqual(self.test_answer.downvote_count, 1)
+        self.assertEqual(self.test_answer.score, -1)
+
+        # editing the answer must not overwrite the stored counts
+        answer_url = api_reverse('Questans_API_v1:answer-detail', kwargs={'pk': self.test_answer.pk})
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.test_second_auth_token}')
+        test_response = self.client.patch(path=answer_url, data={'content': 'Some theories exist.'})
+        self.assertEqual(test_response.status_code, status.HTTP_200_OK)
+        self.assertEqual(test_response.data['total_points'], -1)
+
+    def test_answer_accept_toggle(self):
+        test_other_answer = Answer.objects.create(
+            user=self.test_first_user, question=self.test_question, content='The founding titan made them.'
+        )
+        accept_url = api_reverse('Questans_API_v1:answer-accept-toggle', kwargs={'pk': self.test_answer.pk})
+        other_accept_url = api_reverse('Questans_API_v1:answer-accept-toggle', kwargs={'pk': test_other_answer.pk})
+        answers_url = api_reverse('Questans_API_v1:question-answers', kwargs={'slug': self.test_question.slug})
+
+        # only the question's owner can accept its answers
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.test_second_auth_token}')
+        self.assertEqual(self.client.post(path=accept_url).status_code, status.HTTP_403_FORBIDDEN)
+
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.test_first_auth_token}')
+        test_response = self.client.post(
+            path=api_reverse('Questans_API_v1:answer-accept-toggle', kwargs={'pk': 9999})
+        )
+        self.assertEqual(test_response.status_code, status.HTTP_404_NOT_FOUND)
+
+        # token + the locked question + the question and answers updates (and the transaction's savepoint) + the
+        # answers' users + the reputation updates (weekly row insert, profile and weekly updates)
+        with self.assertNumQueries(10):
+            test_response = self.client.post(path=accept_url)
+        self.assertEqual(test_response.status_code, status.HTTP_204_NO_CONTENT)
+        self.test_question.refresh_from_db()
+        self.assertEqual(self.test_question.accepted_answer_id, self.test_answer.pk)
+
+        # the accepted answer is listed first, even though it's the oldest one
+        test_results = self.client.get(path=answers_url).data['results']
+        self.assertEqual([answer_data['id'] for answer_data in test_results], [self.test_answer.pk, test_other_answer.pk])
+        self.assertEqual([answer_data['is_accepted'] for answer_data in test_results], [True, False])
+
+        # accepting another answer un-accepts the previous one, and bumps both answers' versions
+        test_versions = dict(Answer.objects.values_list('pk', 'version'))
+        self.assertEqual(self.client.post(path=other_accept_url).status_code, status.HTTP_204_NO_CONTENT)
+        self.test_question.refresh_from_db()
+        self.assertEqual(self.test_question.accepted_answer_id, test_other_answer.pk)
+        for pk, version in Answer.objects.values_list('pk', 'version'):
+            self.assertEqual(version, test_versions[pk] + 1)
+
+        detail_url = api_reverse('Questans_API_v1:answer-detail', kwargs={'pk': self.test_answer.pk})
+        test_response = self.client.get(path=detail_url)
+        self.assertFalse(test_response.data['is_accepted'])
+
+        self.assertEqual(self.client.post(path=other_accept_url).status_code, status.HTTP_204_NO_CONTENT)
+        self.test_question.refresh_from_db()
+        self.assertIsNone(self.test_question.accepted_answer_id)
+
+        # a toggle that read the question before another toggle was committed is stale, and changes nothing
+        get_object = AnswerAcceptToggleAPIView.get_object
+
+        def get_stale_object(view):
+            question = get_object(view)
+            Question.objects.filter(pk=question.pk).update(accepted_answer=test_other_answer)
+            return question
+
+        test_versions = dict(Answer.objects.values_list('pk', 'version'))
+        test_reputation = self.test_second_user.profile.reputation
+        with mock.patch.object(AnswerAcceptToggleAPIView, 'get_object', get_stale_object):
+            test_response = self.client.post(path=accept_url)
+        self.assertEqual(test_response.status_code, status.HTTP_409_CONFLICT)
+        self.test_question.refresh_from_db()
+        self.assertEqual(self.test_question.accepted_answer_id, test_other_answer.pk)
+        self.assertEqual(dict(Answer.objects.values_list('pk', 'version')), test_versions)
+        self.test_second_user.profile.refresh_from_db()
+        self.assertEqual(self.test_second_user.profile.reputation, test_reputation)
+
+    def test_question_list_query_budget(self):
+        list_url = api_reverse('Questans_API_v1:question-list')
+        for i in range(12):
+            question = Question.objects.create(user=self.test_second_user, title=f'Question {i}', description='...')
+            question.tags.add(*[Tag.objects.create(name=f'tag-{i}-{j}') for j in range(2)])
+            Answer.objects.create(user=self.test_first_user, question=question, content='An answer')
+
+        # count + page + tags prefetch, no matter how many questions are on the page
+        with self.assertNumQueries(3):
+            test_response = self.client.get(path=list_url, data={'size': 2})
+        self.assertEqual(len(test_response.data['results']), 2)
+
+        with self.assertNumQueries(3):
+            test_response = self.client.get(path=list_url, data={'size': 12})
+        self.assertEqual(len(test_response.data['results']), 12)
+        test_question_data = test_response.data['results'][0]
+        self.assertEqual(test_question_data['title'], 'Question 11')
+        self.assertEqual(test_question_data['total_answers'], 1)
+        self.assertEqual(len(test_question_data['tags']), 2)
+
+    def test_question_answers_list_viewer_vote_state(self):
+        answers_url = api_reverse('Questans_API_v1:question-answers', kwargs={'slug': self.test_question.slug})
+        test_answers = [
+            Answer.objects.create(user=self.test_second_user, question=self.test_question, content=f'Answer {i}')
+            for i in range(5)
+        ]
+        Vote.objects.toggle(user=self.test_first_user, obj=test_answers[0], value=Vote.UPVOTE)
+        Vote.objects.toggle(user=self.test_first_user, obj=test_answers[1], value=Vote.DOWNVOTE)
+
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.test_first_auth_token}')
+        # token + count + page (joined to the question) + the viewer's votes
+        with self.assertNumQueries(4):
+            test_response = self.client.get(path=answers_url, data={'size': 6})
+        self.assertEqual(test_response.status_code, status.HTTP_200_OK)
+        test_vote_states = {
+            answer_data['id']: (answer_data['is_upvoted_by_viewer'], answer_data['is_downvoted_by_viewer'])
+            for answer_data in test_response.data['results']
+        }
+        self.assertEqual(test_vote_states[test_answers[0].pk], (True, False))
+        self.assertEqual(test_vote_states[test_answers[1].pk], (False, True))
+        self.assertEqual(test_vote_states[test_answers[2].pk], (False, False))
+
+    def test_question_answers_list_ordering(self):
+        answers_url = api_reverse('Questans_API_v1:question-answers', kwargs={'slug': self.test_question.slug})
+        test_answers = [
+            Answer.objects.create(user=self.test_second_user, question=self.test_question, content=f'Answer {i}')
+            for i in range(3)
+        ]
+        Vote.objects.toggle(user=self.test_first_user, obj=test_answers[0], value=Vote.UPVOTE)
+        Vote.objects.toggle(user=self.test_second_user, obj=test_answers[0], value=Vote.UPVOTE)
+        Vote.objects.toggle(user=self.test_first_user, obj=test_answers[2], value=Vote.DOWNVOTE)
+        Vote.objects.toggle(user=self.test_first_user, obj=self.test_answer, value=Vote.UPVOTE)
+        Question.objects.filter(pk=self.test_question.pk).update(accepted_answer=test_answers[1])
+
+        test_orderings = {
+            'score': [test_answers[1], test_answers[0], self.test_answer, test_answers[2]],
+            'newest': [test_answers[1], test_answers[2], test_answers[0], self.test_answer],
+            'oldest': [test_answers[1], self.test_answer, test_answers[0], test_answers[2]]
+        }
+        for test_ordering, test_expected_answers in test_orderings.items():
+            test_response = self.client.get(path=answers_url, data={'ordering': test_ordering})
+            self.assertEqual(
+                [answer_data['id'] for answer_data in test_response.data['results']],
+                [answer.pk for answer in test_expected_answers]
+            )
+
+        # the cursors follow the ordering
+        test_response = self.client.get(path=answers_url, data={'ordering': 'score', 'pagination': 'cursor', 'size': 3})
+        test_response = self.client.get(path=test_response.data['next'])
+        self.assertEqual([answer_data['id'] for answer_data in test_response.data['results']], [test_answers[2].pk])
+
+        test_response = self.client.get(path=answers_url, data={'ordering': 'votes'})
+        self.assertEqual(test_response.status_code, status.HTTP_400_BAD_REQUEST)
+        test_response = self.client.get(
+            path=api_reverse('Questans_API_v1:question-answers', kwargs={'slug': 'no-such-question'})
+        )
+        self.assertEqual(test_response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_batch_requests(self):
+        batch_url = api_reverse('batch')
+        upvote_path = f'questions/{self.test_question.slug}/upvote-toggle/'
+        detail_path = f'/api/v1/questions/{self.test_question.slug}/'
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.test_first_auth_token}')
+        test_response = self.client.post(path=batch_url, data={'requests': [
+            {'method': 'POST', 'path': upvote_path},
+            {'method': 'GET', 'path': detail_path},
+            {'method': 'PATCH', 'path': 'profiles/me/', 'body': {'bio': 'Tatakae.'}},
+            {'method': 'GET', 'path': 'questions/?size=1'},
+            {'method': 'GET', 'path': 'no-such-route/'},
+            {'method': 'POST', 'path': 'batch/', 'body': {'requests': []}}
+        ]}, format='json')
+        self.assertEqual(test_response.status_code, status.HTTP_200_OK)
+        test_results = test_response.data['responses']
+        self.assertEqual([result['status'] for result in test_results], [204, 200, 200, 200, 404, 400])
+        # the sub-requests are authenticated as the batch's user
+        self.assertTrue(test_results[1]['body']['is_upvoted_by_viewer'])
+        self.assertEqual(test_results[2]['body']['bio'], 'Tatakae.')
+        self.assertEqual(len(test_results[3]['body']['results']), 1)
+
+        # a failed sub-request rolls the atomic batch back and skips the rest of it
+        test_response = self.client.post(path=batch_url, data={'atomic': True, 'requests': [
+            {'method': 'POST', 'path': upvote_path},
+            {'method': 'POST', 'path': 'answers/9999/accept-toggle/'},
+            {'method': 'GET', 'path': detail_path}
+        ]}, format='json')
+        self.assertEqual(test_response.data['committed'], False)
+        self.assertEqual([result['status'] for result in test_response.data['responses']], [204, 404, 424])
+        self.assertEqual(Vote.objects.filter(user=self.test_first_user).for_object(self.test_question).count(), 1)
+
+        self.client.credentials()
+        test_response = self.client.post(path=batch_url, data={'requests': [
+            {'method': 'GET', 'path': detail_path},
+            {'method': 'POST', 'path': upvote_path}
+        ]}, format='json')
+        self.assertEqual([result['status'] for result in test_response.data['responses']], [200, 401])
+
+        # session authenticated batches pass the session on
+        self.client.force_login(self.test_second_user)
+        test_response = self.client.post(path=batch_url, data={'requests': [
+            {'method': 'POST', 'path': upvote_path},
+            {'method': 'GET', 'path': detail_path}
+        ]}, format='json')
+        self.assertEqual([result['status'] for result in test_response.data['responses']], [204, 200])
+        self.assertTrue(test_response.data['responses'][1]['body']['is_upvoted_by_viewer'])
+
+    async def test_batch_requests_asgi(self):
+        # ASGI requests have no wsgi.url_scheme in their META, the sub-requests get the batch's scheme
+        test_response = await self.async_client.post(
+            api_reverse('batch'),
+            data={'requests': [
+                {'method': 'POST', 'path': f'questions/{self.test_question.slug}/upvote-toggle/'},
+                {'method': 'GET', 'path': f'questions/{self.test_question.slug}/'}
+            ]},
+            content_type='application/json',
+            # the async client takes the headers' names in 4.1
+            AUTHORIZATION=f'Token {self.test_second_auth_token}'
+        )
+        self.assertEqual(test_response.status_code, status.HTTP_200_OK)
+        test_results = test_response.json()['responses']
+        self.assertEqual([result['status'] for result in test_results], [204, 200])
+        self.assertTrue(test_results[1]['body']['is_upvoted_by_viewer'])
+        self.assertEqual(
+            test_results[1]['body']['url'], f'http://testserver/api/v1/questions/{self.test_question.slug}/'
+        )
+
+    def test_sparse_fieldsets(self):
+        list_url = api_reverse('Questans_API_v1:question-list')
+        detail_url = api_reverse('Questans_API_v1:question-detail', kwargs={'slug': self.test_question.slug})
+        answers_url = api_reverse('Questans_API_v1:question-answers', kwargs={'slug': self.test_question.slug})
+        self.test_question.set_tags(['titans'])
+
+        # count + page, without the tags prefetch, the user join and the answers count
+        with self.assertNumQueries(2):
+            test_response = self.client.get(path=list_url, data={'fields': 'slug,title'})
+        self.assertEqual(test_response.status_code, status.HTTP_200_OK)
+        self.assertEqual(list(test_response.data['results'][0]), ['slug', 'title'])
+
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.test_first_auth_token}')
+        test_response = self.client.get(path=detail_url)
+        test_etag = test_response['ETag']
+        # token + validators + question (without the user join), served from the cached full payload without the
+        # viewer's votes
+        with self.assertNumQueries(3):
+            test_response = self.client.get(path=detail_url, data={'fields': 'title,total_points'})
+        self.assertEqual(test_response.data, {'title': self.test_question.title, 'total_points': 0})
+        self.assertNotEqual(test_response['ETag'], test_etag)
+
+        test_response = self.client.get(path=answers_url, data={'omit': 'is_upvoted_by_viewer,is_downvoted_by_viewer'})
+        self.assertNotIn('is_upvoted_by_viewer', test_response.data['results'][0])
+        self.assertIn('content', test_response.data['results'][0])
+
+        test_response = self.client.get(path=list_url, data={'fields': 'title,secret'})
+        self.assertEqual(test_response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(list(test_response.data), ['fields'])
+        test_response = self.client.get(path=detail_url, data={'omit': 'secret'})
+        self.assertEqual(test_response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(list(test_response.data), ['omit'])
+
+        # the comments actions represent the sparse fieldset of the comments
+        Comment.objects.create(user=self.test_second_user, content_object=self.test_question, content='Good one')
+        comments_url = api_reverse('Questans_API_v1:question-comments', kwargs={'slug': self.test_question.slug})
+        test_response = self.client.get(path=comments_url, data={'fields': 'content,total_points'})
+        self.assertEqual(test_response.data['results'], [{'content': 'Good one', 'total_points': 0}])
+        answer_comments_url = api_reverse('Questans_API_v1:answer-comments', kwargs={'pk': self.test_answer.pk})
+        test_response = self.client.get(path=answer_comments_url, data={'omit': 'title'})
+        self.assertEqual(test_response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(list(test_response.data), ['omit'])
+
+    def test_question_create_and_update_tags(self):
+        list_url = api_reverse('Questans_API_v1:question-list')
+        Tag.objects.create(name='titans')
+        test_question_data = {
+            'title': 'Who is the founding titan?',
+            'description': 'And what can it do?',
+            'tags': ['titans', 'paradis', 'eldia', 'marley', 'history']
+        }
+
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.test_first_auth_token}')
+        ContentType.objects.get_for_model(Question) # warming the content type cache used for the viewer's votes
+        # token, then savepoint + question insert + signature bands insert + search document insert + tags insert +
+        # tags select + question tags insert + tags count update + related questions (savepoint + select + release)
+        # + likely duplicates + release, then the 4 queries that serialize the response
+        with self.assertNumQueries(18):
+            test_response = self.client.post(path=list_url, data=test_question_data, format='json')
+        self.assertEqual(test_response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Tag.objects.count(), 5)
+        test_question = Question.objects.get(slug=test_response.data['slug'])
+        self.assertEqual(
+            set(test_question.tags.values_list('name', flat=True)), set(test_question_data['tags'])
+        )
+
+        # unchanged tags only cost the lookup of the current tags
+        detail_url = api_reverse('Questans_API_v1:question-detail', kwargs={'slug': test_question.slug})
+        with CaptureQueriesContext(connection) as test_context:
+            test_response = self.client.patch(path=detail_url, data={'tags': test_question_data['tags']}, format='json')
+        self.assertEqual(test_response.status_code, status.HTTP_200_OK)
+        test_tag_writes = [
+            query['sql'] for query in test_context.captured_queries
+            if ('questans_tag' in query['sql'] or 'questans_question_tags' in query['sql'])
+            and not query['sql'].startswith('SELECT')
+        ]
+        self.assertEqual(test_tag_writes, [])
+
+        test_response = self.client.patch(path=detail_url, data={'tags': ['titans', 'walls']}, format='json')
+        self.assertEqual(test_response.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(test_question.tags.values_list('name', flat=True)), {'titans', 'walls'})
+        self.assertEqual(sorted(test_response.data['tags']), ['titans', 'walls'])
+        self.assertEqual(
+            dict(Tag.objects.values_list('name', 'questions_count')),
+            {'titans': 1, 'paradis': 0, 'eldia': 0, 'marley': 0, 'history': 0, 'walls': 1}
+        )
+
+    def test_question_create_likely_duplicates(self):
+        list_url = api_reverse('Questans_API_v1:question-list')
+        test_other_question = Question.objects.create(
+            user=self.test_second_user,
+            title='Who built the walls?',
+            description='There are three of them around paradis, how were they built?'
+        )
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.test_first_auth_token}')
+        test_response = self.client.post(path=list_url, format='json', data={
+            'title': 'How do the titans work?',
+            'description': 'Where do they come from, and why are they so big?!',
+            'tags': ['titans']
+        })
+        self.assertEqual(test_response.status_code, status.HTTP_201_CREATED)
+        test_duplicates = test_response.data['likely_duplicates']
+        self.assertEqual([duplicate['slug'] for duplicate in test_duplicates], [self.test_question.slug])
+        self.assertGreaterEqual(test_duplicates[0]['similarity'], 0.5)
+
+        test_response = self.client.post(path=list_url, format='json', data={
+            'title': 'What is the rumbling?', 'description': 'And who can start it?', 'tags': ['titans']
+        })
+        self.assertEqual(test_response.data['likely_duplicates'], [])
+        # only the create action represents the duplicates
+        detail_url = api_reverse('Questans_API_v1:question-detail', kwargs={'slug': test_response.data['slug']})
+        self.assertNotIn('likely_duplicates', self.client.get(path=detail_url).data)
+
+        # editing the text rewrites the signature's bands
+        test_other_question.title = 'How do titans work?'
+        test_other_question.description = 'Where do they come from and why are they so big?'
+        test_other_question.save(update_fields=['title', 'slug', 'description', 'updated_at'])
+        test_duplicates = Question.objects.likely_duplicates(self.test_question)
+        self.assertEqual((test_duplicates[0].pk, test_duplicates[0].similarity), (test_other_question.pk, 1.0))
+
+        # questions without a signature (created before signatures existed) are backfilled in batches
+        Question.objects.update(minhash_signature=b'')
+        QuestionSignatureBand.objects.all().delete()
+        call_command('backfill_question_signatures', batch_size=2, stdout=StringIO())
+        self.assertEqual(QuestionSignatureBand.objects.count(), 4 * MINHASH_BANDS)
+        test_duplicates = Question.objects.likely_duplicates(self.test_question)
+        self.assertEqual((test_duplicates[0].pk, test_duplicates[0].similarity), (test_other_question.pk, 1.0))
+
+    def test_question_related_questions(self):
+        self.test_question.set_tags(['titans', 'walls'], is_new=True)
+        test_questions = [
+            Question.objects.create(user=self.test_first_user, title=f'Question {i}', description='A question')
+            for i in range(4)
+        ]
+        for test_question, tags in zip(test_questions, (
+            ['titans', 'walls'], ['titans', 'paradis'], ['walls', 'marley'], ['eldia']
+        )):
+            test_question.set_tags(tags, is_new=True)
+        test_filler_question = Question.objects.create(user=self.test_first_user, title='Filler', description='-')
+        test_filler_question.set_tags(['titans', 'eldia'], is_new=True)
+
+        def get_related(question):
+            related_url = api_reverse('Questans_API_v1:question-related', kwargs={'slug': question.slug})
+            test_response = self.client.get(path=related_url)
+            self.assertEqual(test_response.status_code, status.HTTP_200_OK)
+            return [(related_data['slug'], related_data['similarity']) for related_data in test_response.data]
+
+        with self.assertNumQueries(1):
+            test_related = get_related(self.test_question)
+        # the tags a question doesn't share weigh less when they're more used (eldia is used twice, marley and
+        # paradis once)
+        self.assertEqual([slug for slug, _ in test_related], [
+            test_questions[0].slug, test_filler_question.slug, test_questions[2].slug, test_questions[1].slug
+        ])
+        self.assertEqual(test_related[0][1], 1.0)
+        # the rows of questions created before a question are also written
+        self.assertEqual([slug for slug, _ in get_related(test_questions[3])], [test_filler_question.slug])
+
+        # changing a question's tags refreshes its related questions, and its place in the others'
+        test_questions[3].set_tags(['titans', 'walls'])
+        self.assertEqual(get_related(test_questions[3])[0][1], 1.0)
+        self.assertEqual(
+            [slug for slug, similarity in get_related(self.test_question) if similarity == 1.0],
+            [test_questions[0].slug, test_questions[3].slug]
+        )
+
+        call_command('rebuild_related_questions', stdout=StringIO())
+        self.assertEqual(len(get_related(self.test_question)), 5)
+        self.assertEqual(get_related(test_questions[3])[0][1], 1.0)
+
+        related_url = api_reverse('Questans_API_v1:question-related', kwargs={'slug': 'missing'})
+        self.assertEqual(self.client.get(path=related_url).status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_question_list_tag_filter_and_tag_directory(self):
+        list_url = api_reverse('Questans_API_v1:question-list')
+        self.test_question.set_tags(['titans', 'paradis'], is_new=True)
+        test_second_question = Question.objects.create(
+            user=self.test_second_user, title='Where is paradis?', description='...'
+        )
+        test_second_question.set_tags(['paradis'], is_new=True)
+
+        test_response = self.client.get(path=list_url, data={'tag': ['titans', 'paradis']})
+        self.assertEqual(test_response.status_code, status.HTTP_200_OK)
+        self.assertEqual(test_response.data['count'], 2)
+        test_response = self.client.get(path=list_url, data={'tag': ['titans', 'paradis'], 'tag_match': 'all'})
+        self.assertEqual(
+            [question['slug'] for question in test_response.data['results']], [self.test_question.slug]
+        )
+        test_response = self.client.get(path=list_url, data={'tag': 'marley'})
+        self.assertEqual(test_response.data['count'], 0)
+
+        tags_url = api_reverse('Questans_API_v1:tag-list')
+        with self.assertNumQueries(2):
+            test_response = self.client.get(path=tags_url)
+        self.assertEqual(
+            [(tag['name'], tag['total_questions']) for tag in test_response.data['results']],
+            [('paradis', 2), ('titans', 1)]
+        )
+
+        # deleting a question (or its user) decrements the counts of its tags
+        self.test_first_user.delete()
+        self.assertEqual(dict(Tag.objects.values_list('name', 'questions_count')), {'paradis': 1, 'titans': 0})
+
+    def test_question_list_hot_ordering(self):
+        list_url = api_reverse('Questans_API_v1:question-list')
+        test_first_question = Question.objects.create(user=self.test_second_user, title='Question 1', description='...')
+        test_second_question = Question.objects.create(user=self.test_second_user, title='Question 2', description='...')
+        # votes that aren't recent don't get the question's score recomputed
+        Question.objects.filter(pk=test_second_question.pk).update(
+            score=100, last_activity_at=timezone.now() - timedelta(days=1)
+        )
+
+        upvote_url = api_reverse('Questans_API_v1:question-upvote-toggle', kwargs={'slug': self.test_question.slug})
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.test_second_auth_token}')
+        self.client.post(path=upvote_url)
+        test_stale_score = Question.objects.get(pk=test_second_question.pk).hot_score
+        update_hot_scores()
+        self.assertEqual(Question.objects.get(pk=test_second_question.pk).hot_score, test_stale_score)
+
+        test_response = self.client.get(path=list_url, data={'ordering': 'hot'})
+        self.assertEqual(
+            [question['slug'] for question in test_response.data['results']],
+            [self.test_question.slug, test_second_question.slug, test_first_question.slug]
+        )
+
+        test_response = self.client.get(path=list_url, data={'ordering': 'hot', 'pagination': 'cursor', 'size': 2})
+        test_response = self.client.get(path=test_response.data['next'])
+        self.assertEqual([question['slug'] for question in test_response.data['results']], [test_first_question.slug])
+
+    def test_question_list_cursor_pagination(self):
+        list_url = api_reverse('Questans_API_v1:question-list')
+        for i in range(8):
+            Question.objects.create(user=self.test_second_user, title=f'Question {i}', description='...')
+        # questions created at the same time are ordered by their id
+        Question.objects.filter(title__in=['Question 3', 'Question 4', 'Question 5']).update(
+            created_at=Question.objects.get(title='Question 4').created_at
+        )
+        test_expected_slugs = list(Question.objects.order_by('-created_at', '-id').values_list('slug', flat=True))
+
+        test_slugs = []
+        test_response = self.client.get(path=list_url, data={'pagination': 'cursor', 'size': 4})
+        self.assertIsNone(test_response.data['previous'])
+        test_pages = [test_response.data]
+        while test_response.data['next']:
+            # the page is fetched without counting the questions
+            with self.assertNumQueries(2):
+                test_response = self.client.get(path=test_response.data['next'])
+            self.assertEqual(test_response.status_code, status.HTTP_200_OK)
+            test_pages.append(test_response.data)
+
+        for test_page in test_pages:
+            test_slugs.extend(question['slug'] for question in test_page['results'])
+        self.assertEqual(test_slugs, test_expected_slugs)
+        self.assertEqual(len(test_pages), 3)
+
+        # walking back from the last page returns the previous pages
+        test_response = self.client.get(path=test_pages[-1]['previous'])
+        self.assertEqual(test_response.data['results'], test_pages[-2]['results'])
+
+        test_response = self.client.get(path=list_url, data={'cursor': 'not-a-cursor'})
+        self.assertEqual(test_response.status_code, status.HTTP_404_NOT_FOUND)
+
+        # page numbers stay the default
+        test_response = self.client.get(path=list_url, data={'size': 4, 'page': 2})
+        self.assertEqual(test_response.data['count'], len(test_expected_slugs))
+        self.assertEqual([question['slug'] for question in test_response.data['results']], test_expected_slugs[4:8])
+
+    def test_question_comments_cursor_pagination(self):
+        comments_url = api_reverse('Questans_API_v1:question-comments', kwargs={'slug': self.test_question.slug})
+        for i in range(3):
+            Comment.objects.create(user=self.test_second_user, content_object=self.test_question, content=f'Comment {i}')
+
+        test_response = self.client.get(path=comments_url, data={'pagination': 'cursor', 'size': 2})
+        self.assertEqual(test_response.status_code, status.HTTP_200_OK)
+        self.assertEqual([comment['content'] for comment in test_response.data['results']], ['Comment 0', 'Comment 1'])
+        test_response = self.client.get(path=test_response.data['next'])
+        self.assertEqual([comment['content'] for comment in test_response.data['results']], ['Comment 2'])
+        self.assertIsNone(test_response.data['next'])
+
+    def test_question_retrieve_versioned_cache(self):
+        detail_url = api_reverse('Questans_API_v1:question-detail', kwargs={'slug': self.test_question.slug})
+        upvote_url = api_reverse('Questans_API_v1:question-upvote-toggle', kwargs={'slug': self.test_question.slug})
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.test_second_auth_token}')
+        self.client.post(path=upvote_url)
+        test_version = Question.objects.get(pk=self.test_question.pk).version
+
+        test_response = self.client.get(path=detail_url)
+        self.assertEqual(get_response_cache_stats('question'), {'hits': 0, 'misses': 1})
+        # token + validators + question, then the viewer's vote, nothing else is serialized again
+        with self.assertNumQueries(4):
+            test_cached_response = self.client.get(path=detail_url)
+        self.assertEqual(get_response_cache_stats('question'), {'hits': 1, 'misses': 1})
+        self.assertEqual(test_cached_response.data, test_response.data)
+        self.assertEqual(list(test_cached_response.data), list(test_response.data))
+
+        # the viewer specific fields aren't cached
+        self.assertTrue(test_cached_response.data['is_upvoted_by_viewer'])
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.test_first_auth_token}')
+        test_response = self.client.get(path=detail_url)
+        self.assertFalse(test_response.data['is_upvoted_by_viewer'])
+        self.assertEqual(get_response_cache_stats('question'), {'hits': 2, 'misses': 1})
+
+        # votes, answers, comments and edits change the payload, so they bump the version
+        self.client.post(path=upvote_url)
+        self.assertEqual(self.client.get(path=detail_url).data['total_points'], 2)
+        Answer.objects.create(user=self.test_second_user, question=self.test_question, content='Maybe.')
+        self.assertEqual(self.client.get(path=detail_url).data['total_answers'], 2)
+        Comment.objects.create(user=self.test_second_user, content_object=self.test_question, content='Good one')
+        self.client.get(path=detail_url)
+        test_response = self.client.patch(path=detail_url, data={'description': 'Nobody knows.'})
+        self.assertEqual(test_response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.client.get(path=detail_url).data['description'], 'Nobody knows.')
+        self.assertEqual(get_response_cache_stats('question'), {'hits': 2, 'misses': 5})
+        self.assertEqual(Question.objects.get(pk=self.test_question.pk).version, test_version + 4)
+
+        # saving doesn't reload the version, it's loaded when it's read
+        test_question = Question.objects.get(pk=self.test_question.pk)
+        # the question's and its search document's updates
+        with self.assertNumQueries(2):
+            test_question.save(update_fields=['description'])
+        with self.assertNumQueries(1):
+            self.assertEqual(test_question.version, test_version + 5)
+
+    def test_question_conditional_get(self):
+        detail_url = api_reverse('Questans_API_v1:question-detail', kwargs={'slug': self.test_question.slug})
+        test_response = self.client.get(path=detail_url)
+        test_etag, test_last_modified = test_response['ETag'], test_response['Last-Modified']
+
+        # only the validators are looked up
+        with self.assertNumQueries(1):
+            test_response = self.client.get(path=detail_url, HTTP_IF_NONE_MATCH=test_etag)
+        self.assertEqual(test_response.status_code, status.HTTP_304_NOT_MODIFIED)
+        test_response = self.client.get(path=detail_url, HTTP_IF_MODIFIED_SINCE=test_last_modified)
+        self.assertEqual(test_response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        # the payload has viewer specific fields
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.test_second_auth_token}')
+        test_response = self.client.get(path=detail_url, HTTP_IF_NONE_MATCH=test_etag)
+        self.assertEqual(test_response.status_code, status.HTTP_200_OK)
+        self.assertIn('Authorization', test_response['Vary'])
+        test_etag = test_response['ETag']
+
+        upvote_url = api_reverse('Questans_API_v1:question-upvote-toggle', kwargs={'slug': self.test_question.slug})
+        self.client.post(path=upvote_url)
+        test_response = self.client.get(path=detail_url, HTTP_IF_NONE_MATCH=test_etag)
+        self.assertEqual(test_response.status_code, status.HTTP_200_OK)
+        self.assertTrue(test_response.data['is_upvoted_by_viewer'])
+
+    def test_question_views_are_buffered(self):
+        # the locmem cache (the test settings' default cache) stands in for redis
+        test_other_question = Question.objects.create(
+            user=self.test_first_user, title='Who built the walls?', description='There are three of them.'
+        )
+        detail_url = api_reverse('Questans_API_v1:question-detail', kwargs={'slug': self.test_question.slug})
+        test_etag = self.client.get(path=detail_url)['ETag']
+        self.client.get(path=detail_url)
+        # views answered with 304 are counted, missing questions aren't
+        self.client.get(path=detail_url, HTTP_IF_NONE_MATCH=test_etag)
+        self.client.get(path=api_reverse('Questans_API_v1:question-detail', kwargs={'slug': 'missing'}))
+        self.client.get(path=api_reverse('Questans_API_v1:question-detail', kwargs={'slug': test_other_question.slug}))
+
+        # views aren't written to the questions until their bucket is flushed, and the current buckets aren't
+        self.assertEqual(Question.objects.filter(views_count__gt=0).count(), 0)
+        self.assertEqual(flush_question_views(), 0)
+
+        test_later = time.time() + 2 * settings.QUESTION_VIEWS_BUFFER_INTERVAL
+        # one update per number of views (and the transaction's savepoint)
+        with self.assertNumQueries(4):
+            self.assertEqual(flush_question_views(test_later), 4)
+        self.assertEqual(
+            dict(Question.objects.values_list('slug', 'views_count')),
+            {self.test_question.slug: 3, test_other_question.slug: 1}
+        )
+        # flushed buckets are dropped, so views aren't added twice
+        self.assertEqual(flush_question_views(test_later), 0)
+        self.assertEqual(Question.objects.get(pk=self.test_question.pk).views_count, 3)
+
+        test_response = self.client.get(path=api_reverse('Questans_API_v1:question-list'))
+        self.assertEqual(test_response.data['results'][-1]['total_views'], 3)
+
+        # flushing bumps the questions' versions, so the cached payload and the validators aren't stale
+        test_response = self.client.get(path=detail_url, HTTP_IF_NONE_MATCH=test_etag)
+        self.assertEqual(test_response.status_code, status.HTTP_200_OK)
+        self.assertEqual(test_response.data['total_views'], 3)
+
+    def test_question_list_conditional_get(self):
+        list_url = api_reverse('Questans_API_v1:question-list')
+        test_response = self.client.get(path=list_url)
+        test_etag = test_response['ETag']
+
+        # count + first page keys
+        with self.assertNumQueries(2):
+            test_response = self.client.get(path=list_url, HTTP_IF_NONE_MATCH=test_etag)
+        self.assertEqual(test_response.status_code, status.HTTP_304_NOT_MODIFIED)
+        test_response = self.client.get(path=list_url, data={'pagination': 'cursor'})
+        test_response = self.client.get(
+            path=list_url, data={'pagination': 'cursor'}, HTTP_IF_NONE_MATCH=test_response['ETag']
+        )
+        self.assertEqual(test_response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        Answer.objects.create(user=self.test_second_user, question=self.test_question, content='Maybe.')
+        test_response = self.client.get(path=list_url, HTTP_IF_NONE_MATCH=test_etag)
+        self.assertEqual(test_response.status_code, status.HTTP_200_OK)
+        self.assertEqual(test_response.data['results'][0]['total_answers'], 2)
+        # later pages aren't validated
+        self.assertNotIn('ETag', self.client.get(path=list_url, data={'page': 2, 'size': 1}))
+
+    def test_question_retrieve_thread_includes(self):
+        detail_url = api_reverse('Questans_API_v1:question-detail', kwargs={'slug': self.test_question.slug})
+        test_answers = [self.test_answer] + [
+            Answer.objects.create(user=self.test_first_user, question=self.test_question, content=f'Answer {i}')
+            for i in range(3)
+        ]
+        for test_answer in test_answers:
+            for i in range(2):
+                Comment.objects.create(user=self.test_first_user, content_object=test_answer, content=f'Comment {i}')
+        Comment.objects.create(user=self.test_second_user, content_object=self.test_question, content='Question comment')
+        Vote.objects.toggle(user=self.test_first_user, obj=test_answers[1], value=Vote.UPVOTE)
+
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.test_first_auth_token}')
+        ContentType.objects.get_for_model(Question) # warming the content type cache
+        # token + question + answers + comments, then the question's tags and the viewer's votes on the question and
+        # on the answers
+        with self.assertNumQueries(7):
+            test_response = self.client.get(path=detail_url, data={'include': 'answers.comments,comments'})
+        self.assertEqual(test_response.status_code, status.HTTP_200_OK)
+        test_data = test_response.data
+        self.assertEqual(test_data['total_answers'], 4)
+        self.assertEqual([comment['content'] for comment in test_data['comments']], ['Question comment'])
+        self.assertEqual(
+            [answer_data['id'] for answer_data in test_data['answers']], [answer.pk for answer in reversed(test_answers)]
+        )
+        for answer_data in test_data['answers']:
+            self.assertEqual([comment['content'] for comment in answer_data['comments']], ['Comment 0', 'Comment 1'])
+            self.assertEqual(answer_data['is_upvoted_by_viewer'], answer_data['id'] == test_answers[1].pk)
+
+        # without answers.comments, the answers keep their comments urls
+        test_response = self.client.get(path=detail_url, data={'include': 'answers'})
+        self.assertTrue(test_response.data['comments'].endswith(f'/questions/{self.test_question.slug}/comments/'))
+        self.assertTrue(test_response.data['answers'][0]['comments'].startswith('http'))
+
+        test_response = self.client.get(path=detail_url, data={'include': 'answers,votes'})
+        self.assertEqual(test_response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_url_templates(self):
+        test_request = Request(APIRequestFactory().get('/', HTTP_HOST='testserver:8000'))
+        test_cases = (
+            ('Questans_API_v1:question-detail', {'slug': self.test_question.slug}),
+            ('Questans_API_v1:answer-comments', {'pk': self.test_answer.pk}),
+            # values are quoted like reverse() does
+            ('Profiles_API_v1:profile-detail', {'username': 'test.user+1@example'}),
+            ('Profiles_API_v1:profile-detail', {'username': 'tést user {0}?%'}),
+        )
+        for view_name, kwargs in test_cases:
+            self.assertEqual(
+                reverse_url(view_name, kwargs, request=test_request),
+                api_reverse(view_name, kwargs=kwargs, request=test_request)
+            )
+            self.assertEqual(reverse_url(view_name, kwargs), api_reverse(view_name, kwargs=kwargs))
+
+        # the serialized urls are built from the templates
+        detail_url = api_reverse('Questans_API_v1:question-detail', kwargs={'slug': self.test_question.slug})
+        test_response = self.client.get(path=detail_url)
+        self.assertEqual(test_response.data['url'], test_response.wsgi_request.build_absolute_uri(detail_url))
+
+    def test_async_read_views(self):
+        Vote.objects.toggle(user=self.test_first_user, obj=self.test_question, value=Vote.UPVOTE)
+        Vote.objects.toggle(user=self.test_first_user, obj=self.test_answer, value=Vote.DOWNVOTE)
+        list_url = api_reverse('Questans_API_v1:question-list')
+        detail_url = api_reverse('Questans_API_v1:question-detail', kwargs={'slug': self.test_question.slug})
+        answers_url = api_reverse('Questans_API_v1:question-answers', kwargs={'slug': self.test_question.slug})
+        profile_url = api_reverse('Profiles_API_v1:profile-detail', kwargs={'username': self.test_second_user.username})
+        test_requests = (
+            (list_url, {}), (list_url, {'pagination': 'cursor', 'fields': 'slug,tags'}),
+            (detail_url, {}), (detail_url, {'omit': 'tags'}), (answers_url, {'ordering': 'score'}), (profile_url, {}),
+            (api_reverse('Questans_API_v1:question-detail', kwargs={'slug': 'missing'}), {})
+        )
+
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.test_first_auth_token}')
+        for url, params in test_requests:
+            test_response = self.client.get(path=url, data=params)
+            self.assertTrue(type(test_response.renderer_context['view']).__name__.startswith('Async'))
+            with override_settings(ASYNC_READ_VIEWS=False):
+                test_sync_response = self.client.get(path=url, data=params)
+            self.assertFalse(type(test_sync_response.renderer_context['view']).__name__.startswith('Async'))
+            self.assertEqual(test_response.status_code, test_sync_response.status_code)
+            self.assertEqual(test_response.data, test_sync_response.data)
+            self.assertEqual(test_response.get('ETag'), test_sync_response.get('ETag'))
+            if test_response.has_header('ETag'):
+                test_response = self.client.get(path=url, data=params, HTTP_IF_NONE_MATCH=test_response['ETag'])
+                self.assertEqual(test_response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        test_response = self.client.get(path=detail_url)
+        self.assertTrue(test_response.data['is_upvoted_by_viewer'])
+        self.assertTrue(self.client.get(path=answers_url).data['results'][0]['is_downvoted_by_viewer'])
+        # the writes of the routes are still served by the sync views
+        test_response = self.client.patch(path=detail_url, data={'title': 'How do titans really work?'})
+        self.assertEqual(test_response.status_code, status.HTTP_200_OK)
+
+        self.client.credentials(HTTP_AUTHORIZATION='Token invalid')
+        self.assertEqual(self.client.get(path=detail_url).status_code, status.HTTP_401_UNAUTHORIZED)
@@ -2,6 +2,8 @@ from django.urls import include, path
 
 from rest_framework.routers import DefaultRouter
 
+from qenea_backend.async_views import read_view, with_read_views
+
 from . import views, viewsets
 
 router = DefaultRouter()
@@ -11,8 +13,12 @@ router.register('answers', viewsets.AnswerViewSet, basename='answer')
 app_name = 'Questans_API_v1'
 
 urlpatterns = [
-    path('', include(router.urls)),
-    path('questions/<str:slug>/answers/', views.QuestionAnswersListAPIView.as_view(), name='question-answers'),
+    path('', include(with_read_views(router.urls, {
+        'question-list': viewsets.AsyncQuestionViewSet.as_view({'get': 'list'}),
+        'question-detail': viewsets.AsyncQuestionViewSet.as_view({'get': 'retrieve'})
+    }))),
+    path('tags/', views.TagListAPIView.as_view(), name='tag-list'),
+    path('questions/<str:slug>/answers/', read_view(views.AsyncQuestionAnswersListAPIView.as_view(), views.QuestionAnswersListAPIView.as_view()), name='question-answers'),
     path('questions/<str:slug>/upvote-toggle/', views.QuestionUpvoteToggleAPIView.as_view(), name='question-upvote-toggle'),
     path('questions/<str:slug>/downvote-toggle/', views.QuestionDownvoteToggleAPIView.as_view(), name='question-downvote-toggle'),
     path('answers/<int:pk>/upvote-toggle/', views.AnswerUpvoteToggleAPIView.as_view(), name='answer-upvote-toggle'),
@@ -1,13 +1,25 @@
+from collections import defaultdict
 from typing import Literal
 
-from drf_spectacular.utils import extend_schema
+from django.conf import settings
+from django.db import transaction
+
+from drf_spectacular.utils import OpenApiParameter, extend_schema
 from rest_framework import generics, permissions, status, views
-from rest_framework.exceptions import APIException, NotFound
+from rest_framework.exceptions import APIException, NotFound, ValidationError
 from rest_framework.response import Response
 
-from questans.api.v1.serializers import AnswerSerializer
-from questans.models import Answer, Question
+from profiles.reputation import ACCEPTED_ANSWER_POINTS, add_reputation
+from qenea_backend.async_views import (AsyncAPIViewMixin,
+                                       AsyncGenericAPIViewMixin)
+from qenea_backend.conditional import ConditionalListMixin
+from qenea_backend.pagination import FeedPagination
+from qenea_backend.serializers import SparseFieldsetsViewMixin
+from questans.api.v1.serializers import (AnswerSerializer, TagSerializer,
+                                         get_answer_select_related)
+from questans.models import ANSWER_ORDERINGS, Answer, Question, Tag
 from questans.permissions import IsObjectUser
+from votes.models import PendingVote, Vote
 
 
 class BaseObjectActionToggleAPIView(views.APIView):
@@ -19,37 +31,34 @@ class BaseObjectActionToggleAPIView(views.APIView):
     def get_object(self):
         try:
             lookup_kwarg = {self.lookup_field: self.kwargs.get(self.lookup_field)}
-            instance = self.model.objects.select_related('user').get(**lookup_kwarg)
+            instance = self.model.objects.only('pk', 'user_id').get(**lookup_kwarg)
         except:
             raise NotFound('The requested object does not exist.')
 
         return instance
 
-    def get_object_action_managers(self):
-        obj = self.get_object()
+    def get_vote_value(self):
         if self.view_action == 'upvote-toggle':
-            return (obj.upvotes, obj.downvotes)
+            return Vote.UPVOTE
 
         elif self.view_action == 'downvote-toggle':
-            return (obj.downvotes, obj.upvotes)
+            return Vote.DOWNVOTE
 
         raise APIException
 
     @extend_schema(request=None, responses=None)
     def post(self, request, *args, **kwargs):
-        main_manager, opp_manager = self.get_object_action_managers()
-        user = request.user
-
-        # if the user has already performed this main action, then remove it
-        if main_manager.filter(pk=user.id).exists():
-            main_manager.remove(user)
-        else:
-            main_manager.add(user)
-            # if the user has previously performed an opposite action, then remove that
-            if opp_manager.filter(pk=user.id).exists():
-                opp_manager.remove(user)
+        # removes the vote if the user has already cast it, otherwise casts it (replacing an opposite vote)
+        if not settings.VOTE_WRITE_BEHIND:
+            Vote.objects.toggle(user=request.user, obj=self.get_object(), value=self.get_vote_value())
+            return Response(status=status.HTTP_204_NO_CONTENT)
 
-        return Response(status=status.HTTP_204_NO_CONTENT)
+        # the toggle is applied later, the response has the vote state expected once it is
+        _, current = PendingVote.objects.enqueue(user=request.user, obj=self.get_object(), value=self.get_vote_value())
+        return Response(
+            {'is_upvoted_by_viewer': current == Vote.UPVOTE, 'is_downvoted_by_viewer': current == Vote.DOWNVOTE},
+            status=status.HTTP_202_ACCEPTED
+        )
 
 
 class QuestionUpvoteToggleAPIView(BaseObjectActionToggleAPIView):
@@ -86,46 +95,117 @@ class AnswerDownvoteToggleAPIView(BaseObjectActionToggleAPIView):
     view_action = 'downvote-toggle'
 
 
-class QuestionAnswersListAPIView(generics.ListAPIView):
+class QuestionAnswersListAPIView(SparseFieldsetsViewMixin, ConditionalListMixin, generics.ListAPIView):
     """
-    Endpoint that provides users (unauthenticated or authenticated) with list action for a question's answers
+    Endpoint that provides users (unauthenticated or authenticated) with list action for a question's answers, the
+    accepted answer first, then newest first (default), oldest first or highest score first
     """
     permission_classes = (permissions.AllowAny, )
     serializer_class = AnswerSerializer
+    pagination_class = FeedPagination
+    ordering_query_param = 'ordering'
 
     def get_queryset(self):
-        try:
-            question = Question.objects.get(slug=self.kwargs['slug'])
-        except:
+        ordering = self.request.query_params.get(self.ordering_query_param, 'newest')
+        if ordering not in ANSWER_ORDERINGS:
+            raise ValidationError({self.ordering_query_param: 'The ordering must be score, newest or oldest.'})
+
+        queryset = Answer.objects.accepted_first_by_slug(self.kwargs['slug'], ordering)
+        related = get_answer_select_related(self.is_field_requested, user='user__profile')
+        # select_related() without fields would select every relation
+        return queryset.select_related(*related) if related else queryset
+
+    def paginate_queryset(self, queryset):
+        page = super().paginate_queryset(queryset)
+        # the question is only joined to its answers, so whether it exists is only looked up when there are none
+        if not page and not Question.objects.filter(slug=self.kwargs['slug']).exists():
             raise NotFound('question does not exist')
 
-        return Answer.objects.select_related('question', 'user').filter(question=question)
+        return page
+
+    @extend_schema(parameters=[
+        OpenApiParameter(
+            'ordering', str, enum=list(ANSWER_ORDERINGS), description='The order of the answers after the accepted one'
+        )
+    ])
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
+
+class AsyncQuestionAnswersListAPIView(AsyncAPIViewMixin, QuestionAnswersListAPIView, AsyncGenericAPIViewMixin):
+    """
+    The async list action of QuestionAnswersListAPIView, see qenea_backend.async_views
+    """
+
+    async def apaginate_queryset(self, queryset):
+        page = await super().apaginate_queryset(queryset)
+        if not page and not await Question.objects.filter(slug=self.kwargs['slug']).aexists():
+            raise NotFound('question does not exist')
+
+        return page
+
+    async def get(self, request, *args, **kwargs):
+        return await self.alist(request, *args, **kwargs)
+
+
+class TagListAPIView(generics.ListAPIView):
+    """
+    Endpoint that provides users (unauthenticated or authenticated) with the tags and their number of questions,
+    most used tags first
+    """
+    permission_classes = (permissions.AllowAny, )
+    serializer_class = TagSerializer
+    pagination_class = FeedPagination
+    queryset = Tag.objects.order_by('-questions_count', 'name')
 
 
 class AnswerAcceptToggleAPIView(views.APIView):
     """
     Endpoint for the question owner to accept or un-accept an answer
     """
-    permission_classes = (IsObjectUser, )
+    permission_classes = (permissions.IsAuthenticated, IsObjectUser)
 
     def get_object(self):
+        # the answer's question (rather than the answer, which isn't written) is locked until the toggle is
+        # committed, so concurrent toggles of the question's answers are applied one after the other
         try:
-            instance = Answer.objects.get(pk=self.kwargs['pk'])
-        except:
+            instance = (
+                Question.objects.select_for_update(of=('self', )).only('pk', 'user_id', 'accepted_answer_id')
+                .get(answers=self.kwargs['pk'])
+            )
+        except Question.DoesNotExist:
             raise NotFound('answer does not exist.')
 
+        self.check_object_permissions(self.request, instance)
         return instance
 
     @extend_schema(request=None, responses=None)
+    @transaction.atomic
     def post(self, request, *args, **kwargs):
-        obj = self.get_object()
-
-        qs = obj.question.answers.exclude(pk=obj.pk).filter(is_accepted=True)
-        if qs.exists():
-            prev_accepted_answer = qs.first()
-            prev_accepted_answer.is_accepted = False
-            prev_accepted_answer.save()
-
-        obj.is_accepted = not obj.is_accepted
-        obj.save()
+        question = self.get_object()
+        answer_pk = self.kwargs['pk']
+        previous_answer_pk = question.accepted_answer_id
+
+        # accepting an answer un-accepts the previous one by replacing the question's pointer. The pointer is only
+        # replaced if it's still the one that was read (the row lock doesn't exist on every database, e.g. SQLite),
+        # a concurrent toggle that was committed in between makes this one stale
+        accepted_answer_pk = None if previous_answer_pk == answer_pk else answer_pk
+        updated = Question.objects.filter(pk=question.pk, accepted_answer_id=previous_answer_pk).update(
+            accepted_answer_id=accepted_answer_pk, **Question.get_version_updates()
+        )
+        if not updated:
+            return Response(
+                {'detail': 'The accepted answer was changed by another request.'}, status=status.HTTP_409_CONFLICT
+            )
+
+        # the payloads of both answers change
+        answers = Answer.objects.filter(pk__in={answer_pk, previous_answer_pk} - {None})
+        answers.update(**Answer.get_version_updates())
+        # the accepted answer's user gains the points of the accept, the un-accepted one's loses them (answering
+        # one's own question and accepting the answer earns no points)
+        points_by_user = defaultdict(int)
+        for pk, user_id in answers.exclude(user=question.user_id).values_list('pk', 'user_id'):
+            points_by_user[user_id] += ACCEPTED_ANSWER_POINTS if pk == accepted_answer_pk else -ACCEPTED_ANSWER_POINTS
+
+        add_reputation(points_by_user)
         return Response(status=status.HTTP_204_NO_CONTENT)
@@ -1,19 +1,72 @@
+from django.contrib.contenttypes.models import ContentType
+
+from asgiref.sync import sync_to_async
+from drf_spectacular.utils import OpenApiParameter, extend_schema
 from rest_framework import mixins, permissions, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.response import Response
 
 from comments.api.v1.mixins import ObjectCommentsViewSetMixin
-from questans.models import Answer, Question
+from comments.api.v1.serializers import CommentSerializer
+from comments.models import Comment
+from qenea_backend.async_views import (AsyncAPIViewMixin,
+                                       AsyncGenericAPIViewMixin)
+from qenea_backend.cache import VersionedCacheRetrieveMixin
+from qenea_backend.conditional import (ConditionalListMixin,
+                                       ConditionalRetrieveMixin)
+from qenea_backend.pagination import FeedPagination
+from qenea_backend.serializers import SparseFieldsetsViewMixin
+from questans.models import (RELATED_QUESTIONS_LIMIT, Answer, Question,
+                             RelatedQuestion)
 from questans.permissions import IsObjectUserOrReadOnly
+from questans.view_counts import arecord_question_view, record_question_view
 
 from .serializers import (AnswerSerializer, QuestionListSerializer,
-                          QuestionSerializer)
+                          QuestionSerializer, RelatedQuestionSerializer,
+                          get_answer_select_related)
 
 
-class QuestionViewSet(ObjectCommentsViewSetMixin, viewsets.ModelViewSet):
-    queryset = Question.objects.select_related('user')
+class QuestionViewSet(SparseFieldsetsViewMixin, ConditionalRetrieveMixin, ConditionalListMixin,
+                      VersionedCacheRetrieveMixin, ObjectCommentsViewSetMixin, viewsets.ModelViewSet):
+    cache_name = 'question'
+    queryset = Question.objects.select_related('user__profile')
     serializer_class = QuestionSerializer
     permission_classes = (permissions.IsAuthenticatedOrReadOnly, IsObjectUserOrReadOnly)
+    pagination_class = FeedPagination
     lookup_field = 'slug'
+    include_query_param = 'include'
+    include_options = ('answers', 'answers.comments', 'comments')
+
+    def get_queryset(self):
+        if self.action == 'list':
+            queryset = Question.objects.for_list(
+                user=self.is_field_requested('user'),
+                tags=self.is_field_requested('tags'),
+                answers_count=self.is_field_requested('total_answers')
+            )
+            tags = self.request.query_params.getlist('tag')
+            if tags:
+                match_all = self.request.query_params.get('tag_match') == 'all'
+                queryset = queryset.tagged(tags, match_all=match_all)
+
+            if self.request.query_params.get('ordering') == 'hot':
+                # precomputed scores (see questans.tasks), read off the hot score index
+                queryset = queryset.order_by('-hot_score', '-id')
+
+            return queryset
 
+        queryset = super().get_queryset()
+        if not self.is_field_requested('user'):
+            queryset = queryset.select_related(None)
+
+        return queryset
+
+    @extend_schema(parameters=[
+        OpenApiParameter('tag', str, explode=True, description='Only list questions with this tag (can be repeated)'),
+        OpenApiParameter('tag_match', str, enum=['any', 'all'], description='Whether questions need any (default) or all of the tags'),
+        OpenApiParameter('ordering', str, enum=['new', 'hot'], description='Newest questions first (default) or hottest questions first')
+    ])
     def list(self, request, *args, **kwargs):
         """
         Endpoint that provides users (unauthenticated or authenticated) with list action for Question
@@ -23,15 +76,32 @@ class QuestionViewSet(ObjectCommentsViewSetMixin, viewsets.ModelViewSet):
 
     def create(self, request, *args, **kwargs):
         """
-        Endpoint that provides authenticated users with create action for Question
+        Endpoint that provides authenticated users with create action for Question. The response also lists the
+        existing questions the new question likely duplicates (`likely_duplicates`)
         """
         return super().create(request, *args, **kwargs)
 
+    @extend_schema(parameters=[
+        OpenApiParameter(
+            'include', str,
+            description='Comma separated related objects to embed instead of their urls: answers, answers.comments, comments'
+        )
+    ])
     def retrieve(self, request, *args, **kwargs):
         """
         Endpoint that provides users (unauthenticated or authenticated) with retrieve action for Question
         """
-        return super().retrieve(request, *args, **kwargs)
+        includes = self.get_includes()
+        if includes:
+            # the embedded answers and comments don't bump the question's version, so the versioned cache and the
+            # conditional GET validators don't apply to the thread
+            response = Response(self.get_thread_data(self.get_object(), includes))
+        else:
+            response = super().retrieve(request, *args, **kwargs)
+
+        # also counts views answered with 304 Not Modified (missing questions raise before getting here)
+        record_question_view(self.kwargs['slug'])
+        return response
 
     def update(self, request, *args, **kwargs):
         """
@@ -45,21 +115,125 @@ class QuestionViewSet(ObjectCommentsViewSetMixin, viewsets.ModelViewSet):
         """
         return super().destroy(request, *args, **kwargs)
 
+    @extend_schema(responses=RelatedQuestionSerializer(many=True))
+    @action(methods=['GET'], detail=True, pagination_class=None)
+    def related(self, request, *args, **kwargs):
+        """
+        Endpoint that provides users (unauthenticated or authenticated) with the questions related to a question
+        (by their tags), most related first
+        """
+        # a single query, joining the question (by its slug) and the related questions on the score index
+        related_questions = list(
+            RelatedQuestion.objects.filter(question__slug=self.kwargs['slug']).select_related('related')
+            .order_by('-score', 'related_id')[:RELATED_QUESTIONS_LIMIT]
+        )
+        if not related_questions and not Question.objects.filter(slug=self.kwargs['slug']).exists():
+            raise NotFound('question does not exist')
+
+        serializer = RelatedQuestionSerializer(related_questions, many=True, context=self.get_serializer_context())
+        return Response(serializer.data)
+
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
     def perform_update(self, serializer):
         serializer.save(user=self.request.user)
 
+    def get_includes(self):
+        value = self.request.query_params.get(self.include_query_param, '')
+        includes = {include.strip() for include in value.split(',') if include.strip()}
+        invalid_includes = includes.difference(self.include_options)
+        if invalid_includes:
+            raise ValidationError({
+                self.include_query_param: f'Invalid value(s): {", ".join(sorted(invalid_includes))}. '
+                                          f'The options are: {", ".join(self.include_options)}.'
+            })
+
+        if 'answers.comments' in includes:
+            includes.add('answers')
+
+        return includes
+
+    def get_thread_data(self, question, includes):
+        """
+        Serializes the question with the included answers and comments embedded. The answers are fetched with one
+        query and the comments of the question and all its answers with another one
+        """
+        answers = []
+        if 'answers' in includes:
+            answers = list(Answer.objects.accepted_first(question).select_related('user__profile'))
+            question.answers_count = len(answers)
+            for answer in answers:
+                answer.question = question
+
+        commented_objects = [question] if 'comments' in includes else []
+        if 'answers.comments' in includes:
+            commented_objects.extend(answers)
+
+        comments = {}
+        for comment in Comment.objects.for_objects(commented_objects).select_related('user'):
+            # served from the content types cache
+            comment.content_type = ContentType.objects.get_for_id(comment.content_type_id)
+            comments.setdefault((comment.content_type.model, comment.object_id), []).append(comment)
+
+        context = self.get_serializer_context()
+        data = self.get_serializer(question).data
+        if 'comments' in includes:
+            data['comments'] = CommentSerializer(
+                comments.get(('question', question.pk), []), many=True, context=context
+            ).data
+
+        if 'answers' in includes:
+            data['answers'] = AnswerSerializer(answers, many=True, context=context).data
+            if 'answers.comments' in includes:
+                for answer, answer_data in zip(answers, data['answers']):
+                    answer_data['comments'] = CommentSerializer(
+                        comments.get(('answer', answer.pk), []), many=True, context=context
+                    ).data
+
+        return data
+
 
-class AnswerViewSet(ObjectCommentsViewSetMixin, mixins.CreateModelMixin,
-                                                mixins.RetrieveModelMixin,
-                                                mixins.UpdateModelMixin,
-                                                mixins.DestroyModelMixin,
-                                                viewsets.GenericViewSet):
+class AsyncQuestionViewSet(AsyncAPIViewMixin, QuestionViewSet, AsyncGenericAPIViewMixin):
+    """
+    The async list and retrieve actions of QuestionViewSet, see qenea_backend.async_views
+    """
+
+    async def list(self, request, *args, **kwargs):
+        self.serializer_class = QuestionListSerializer
+        return await self.alist(request, *args, **kwargs)
+
+    async def retrieve(self, request, *args, **kwargs):
+        includes = self.get_includes()
+        if includes:
+            # the thread isn't on the async path
+            data = await sync_to_async(lambda: self.get_thread_data(self.get_object(), includes))()
+            response = Response(data)
+        else:
+            response = await self.aretrieve(request, *args, **kwargs)
+
+        await arecord_question_view(self.kwargs['slug'])
+        return response
+
+
+class AnswerViewSet(SparseFieldsetsViewMixin, ConditionalRetrieveMixin, VersionedCacheRetrieveMixin,
+                                                                        ObjectCommentsViewSetMixin,
+                                                                        mixins.CreateModelMixin,
+                                                                        mixins.RetrieveModelMixin,
+                                                                        mixins.UpdateModelMixin,
+                                                                        mixins.DestroyModelMixin,
+                                                                        viewsets.GenericViewSet):
+    cache_name = 'answer'
     queryset = Answer.objects.select_related('user', 'question')
     serializer_class = AnswerSerializer
     permission_classes = (permissions.IsAuthenticatedOrReadOnly, IsObjectUserOrReadOnly)
+    pagination_class = FeedPagination
+
+    def get_queryset(self):
+        queryset = super().get_queryset().select_related(None)
+        related = get_answer_select_related(self.is_field_requested, user='user')
+        # select_related() without fields would select every relation
+        return queryset.select_related(*related) if related else queryset
 
     def create(self, request, *args, **kwargs):
         """
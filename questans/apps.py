@@ -3,3 +3,7 @@ from django.apps import AppConfig
 
 class QuestansConfig(AppConfig):
     name = 'questans'
+
+    def ready(self):
+        # connects the signal receivers
+        from questans import signals  # noqa: F401
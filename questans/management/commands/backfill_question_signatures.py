@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from questans.models import Question, QuestionSignatureBand
+from questans.similarity import get_minhash_signature, get_signature_bands
+
+
+class Command(BaseCommand):
+    help = (
+        'Computes the MinHash signatures (and their bands) of the questions without one, or of all questions with '
+        '--all, in batches'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--all', action='store_true', help='Recompute the signatures of all questions')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        queryset = Question.objects.only('pk', 'title', 'description', 'minhash_signature').order_by('pk')
+        if not options['all']:
+            queryset = queryset.filter(minhash_signature=b'')
+
+        backfilled = 0
+        last_pk = 0
+        while True:
+            # keyset batches, so questions that got a signature in the previous batches aren't skipped over
+            batch = list(queryset.filter(pk__gt=last_pk)[:batch_size])
+            if not batch:
+                break
+
+            self.write_batch(batch)
+            backfilled += len(batch)
+            last_pk = batch[-1].pk
+
+        self.stdout.write(self.style.SUCCESS(f'Signatures of {backfilled} questions backfilled'))
+
+    def write_batch(self, batch):
+        for question in batch:
+            question.minhash_signature = get_minhash_signature(f'{question.title} {question.description}')
+
+        # bulk writes, which don't go through Question.save (and so don't bump the questions' versions)
+        with transaction.atomic():
+            Question.objects.bulk_update(batch, ['minhash_signature'])
+            QuestionSignatureBand.objects.filter(question__in=batch).delete()
+            QuestionSignatureBand.objects.bulk_create([
+                QuestionSignatureBand(question=question, band=band, bucket=bucket)
+                for question in batch
+                for band, bucket in enumerate(get_signature_bands(question.minhash_signature))
+            ])
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from questans.models import Question, RelatedQuestion
+
+
+class Command(BaseCommand):
+    help = (
+        'Recomputes the related questions of all questions (which are otherwise only refreshed when a question\'s '
+        'tags change, so they drift as tags get more or less used)'
+    )
+
+    def handle(self, *args, **options):
+        RelatedQuestion.objects.all().delete()
+        refreshed = 0
+        for question in Question.objects.only('pk').order_by('pk').iterator():
+            RelatedQuestion.objects.refresh(question)
+            refreshed += 1
+
+        self.stdout.write(self.style.SUCCESS(f'Related questions of {refreshed} questions rebuilt'))
@@ -0,0 +1,30 @@
+# Generated by Django 4.1.1 on 2026-10-18 11:04
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('questans', '0007_add_vote_counts'),
+        ('votes', '0002_copy_m2m_votes'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='answer',
+            name='downvotes',
+        ),
+        migrations.RemoveField(
+            model_name='answer',
+            name='upvotes',
+        ),
+        migrations.RemoveField(
+            model_name='question',
+            name='downvotes',
+        ),
+        migrations.RemoveField(
+            model_name='question',
+            name='upvotes',
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 4.1.1 on 2026-10-18 11:07
+
+from django.db import migrations
+from django.db.models import Count, Min
+
+
+def merge_duplicate_tags(apps, schema_editor):
+    """
+    Concurrent question writes could create several tags with the same name. The questions of each duplicate
+    are moved to the oldest tag with that name and the duplicates are deleted, so the unique index can be added
+    """
+    Tag = apps.get_model('questans', 'Tag')
+    QuestionTag = apps.get_model('questans', 'Question').tags.through
+
+    duplicated_names = (
+        Tag.objects.values('name').annotate(count=Count('pk'), kept_id=Min('pk')).filter(count__gt=1).order_by()
+    )
+    for row in duplicated_names:
+        duplicates = Tag.objects.filter(name=row['name']).exclude(pk=row['kept_id'])
+        duplicate_ids = list(duplicates.values_list('pk', flat=True))
+        question_ids = QuestionTag.objects.filter(tag_id__in=duplicate_ids).values_list('question_id', flat=True)
+        QuestionTag.objects.bulk_create(
+            [QuestionTag(question_id=question_id, tag_id=row['kept_id']) for question_id in set(question_ids)],
+            ignore_conflicts=True
+        )
+        Tag.objects.filter(pk__in=duplicate_ids).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('questans', '0008_remove_m2m_votes'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_tags, migrations.RunPython.noop),
+    ]
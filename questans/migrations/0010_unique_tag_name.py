@@ -0,0 +1,20 @@
+# Generated by Django 4.1.1 on 2026-10-18 11:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # the duplicate tags are merged in a separate migration, since PostgreSQL can't alter a table with pending
+    # trigger events (from the data migration's deletes) in the same transaction
+
+    dependencies = [
+        ('questans', '0009_merge_duplicate_tags'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='tag',
+            name='name',
+            field=models.SlugField(unique=True),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 4.1.1 on 2026-10-18 11:12
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_tag_questions(apps, schema_editor):
+    Tag = apps.get_model('questans', 'Tag')
+    through = apps.get_model('questans', 'Question').tags.through
+    Tag.objects.update(questions_count=Coalesce(
+        Subquery(
+            through.objects.filter(tag_id=OuterRef('pk')).order_by().values('tag_id')
+            .annotate(count=Count('pk')).values('count')[:1]
+        ),
+        0
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('questans', '0011_add_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tag',
+            name='questions_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='tag',
+            index=models.Index(fields=['-questions_count', 'name'], name='tag_questions_count_idx'),
+        ),
+        migrations.RunPython(count_tag_questions, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 4.1.1 on 2026-10-18 11:17
+
+from django.db import migrations, models
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+import django.utils.timezone
+
+from questans.ranking import get_hot_score
+
+BATCH_SIZE = 1000
+
+
+def compute_hot_scores(apps, schema_editor):
+    Question = apps.get_model('questans', 'Question')
+    Answer = apps.get_model('questans', 'Answer')
+
+    Question.objects.update(last_activity_at=F('created_at'))
+    answers_count = Answer.objects.filter(question=OuterRef('pk')).order_by().values('question')
+    questions = Question.objects.annotate(
+        answers_count=Coalesce(Subquery(answers_count.annotate(count=Count('pk')).values('count')[:1]), 0)
+    ).only('pk', 'score', 'created_at').order_by('pk')
+    batch = []
+    for question in questions.iterator(chunk_size=BATCH_SIZE):
+        question.hot_score = get_hot_score(question.score, question.answers_count, question.created_at)
+        batch.append(question)
+        if len(batch) >= BATCH_SIZE:
+            Question.objects.bulk_update(batch, ['hot_score'])
+            batch = []
+
+    Question.objects.bulk_update(batch, ['hot_score'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('questans', '0012_add_tag_questions_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='question',
+            name='hot_score',
+            field=models.FloatField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='question',
+            name='last_activity_at',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='question',
+            index=models.Index(fields=['hot_score', 'id'], name='question_hot_score_id_idx'),
+        ),
+        migrations.RunPython(compute_hot_scores, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.1.1 on 2026-10-18 11:21
+
+from django.db import migrations, models
+from django.db.models import F
+import django.utils.timezone
+
+
+def copy_updated_at(apps, schema_editor):
+    for app_label, model_name in (('questans', 'Question'), ('questans', 'Answer')):
+        apps.get_model(app_label, model_name).objects.update(modified_at=F('updated_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('questans', '0014_add_payload_versions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='answer',
+            name='modified_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+        migrations.AddField(
+            model_name='question',
+            name='modified_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+        migrations.RunPython(copy_updated_at, migrations.RunPython.noop),
+    ]
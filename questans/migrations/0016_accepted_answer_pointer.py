@@ -0,0 +1,41 @@
+# Generated by Django 4.1.1 on 2026-10-18 11:26
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+import django.db.models.deletion
+
+
+def set_accepted_answers(apps, schema_editor):
+    Answer = apps.get_model('questans', 'Answer')
+    Question = apps.get_model('questans', 'Question')
+    # concurrent accepts could leave a question with several accepted answers, the last accepted one is kept
+    accepted_answers = Answer.objects.filter(question=OuterRef('pk'), is_accepted=True).order_by('-updated_at', '-id')
+    Question.objects.update(accepted_answer=Subquery(accepted_answers.values('pk')[:1]))
+
+
+def set_is_accepted(apps, schema_editor):
+    Answer = apps.get_model('questans', 'Answer')
+    Question = apps.get_model('questans', 'Question')
+    Answer.objects.filter(
+        pk__in=Question.objects.filter(accepted_answer__isnull=False).values('accepted_answer')
+    ).update(is_accepted=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('questans', '0015_add_modified_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='question',
+            name='accepted_answer',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='questans.answer'),
+        ),
+        migrations.RunPython(set_accepted_answers, set_is_accepted),
+        migrations.RemoveField(
+            model_name='answer',
+            name='is_accepted',
+        ),
+    ]
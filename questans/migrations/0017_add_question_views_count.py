@@ -0,0 +1,18 @@
+# Generated by Django 4.1.1 on 2026-10-18 11:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('questans', '0016_accepted_answer_pointer'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='question',
+            name='views_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.1.1 on 2026-10-18 11:31
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('questans', '0017_add_question_views_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RelatedQuestion',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField()),
+                ('question', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='related_questions', to='questans.question')),
+                ('related', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='questans.question')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='relatedquestion',
+            index=models.Index(fields=['question', '-score', 'related'], name='related_question_score_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='relatedquestion',
+            constraint=models.UniqueConstraint(fields=('question', 'related'), name='unique_related_question'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 4.1.1 on 2026-10-18 11:34
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('questans', '0018_add_related_questions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='question',
+            name='minhash_signature',
+            field=models.BinaryField(default=bytes),
+        ),
+        migrations.CreateModel(
+            name='QuestionSignatureBand',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('band', models.PositiveSmallIntegerField()),
+                ('bucket', models.BigIntegerField()),
+                ('question', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='questans.question')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='questionsignatureband',
+            index=models.Index(fields=['band', 'bucket'], name='question_band_bucket_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.1.1 on 2026-10-18 11:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('questans', '0019_add_question_signatures'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='answer',
+            index=models.Index(fields=['question', 'score', 'id'], name='answer_question_score_idx'),
+        ),
+    ]
@@ -1,23 +1,137 @@
 import uuid
+from typing import Iterable, List
 
 from django.conf import settings
 from django.contrib.contenttypes.fields import GenericRelation
-from django.db import models
+from django.db import models, transaction
+from django.db.models import (BooleanField, Count, ExpressionWrapper, F,
+                              OuterRef, Q, Subquery)
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 from django.utils.text import slugify
 
 from comments.models import Comment
+from qenea_backend.models import VersionedModel
+from questans.ranking import get_hot_score
+from questans.similarity import (get_minhash_signature, get_signature_bands,
+                                 get_signature_similarity, get_tag_weight,
+                                 get_weighted_jaccard)
+from votes.models import VotableModel
 
 # Create your models here.
 
+# how many related questions are kept for a question, and how many of the most recent questions sharing a tag
+# with it are compared to it
+RELATED_QUESTIONS_LIMIT = 10
+RELATED_QUESTIONS_CANDIDATES = 1000
+
+# the estimated similarity above which a question is a likely duplicate, how many likely duplicates are returned,
+# and how many of the questions sharing the most signature buckets are compared
+DUPLICATE_SIMILARITY_THRESHOLD = 0.5
+DUPLICATES_LIMIT = 5
+DUPLICATE_CANDIDATES = 50
+
+# the orderings of a question's answers (after its accepted answer), with the primary key as the tie-breaker
+ANSWER_ORDERINGS = {
+    'newest': ('-created_at', '-id'),
+    'oldest': ('created_at', 'id'),
+    'score': ('-score', '-id')
+}
+
+
+class TagQuerySet(models.QuerySet):
+
+    def get_or_create_many(self, names: Iterable[str]):
+        """
+        Bulk version of get_or_create for tag names: the missing tags are inserted with a single statement
+        (conflicting names are skipped by the unique index) and all the tags are then fetched with one query
+        """
+        names = set(names)
+        self.bulk_create([self.model(name=name) for name in names], ignore_conflicts=True)
+        return list(self.filter(name__in=names))
+
 
 class Tag(models.Model):
-    name = models.SlugField()
+    name = models.SlugField(unique=True)
+    # maintained when questions' tags are set and when questions are deleted, so the tag directory doesn't need
+    # to count the questions of every tag
+    questions_count = models.PositiveIntegerField(default=0, editable=False)
+
+    objects = TagQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-questions_count', 'name'], name='tag_questions_count_idx')
+        ]
 
     def __str__(self):
         return self.name
 
 
-class Question(models.Model):
+class QuestionQuerySet(models.QuerySet):
+
+    def tagged(self, names: Iterable[str], match_all: bool = False):
+        """
+        Filters the questions with any (or all) of the given tag names. The filter is a subquery on the tags
+        through table (looked up by its tag index) rather than a join, so it doesn't duplicate questions
+        """
+        names = set(names)
+        question_tags = Question.tags.through.objects.filter(tag__name__in=names).values('question_id')
+        if match_all:
+            question_tags = (
+                question_tags.annotate(matches=Count('tag_id')).filter(matches=len(names)).values('question_id')
+            )
+
+        return self.filter(pk__in=question_tags)
+
+    def with_answers_count(self):
+        # a correlated subquery (rather than a GROUP BY over a join) is only evaluated for the rows of the page,
+        # so the feed can still be read straight off the ordering index
+        answers_count = Answer.objects.filter(question=OuterRef('pk')).order_by().values('question')
+        return self.annotate(
+            answers_count=Coalesce(Subquery(answers_count.annotate(count=Count('pk')).values('count')[:1]), 0)
+        )
+
+    def for_list(self, user: bool = True, tags: bool = True, answers_count: bool = True):
+        # everything the list serializer reads is fetched here, so a page costs the same number of queries
+        # regardless of its size (what sparse fieldsets don't represent can be left out)
+        queryset = self
+        if user:
+            queryset = queryset.select_related('user__profile')
+
+        if tags:
+            queryset = queryset.prefetch_related('tags')
+
+        if answers_count:
+            queryset = queryset.with_answers_count()
+
+        return queryset
+
+    def likely_duplicates(self, question: 'Question') -> List['Question']:
+        """
+        Returns the questions whose text is most likely a duplicate of `question`'s, with their estimated
+        `similarity`. The candidates are looked up by the buckets of the question's signature bands (on the bucket
+        index, so the cost doesn't grow with the number of questions) and only their signatures are compared
+        """
+        buckets = Q()
+        for band, bucket in enumerate(get_signature_bands(question.minhash_signature)):
+            buckets |= Q(band=band, bucket=bucket)
+
+        candidates = (
+            QuestionSignatureBand.objects.filter(buckets).exclude(question=question).values('question_id')
+            .annotate(matches=Count('pk')).order_by('-matches', '-question_id').values('question_id')
+        )[:DUPLICATE_CANDIDATES]
+        duplicates = []
+        for candidate in self.filter(pk__in=candidates).only('pk', 'slug', 'title', 'minhash_signature'):
+            candidate.similarity = get_signature_similarity(question.minhash_signature, candidate.minhash_signature)
+            if candidate.similarity >= DUPLICATE_SIMILARITY_THRESHOLD:
+                duplicates.append(candidate)
+
+        duplicates.sort(key=lambda candidate: (-candidate.similarity, -candidate.pk))
+        return duplicates[:DUPLICATES_LIMIT]
+
+
+class Question(VersionedModel, VotableModel):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='questions')
     title = models.CharField(max_length=120)
     # if you use uuid field (not as primary key) in another project and you encounter unique constraint errors 
@@ -25,52 +139,261 @@ class Question(models.Model):
     uuid = models.UUIDField(default=uuid.uuid4, editable=False, unique=True)
     slug = models.SlugField(max_length=150, default='', editable=False, unique=True)
     description = models.TextField()
-    upvotes = models.ManyToManyField(settings.AUTH_USER_MODEL, blank=True, related_name='questions_upvoted')
-    downvotes = models.ManyToManyField(settings.AUTH_USER_MODEL, blank=True, related_name='questions_downvoted')
     tags = models.ManyToManyField(Tag, related_name='questions')
     comments = GenericRelation(Comment)
+    # a single pointer (rather than a flag on every answer) so a question can't end up with two accepted answers,
+    # it's set by the accept toggle (see AnswerAcceptToggleAPIView)
+    accepted_answer = models.ForeignKey(
+        'Answer', on_delete=models.SET_NULL, null=True, blank=True, editable=False, related_name='+'
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # when the question was last voted on or answered, the hot scores of recently active questions are
+    # periodically recomputed (see questans.tasks)
+    last_activity_at = models.DateTimeField(default=timezone.now, editable=False, db_index=True)
+    hot_score = models.FloatField(default=0, editable=False)
+    # the MinHash signature of the title and description, see questans.similarity and QuestionSignatureBand
+    minhash_signature = models.BinaryField(default=bytes, editable=False)
+    # views are buffered in the cache and periodically added to the count, see questans.view_counts
+    views_count = models.PositiveIntegerField(default=0, editable=False)
+
+    objects = QuestionQuerySet.as_manager()
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # backs the keyset pagination of the question feed
+            models.Index(fields=['created_at', 'id'], name='question_created_at_id_idx'),
+            models.Index(fields=['hot_score', 'id'], name='question_hot_score_id_idx')
+        ]
 
     def __str__(self):
         return self.title
 
     def save(self, *args, **kwargs):
-        self.slug = slugify('%s-%s' % (self.title, self.uuid), allow_unicode=True)
-        return super(Question, self).save(*args, **kwargs)
+        self.slug = self.get_slug()
+        is_new = self._state.adding
+        if is_new:
+            self.hot_score = get_hot_score(0, 0, timezone.now())
 
-    @property
-    def total_points(self):
-        return self.upvotes.count() - self.downvotes.count()
+        update_fields = kwargs.get('update_fields')
+        signature = None
+        if update_fields is None or {'title', 'description'}.intersection(update_fields):
+            signature = get_minhash_signature(f'{self.title} {self.description}')
+            # the signature (and its bands) are only written when the text changed enough to change it
+            if signature == bytes(self.minhash_signature):
+                signature = None
+            else:
+                self.minhash_signature = signature
+                if update_fields is not None:
+                    kwargs['update_fields'] = [*update_fields, 'minhash_signature']
+
+        super(Question, self).save(*args, **kwargs)
+        if signature is not None:
+            QuestionSignatureBand.objects.index(self, is_new=is_new)
+
+    def get_slug(self):
+        return slugify('%s-%s' % (self.title, self.uuid), allow_unicode=True)
+
+    @classmethod
+    def get_vote_updates(cls):
+        return {'last_activity_at': timezone.now(), **cls.get_version_updates()}
+
+    def set_tags(self, names: Iterable[str], is_new: bool = False):
+        """
+        Sets the question's tags from their names. Only the difference from the current tags is written, so
+        unchanged tags cause no writes (the current tags aren't looked up at all for new questions)
+        """
+        names = set(names)
+        current_tags = {} if is_new else {tag.name: tag for tag in self.tags.all()}
+
+        removed_tags = [tag for name, tag in current_tags.items() if name not in names]
+        if removed_tags:
+            self.tags.remove(*removed_tags)
+            Tag.objects.filter(pk__in=[tag.pk for tag in removed_tags]).update(
+                questions_count=F('questions_count') - 1
+            )
+
+        added_names = names.difference(current_tags)
+        if added_names:
+            added_tags = Tag.objects.get_or_create_many(added_names)
+            through = Question.tags.through
+            through.objects.bulk_create([through(question_id=self.pk, tag_id=tag.pk) for tag in added_tags])
+            Tag.objects.filter(pk__in=[tag.pk for tag in added_tags]).update(questions_count=F('questions_count') + 1)
+
+        if removed_tags or added_names:
+            RelatedQuestion.objects.refresh(self, is_new=is_new)
 
     @property
     def total_answers(self):
+        # querysets built with `with_answers_count()` already carry the count
+        if hasattr(self, 'answers_count'):
+            return self.answers_count
+
         return self.answers.count()
 
     def get_description_summary(self):
         return f'{self.description[:150]}...'
 
 
-class Answer(models.Model):
+class QuestionSignatureBandQuerySet(models.QuerySet):
+
+    def index(self, question: Question, is_new: bool = False):
+        """
+        Writes (or rewrites) the buckets of the question's signature bands
+        """
+        if not is_new:
+            self.filter(question=question).delete()
+
+        self.bulk_create([
+            self.model(question=question, band=band, bucket=bucket)
+            for band, bucket in enumerate(get_signature_bands(question.minhash_signature))
+        ])
+
+
+class QuestionSignatureBand(models.Model):
+    """
+    The bucket of one of the MINHASH_BANDS bands of a question's signature. Questions sharing a bucket are
+    candidate duplicates, see QuestionQuerySet.likely_duplicates
+    """
+    question = models.ForeignKey(Question, on_delete=models.CASCADE, related_name='+')
+    band = models.PositiveSmallIntegerField()
+    bucket = models.BigIntegerField()
+
+    objects = QuestionSignatureBandQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['band', 'bucket'], name='question_band_bucket_idx')
+        ]
+
+    def __str__(self):
+        return f'Band {self.band} of question {self.question_id}'
+
+
+class RelatedQuestionQuerySet(models.QuerySet):
+
+    def refresh(self, question: Question, is_new: bool = False):
+        """
+        Recomputes the related questions of `question` (after its tags changed), from the most recent questions
+        sharing a tag with it. The similarity is symmetric, so the rows relating other questions to `question` are
+        rewritten as well: those that existed and those of the questions now in its top RELATED_QUESTIONS_LIMIT
+        (the other rows of these questions are only recomputed when their own tags change). New questions don't
+        have rows to rewrite yet
+        """
+        through = Question.tags.through
+        candidates = (
+            through.objects.filter(tag__in=through.objects.filter(question=question).values('tag_id'))
+            .exclude(question=question).order_by('-question_id').values('question_id').distinct()
+        )[:RELATED_QUESTIONS_CANDIDATES]
+        rows = through.objects.filter(
+            Q(question=question) | Q(question__in=candidates)
+        ).values_list('question_id', 'tag_id', 'tag__questions_count')
+
+        question_tags, weights = {}, {}
+        for question_id, tag_id, questions_count in rows:
+            question_tags.setdefault(question_id, []).append(tag_id)
+            weights[tag_id] = get_tag_weight(questions_count)
+
+        tags = question_tags.pop(question.pk, [])
+        scores = {
+            question_id: get_weighted_jaccard(tags, other_tags, weights)
+            for question_id, other_tags in question_tags.items()
+        }
+        related = sorted(scores, key=lambda question_id: (-scores[question_id], question_id))
+        related = related[:RELATED_QUESTIONS_LIMIT]
+        with transaction.atomic():
+            relating = set()
+            if not is_new:
+                relating.update(self.filter(related=question).values_list('question_id', flat=True))
+                self.filter(Q(question=question) | Q(related=question)).delete()
+
+            self.bulk_create([
+                *[self.model(question=question, related_id=pk, score=scores[pk]) for pk in related],
+                *[
+                    self.model(question_id=pk, related=question, score=scores[pk])
+                    for pk in relating.union(related) if pk in scores
+                ]
+            ])
+
+
+class RelatedQuestion(models.Model):
+    """
+    A precomputed pair of related questions (by the weighted Jaccard similarity of their tags, see
+    questans.similarity), so a question's related questions are read with a single query on the score index
+    """
+    question = models.ForeignKey(Question, on_delete=models.CASCADE, related_name='related_questions')
+    related = models.ForeignKey(Question, on_delete=models.CASCADE, related_name='+')
+    score = models.FloatField()
+
+    objects = RelatedQuestionQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['question', 'related'], name='unique_related_question')
+        ]
+        indexes = [
+            models.Index(fields=['question', '-score', 'related'], name='related_question_score_idx')
+        ]
+
+    def __str__(self):
+        return f'{self.related} (related to {self.question})'
+
+
+class AnswerQuerySet(models.QuerySet):
+
+    def accepted_first(self, question: Question, ordering: str = 'newest'):
+        """
+        Orders the answers of `question` with its accepted answer first (then by one of the ANSWER_ORDERINGS). The
+        accepted answer is compared by primary key with the pointer of the question already fetched, so this costs
+        no join
+        """
+        is_pinned = ExpressionWrapper(Q(pk=question.accepted_answer_id), output_field=BooleanField())
+        return (
+            self.filter(question=question).annotate(is_pinned=is_pinned)
+            .order_by('-is_pinned', *ANSWER_ORDERINGS[ordering])
+        )
+
+    def accepted_first_by_slug(self, slug: str, ordering: str = 'newest'):
+        """
+        Like accepted_first, for the question with the slug, which is joined (and its accepted answer compared)
+        in the same query rather than fetched first
+        """
+        # the comparison is false rather than null for questions without an accepted answer, which keeps the
+        # annotation usable in keyset pagination
+        is_pinned = ExpressionWrapper(
+            Q(question__accepted_answer__isnull=False, question__accepted_answer=F('pk')), output_field=BooleanField()
+        )
+        return (
+            self.filter(question__slug=slug).annotate(is_pinned=is_pinned)
+            .order_by('-is_pinned', *ANSWER_ORDERINGS[ordering])
+        )
+
+
+class Answer(VersionedModel, VotableModel):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='answers')
     question = models.ForeignKey(Question, on_delete=models.CASCADE, related_name='answers')
     content = models.TextField()
-    is_accepted = models.BooleanField(default=False)
-    upvotes = models.ManyToManyField(settings.AUTH_USER_MODEL, blank=True, related_name='answers_upvoted')
-    downvotes = models.ManyToManyField(settings.AUTH_USER_MODEL, blank=True, related_name='answers_downvoted')
     comments = GenericRelation(Comment)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = AnswerQuerySet.as_manager()
+
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['question', 'created_at', 'id'], name='answer_question_created_idx'),
+            models.Index(fields=['question', 'score', 'id'], name='answer_question_score_idx')
+        ]
 
     def __str__(self):
         return f"{self.user}'s answer"
 
     @property
-    def total_points(self):
-        return self.upvotes.count() - self.downvotes.count()
+    def is_accepted(self):
+        return self.question.accepted_answer_id == self.pk
+
+    @classmethod
+    def get_vote_updates(cls):
+        return cls.get_version_updates()
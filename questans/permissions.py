@@ -20,4 +20,5 @@ class IsObjectUser(BasePermission):
     """
 
     def has_object_permission(self, request, view, obj):
-        return obj.user == request.user
+        # compared by key, so the owner doesn't have to be fetched
+        return obj.user_id == request.user.pk
@@ -0,0 +1,16 @@
+import math
+from datetime import datetime, timezone
+
+# the time component of the hot score grows with the question's creation time (rather than decaying with its age),
+# so scores only change when a question's votes or answers change and don't have to be recomputed as time passes.
+# A question created HOT_SCORE_DECAY_SECONDS later needs 10 times less activity to rank the same
+HOT_SCORE_EPOCH = datetime(2021, 1, 1, tzinfo=timezone.utc)
+HOT_SCORE_DECAY_SECONDS = 45000
+ANSWER_WEIGHT = 2
+
+
+def get_hot_score(score: int, answers_count: int, created_at: datetime) -> float:
+    activity = score + ANSWER_WEIGHT * answers_count
+    order = math.log10(max(abs(activity), 1))
+    sign = 1 if activity > 0 else -1 if activity < 0 else 0
+    return round(sign * order + (created_at - HOT_SCORE_EPOCH).total_seconds() / HOT_SCORE_DECAY_SECONDS, 7)
@@ -0,0 +1,33 @@
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from comments.models import Comment
+from questans.models import Answer, Question, Tag
+
+
+@receiver(pre_delete, sender=Question)
+def decrement_tag_questions_count(sender, instance, **kwargs):
+    # a signal (rather than Question.delete) also covers questions deleted in bulk or through cascades
+    Tag.objects.filter(questions=instance).update(questions_count=F('questions_count') - 1)
+
+
+@receiver(post_save, sender=Answer)
+@receiver(post_delete, sender=Answer)
+def update_question_last_activity(sender, instance, created=True, **kwargs):
+    # edits don't change the number of answers the hot score is computed from, nor the
+    # question's payload
+    if created:
+        Question.objects.filter(pk=instance.question_id).update(
+            last_activity_at=timezone.now(), **Question.get_version_updates()
+        )
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def bump_commented_object_version(sender, instance, created=True, **kwargs):
+    model = ContentType.objects.get_for_id(instance.content_type_id).model_class()
+    if created and model in (Question, Answer):
+        model.objects.filter(pk=instance.object_id).update(**model.get_version_updates())
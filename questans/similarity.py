@@ -0,0 +1,85 @@
+import hashlib
+import math
+import random
+import re
+import struct
+from typing import Dict, Iterable, List, Set
+
+# MinHash signatures estimate the Jaccard similarity of the word shingles of two texts (the share of equal
+# values of their signatures), and are split into bands of MINHASH_BAND_ROWS values for locality sensitive hashing:
+# texts sharing a band's bucket are candidate duplicates. With 16 bands of 4 rows, texts with a similarity of 0.5
+# share a bucket 65% of the time, and of 0.8 99.9% of the time
+MINHASH_PERMUTATIONS = 64
+MINHASH_BAND_ROWS = 4
+MINHASH_BANDS = MINHASH_PERMUTATIONS // MINHASH_BAND_ROWS
+MINHASH_PRIME = (1 << 61) - 1
+MINHASH_MAX_VALUE = (1 << 32) - 1
+# the permutations are seeded, so signatures stay comparable across processes and deployments
+_minhash_random = random.Random(20211110)
+MINHASH_COEFFICIENTS = [
+    (_minhash_random.randrange(1, MINHASH_PRIME), _minhash_random.randrange(0, MINHASH_PRIME))
+    for _ in range(MINHASH_PERMUTATIONS)
+]
+
+
+# tags are weighted by their inverse document frequency, so sharing a rare tag relates two questions more than
+# sharing a tag most questions have
+def get_tag_weight(questions_count: int) -> float:
+    return 1 / math.log(1 + max(questions_count, 1))
+
+
+def get_weighted_jaccard(tags: Iterable[int], other_tags: Iterable[int], weights: Dict[int, float]) -> float:
+    """
+    The weight of the tags two questions share over the weight of all their tags, from 0 (no shared tags) to 1
+    (the same tags)
+    """
+    tags, other_tags = set(tags), set(other_tags)
+    union = sum(weights[tag] for tag in tags | other_tags)
+    if not union:
+        return 0.0
+
+    return round(sum(weights[tag] for tag in tags & other_tags) / union, 7)
+
+
+def get_shingles(text: str) -> Set[str]:
+    # the text is reduced to its lowercase words, so punctuation and formatting changes don't matter
+    words = re.findall(r'\w+', text.lower())
+    if len(words) < 2:
+        return set(words)
+
+    return {f'{word} {next_word}' for word, next_word in zip(words, words[1:])}
+
+
+def get_minhash_signature(text: str) -> bytes:
+    """
+    The MinHash signature of the text's shingles, packed as MINHASH_PERMUTATIONS unsigned 32 bit integers
+    """
+    hashes = [
+        int.from_bytes(hashlib.blake2b(shingle.encode(), digest_size=8).digest(), 'big')
+        for shingle in get_shingles(text)
+    ] or [0]
+    values = [
+        min((a * value + b) % MINHASH_PRIME for value in hashes) & MINHASH_MAX_VALUE
+        for a, b in MINHASH_COEFFICIENTS
+    ]
+    return struct.pack(f'<{MINHASH_PERMUTATIONS}I', *values)
+
+
+def get_signature_bands(signature: bytes) -> List[int]:
+    """
+    The buckets of the signature's bands, as signed 64 bit integers (which fit in a BigIntegerField)
+    """
+    band_size = MINHASH_BAND_ROWS * 4
+    return [
+        int.from_bytes(
+            hashlib.blake2b(signature[band * band_size:(band + 1) * band_size], digest_size=8).digest(),
+            'big', signed=True
+        )
+        for band in range(MINHASH_BANDS)
+    ]
+
+
+def get_signature_similarity(signature: bytes, other_signature: bytes) -> float:
+    values = struct.unpack(f'<{MINHASH_PERMUTATIONS}I', signature)
+    other_values = struct.unpack(f'<{MINHASH_PERMUTATIONS}I', other_signature)
+    return sum(value == other_value for value, other_value in zip(values, other_values)) / MINHASH_PERMUTATIONS
@@ -0,0 +1,57 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from celery import shared_task
+from celery.utils.log import get_task_logger
+
+from questans.models import Question
+from questans.ranking import get_hot_score
+from questans.view_counts import flush_question_views
+
+logger = get_task_logger(__name__)
+
+BATCH_SIZE = 500
+
+
+@shared_task(name='update question hot scores')
+def update_hot_scores(activity_window: float = None):
+    """
+    Recomputes the hot scores of the questions voted on or answered in the last `activity_window` seconds (which
+    should be longer than the task's schedule interval, so no activity is missed between runs). The scores of other
+    questions can't have changed, see questans.ranking
+    """
+    if activity_window is None:
+        activity_window = settings.HOT_SCORE_ACTIVITY_WINDOW
+
+    since = timezone.now() - timedelta(seconds=activity_window)
+    updated = recompute_hot_scores(Question.objects.filter(last_activity_at__gte=since))
+    logger.info(f'updated the hot scores of {updated} questions')
+    return updated
+
+
+def recompute_hot_scores(questions) -> int:
+    """
+    Recomputes the hot scores of the given questions (in batches), only the scores that changed are written
+    """
+    questions = questions.with_answers_count().only('pk', 'score', 'created_at', 'hot_score').order_by('pk')
+    updated = []
+    for question in questions.iterator(chunk_size=BATCH_SIZE):
+        hot_score = get_hot_score(question.score, question.answers_count, question.created_at)
+        if hot_score != question.hot_score:
+            question.hot_score = hot_score
+            updated.append(question)
+
+    Question.objects.bulk_update(updated, ['hot_score'], batch_size=BATCH_SIZE)
+    return len(updated)
+
+
+@shared_task(name='flush question views')
+def flush_views():
+    """
+    Adds the buffered question views to the questions' view counts
+    """
+    views = flush_question_views()
+    logger.info(f'flushed {views} question views')
+    return views
@@ -0,0 +1,130 @@
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+
+from questans.models import Question
+
+# Buffered question view counting. Views are counted in the cache (Redis in production) in buckets of
+# QUESTION_VIEWS_BUFFER_INTERVAL seconds, and the buckets are added to the questions' `views_count` by a periodic
+# task (see questans.tasks), with one UPDATE per batch of questions having the same number of views rather than an
+# UPDATE of the (hot) question row on every view.
+#
+# The cache can't list its keys, so the first view of a question in a bucket also stores the question's slug in the
+# bucket's next slot. A bucket is only flushed once the bucket after it is over, so no view is still being recorded
+# in it, which means that the counts lag by up to two intervals plus the task's schedule interval. Views are
+# counted by slug (which is what the retrieve action is looked up by), the views of a question whose title (and so
+# slug) is edited while they are buffered are lost
+KEY_PREFIX = 'question-views'
+FLUSHED_BUCKET_KEY = f'{KEY_PREFIX}:flushed'
+FLUSH_LOCK_KEY = f'{KEY_PREFIX}:flush-lock'
+# the lock is released when a flush ends, its timeout only frees it if the worker died during one, so it's longer
+# than the task's schedule interval (60 seconds, see settings.CELERY_BEAT_SCHEDULE) plus the longest flush
+FLUSH_LOCK_TIMEOUT = 600
+BATCH_SIZE = 500
+
+
+def get_bucket(timestamp: Optional[float] = None) -> int:
+    return int((time.time() if timestamp is None else timestamp) // settings.QUESTION_VIEWS_BUFFER_INTERVAL)
+
+
+def get_count_key(bucket: int, slug: str) -> str:
+    return f'{KEY_PREFIX}:{bucket}:count:{slug}'
+
+
+def get_slot_key(bucket: int, slot: int) -> str:
+    return f'{KEY_PREFIX}:{bucket}:slot:{slot}'
+
+
+def get_slots_key(bucket: int) -> str:
+    return f'{KEY_PREFIX}:{bucket}:slots'
+
+
+def record_question_view(slug: str):
+    timeout = settings.QUESTION_VIEWS_BUFFER_TIMEOUT
+    bucket = get_bucket()
+    count_key = get_count_key(bucket, slug)
+    # add() only sets the counter if it doesn't exist yet, so the question is registered once per bucket
+    if cache.add(count_key, 0, timeout=timeout):
+        cache.add(get_slots_key(bucket), 0, timeout=timeout)
+        cache.set(get_slot_key(bucket, cache.incr(get_slots_key(bucket))), slug, timeout=timeout)
+
+    try:
+        cache.incr(count_key)
+    except ValueError:
+        # the counter was evicted between the two calls
+        cache.set(count_key, 1, timeout=timeout)
+
+
+async def arecord_question_view(slug: str):
+    # record_question_view, with the cache's async methods (for the async views)
+    timeout = settings.QUESTION_VIEWS_BUFFER_TIMEOUT
+    bucket = get_bucket()
+    count_key = get_count_key(bucket, slug)
+    if await cache.aadd(count_key, 0, timeout=timeout):
+        await cache.aadd(get_slots_key(bucket), 0, timeout=timeout)
+        await cache.aset(get_slot_key(bucket, await cache.aincr(get_slots_key(bucket))), slug, timeout=timeout)
+
+    try:
+        await cache.aincr(count_key)
+    except ValueError:
+        await cache.aset(count_key, 1, timeout=timeout)
+
+
+def read_bucket(bucket: int) -> Tuple[Dict[str, int], List[str]]:
+    """
+    Returns the view counts of a bucket by slug, and the keys of the bucket
+    """
+    slot_keys = [get_slot_key(bucket, slot) for slot in range(1, (cache.get(get_slots_key(bucket)) or 0) + 1)]
+    count_keys = {get_count_key(bucket, slug): slug for slug in cache.get_many(slot_keys).values()}
+    counts = {count_keys[key]: count for key, count in cache.get_many(count_keys).items()}
+    return counts, [get_slots_key(bucket), *slot_keys, *count_keys]
+
+
+def flush_question_views(timestamp: Optional[float] = None) -> int:
+    """
+    Adds the views of the buckets that are over (and weren't flushed yet) to the questions' view counts, and
+    returns the number of views added
+    """
+    interval = settings.QUESTION_VIEWS_BUFFER_INTERVAL
+    # the lock keeps overlapping runs from adding the same views twice
+    if not cache.add(FLUSH_LOCK_KEY, 1, timeout=FLUSH_LOCK_TIMEOUT):
+        return 0
+
+    try:
+        last_bucket = get_bucket(timestamp) - 2
+        # buckets older than the buffer's timeout have expired
+        first_bucket = last_bucket - settings.QUESTION_VIEWS_BUFFER_TIMEOUT // interval
+        flushed_bucket = cache.get(FLUSHED_BUCKET_KEY)
+        if flushed_bucket is not None:
+            first_bucket = max(first_bucket, flushed_bucket + 1)
+
+        views, keys = defaultdict(int), []
+        for bucket in range(first_bucket, last_bucket + 1):
+            counts, bucket_keys = read_bucket(bucket)
+            keys.extend(bucket_keys)
+            for slug, count in counts.items():
+                views[slug] += count
+
+        slugs_by_count = defaultdict(list)
+        for slug, count in views.items():
+            slugs_by_count[count].append(slug)
+
+        with transaction.atomic():
+            for count, slugs in slugs_by_count.items():
+                for index in range(0, len(slugs), BATCH_SIZE):
+                    # the view count is in the question's payload, so its cached payload and validators change
+                    Question.objects.filter(slug__in=slugs[index:index + BATCH_SIZE]).update(
+                        views_count=F('views_count') + count, **Question.get_version_updates()
+                    )
+
+        # the buckets are only dropped once their views are written
+        cache.delete_many(keys)
+        cache.set(FLUSHED_BUCKET_KEY, last_bucket, timeout=None)
+        return sum(views.values())
+    finally:
+        cache.delete(FLUSH_LOCK_KEY)
@@ -0,0 +1,19 @@
+from rest_framework import serializers
+from rest_framework.reverse import reverse as api_reverse
+
+
+class SearchResultSerializer(serializers.Serializer):
+    type = serializers.CharField(source='content_type.model', read_only=True)
+    url = serializers.SerializerMethodField()
+    question = serializers.CharField(source='question.slug', read_only=True)
+    question_title = serializers.CharField(source='question.title', read_only=True)
+    title = serializers.CharField(source='title_highlight', read_only=True)
+    snippet = serializers.CharField(read_only=True)
+    score = serializers.FloatField(read_only=True)
+
+    def get_url(self, obj) -> str:
+        request = self.context['request']
+        if obj.content_type.model == 'question':
+            return api_reverse('Questans_API_v1:question-detail', kwargs={'slug': obj.question.slug}, request=request)
+
+        return api_reverse('Questans_API_v1:answer-detail', kwargs={'pk': obj.object_id}, request=request)
@@ -0,0 +1,103 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+
+from rest_framework import status
+from rest_framework.reverse import reverse as api_reverse
+from rest_framework.test import APIClient, APITestCase
+
+from questans.models import Answer, Question
+from search.models import SearchDocument
+
+User = get_user_model()
+
+
+class SearchAPITestCase(APITestCase):
+
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.search_url = api_reverse('Search_API_v1:search')
+
+        self.test_user = User.objects.create_user(
+            email='eren.yaeger@test.com',
+            password='Password@001',
+            first_name='eren',
+            last_name='yaeger',
+            username='mr_freedom'
+        )
+        self.test_question = Question.objects.create(
+            user=self.test_user,
+            title='How do titans work?',
+            description='Where do they come from and why are they <so> big?'
+        )
+        self.test_answer = Answer.objects.create(
+            user=self.test_user,
+            question=self.test_question,
+            content='Titans are created by the founding titan, walls are made of them.'
+        )
+        self.test_other_question = Question.objects.create(
+            user=self.test_user,
+            title='Who built the walls?',
+            description='There are three of them around paradis.'
+        )
+
+    def search(self, query, **params):
+        test_response = self.client.get(path=self.search_url, data={'q': query, **params})
+        self.assertEqual(test_response.status_code, status.HTTP_200_OK)
+        return test_response.data
+
+    def test_search_ranks_and_highlights_results(self):
+        test_data = self.search('titans')
+        self.assertEqual(test_data['count'], 2)
+        test_question_result, test_answer_result = test_data['results']
+
+        # title matches rank above body matches
+        self.assertEqual(test_question_result['type'], 'question')
+        self.assertEqual(test_question_result['question'], self.test_question.slug)
+        self.assertEqual(test_question_result['title'], 'How do <mark>titans</mark> work?')
+        # the text around the highlights is escaped
+        self.assertIn('&lt;so&gt;', test_question_result['snippet'])
+        self.assertEqual(test_answer_result['type'], 'answer')
+        self.assertEqual(test_answer_result['question_title'], self.test_question.title)
+        self.assertIn('<mark>Titans</mark> are created', test_answer_result['snippet'])
+        self.assertTrue(test_answer_result['url'].endswith(f'/answers/{self.test_answer.pk}/'))
+
+        # all the terms have to match, and operators are searched as plain words
+        self.assertEqual(self.search('walls paradis')['count'], 1)
+        self.assertEqual(self.search('walls OR "titans" NOT*')['count'], 0)
+
+        test_data = self.search('walls', size=1)
+        self.assertEqual(test_data['count'], 2)
+        self.assertEqual(len(test_data['results']), 1)
+        self.assertIsNotNone(test_data['next'])
+
+        test_response = self.client.get(path=self.search_url, data={'q': ' '})
+        self.assertEqual(test_response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_search_index_follows_writes(self):
+        self.test_question.title = 'How do shifters work?'
+        self.test_question.save(update_fields=['title', 'slug', 'updated_at'])
+        self.assertEqual(self.search('shifters')['count'], 1)
+        self.assertEqual(self.search('titans')['count'], 1)
+
+        self.test_answer.delete()
+        self.assertEqual(self.search('founding')['count'], 0)
+
+        Answer.objects.create(user=self.test_user, question=self.test_question, content='The founding titan.')
+        self.test_question.delete()
+        self.assertEqual(self.search('founding')['count'], 0)
+        self.assertEqual(SearchDocument.objects.count(), 1)
+
+    def test_rebuild_search_index_command(self):
+        # documents going out of sync, e.g. after bulk updates that don't send signals
+        Question.objects.filter(pk=self.test_question.pk).update(title='How do shifters work?')
+        SearchDocument.objects.for_object(self.test_other_question).delete()
+        SearchDocument.objects.for_object(self.test_answer).update(object_id=9999, body='stale')
+
+        call_command('rebuild_search_index', batch_size=1, stdout=StringIO())
+        self.assertEqual(self.search('shifters')['count'], 1)
+        self.assertEqual(self.search('paradis')['count'], 1)
+        self.assertEqual(self.search('stale')['count'], 0)
+        self.assertEqual(self.search('founding')['count'], 1)
+        self.assertEqual(SearchDocument.objects.count(), 3)
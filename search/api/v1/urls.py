@@ -0,0 +1,9 @@
+from django.urls import path
+
+from . import views
+
+app_name = 'Search_API_v1'
+
+urlpatterns = [
+    path('search/', views.SearchAPIView.as_view(), name='search')
+]
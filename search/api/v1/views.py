@@ -0,0 +1,29 @@
+from drf_spectacular.utils import OpenApiParameter, extend_schema
+from rest_framework import generics, permissions
+from rest_framework.exceptions import ValidationError
+
+from search.backends import SearchResults
+
+from .serializers import SearchResultSerializer
+
+
+class SearchAPIView(generics.ListAPIView):
+    """
+    Endpoint that provides users (unauthenticated or authenticated) with a full text search over questions and
+    answers, best matches first. Matched terms are wrapped in <mark> tags in the title and the snippet (the rest
+    of the text is html escaped)
+    """
+    permission_classes = (permissions.AllowAny, )
+    serializer_class = SearchResultSerializer
+    search_query_param = 'q'
+
+    def get_queryset(self):
+        query = self.request.query_params.get(self.search_query_param, '').strip()
+        if not query:
+            raise ValidationError({self.search_query_param: 'This query parameter is required.'})
+
+        return SearchResults(query)
+
+    @extend_schema(parameters=[OpenApiParameter('q', str, required=True, description='The search terms')])
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
@@ -0,0 +1,224 @@
+import html
+import re
+from typing import List
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection as default_connection
+from django.db.models import prefetch_related_objects
+
+from search.models import SearchDocument
+
+# highlighted terms are delimited with private use characters (rather than html tags) by the database, so the
+# documents' text can be escaped before the delimiters are replaced with <mark> tags
+HIGHLIGHT_START = '\ue000'
+HIGHLIGHT_END = '\ue001'
+
+
+def format_highlight(text: str) -> str:
+    return html.escape(text).replace(HIGHLIGHT_START, '<mark>').replace(HIGHLIGHT_END, '</mark>')
+
+
+def get_search_terms(query: str) -> List[str]:
+    # the query is reduced to its words, so users can't run into (or abuse) the operators of either syntax
+    return re.findall(r'\w+', query)
+
+
+class SearchBackend(object):
+    """
+    Base for the database specific parts of the search: creating the full text index (from a migration) and
+    querying it. Results are SearchDocument instances with `title_highlight`, `snippet` and `score` attributes,
+    best matches first
+    """
+    table = SearchDocument._meta.db_table
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def install(self, schema_editor):
+        raise NotImplementedError
+
+    def uninstall(self, schema_editor):
+        raise NotImplementedError
+
+    def optimize(self):
+        pass
+
+    def count(self, terms: List[str]) -> int:
+        with self.connection.cursor() as cursor:
+            cursor.execute(self.count_sql, [self.get_match_query(terms)])
+            return cursor.fetchone()[0]
+
+    def search(self, terms: List[str], offset: int, limit: int) -> List[SearchDocument]:
+        params = self.get_search_params(self.get_match_query(terms), offset, limit)
+        results = list(SearchDocument.objects.raw(self.search_sql, params).using(self.connection.alias))
+        for document in results:
+            document.title_highlight = format_highlight(document.title_highlight)
+            document.snippet = format_highlight(document.snippet)
+
+        return results
+
+    def get_match_query(self, terms: List[str]) -> str:
+        raise NotImplementedError
+
+    def get_search_params(self, match_query: str, offset: int, limit: int) -> list:
+        raise NotImplementedError
+
+
+class SQLiteSearchBackend(SearchBackend):
+    """
+    An external content FTS5 table over the documents table (so the text isn't stored twice), kept in sync by
+    triggers. Django rebuilds SQLite tables for most schema changes, so migrations that alter the documents table
+    have to install the index again
+    """
+    fts_table = f'{SearchDocument._meta.db_table}_fts'
+    count_sql = f'SELECT COUNT(*) FROM {fts_table} WHERE {fts_table} MATCH %s'
+    search_sql = f"""
+        SELECT document.id, document.content_type_id, document.object_id, document.question_id, document.title,
+               highlight({fts_table}, 0, %s, %s) AS title_highlight,
+               snippet({fts_table}, 1, %s, %s, '…', 32) AS snippet,
+               -{fts_table}.rank AS score
+        FROM {fts_table} INNER JOIN {SearchDocument._meta.db_table} document ON document.id = {fts_table}.rowid
+        WHERE {fts_table} MATCH %s
+        ORDER BY {fts_table}.rank
+        LIMIT %s OFFSET %s
+    """
+
+    def install(self, schema_editor):
+        table, fts_table = self.table, self.fts_table
+        insert = f'INSERT INTO {fts_table}(rowid, title, body) VALUES (new.id, new.title, new.body);'
+        delete = (
+            f"INSERT INTO {fts_table}({fts_table}, rowid, title, body) VALUES ('delete', old.id, old.title, old.body);"
+        )
+        for sql in (
+            f"""CREATE VIRTUAL TABLE {fts_table} USING fts5(
+                title, body, content='{table}', content_rowid='id', tokenize='porter unicode61'
+            )""",
+            # title matches rank above body matches
+            f"INSERT INTO {fts_table}({fts_table}, rank) VALUES ('rank', 'bm25(10.0, 1.0)')",
+            f'CREATE TRIGGER {table}_ai AFTER INSERT ON {table} BEGIN {insert} END',
+            f'CREATE TRIGGER {table}_ad AFTER DELETE ON {table} BEGIN {delete} END',
+            f'CREATE TRIGGER {table}_au AFTER UPDATE OF title, body ON {table} BEGIN {delete} {insert} END',
+            f"INSERT INTO {fts_table}({fts_table}) VALUES ('rebuild')"
+        ):
+            schema_editor.execute(sql)
+
+    def uninstall(self, schema_editor):
+        for suffix in ('ai', 'ad', 'au'):
+            schema_editor.execute(f'DROP TRIGGER IF EXISTS {self.table}_{suffix}')
+
+        schema_editor.execute(f'DROP TABLE IF EXISTS {self.fts_table}')
+
+    def optimize(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"INSERT INTO {self.fts_table}({self.fts_table}) VALUES ('rebuild')")
+            cursor.execute(f"INSERT INTO {self.fts_table}({self.fts_table}) VALUES ('optimize')")
+
+    def get_match_query(self, terms):
+        # every term is quoted (and so matched literally), terms separated by spaces must all match
+        return ' '.join(f'"{term}"' for term in terms)
+
+    def get_search_params(self, match_query, offset, limit):
+        return [HIGHLIGHT_START, HIGHLIGHT_END, HIGHLIGHT_START, HIGHLIGHT_END, match_query, limit, offset]
+
+
+class PostgreSQLSearchBackend(SearchBackend):
+    """
+    A generated (weighted) tsvector column on the documents table with a GIN index. The page is ranked in a
+    subquery, so the (expensive) headlines are only generated for the rows of the page
+    """
+    config = 'english'
+    index_name = 'search_document_vector_idx'
+    headline_options = f'StartSel="{HIGHLIGHT_START}", StopSel="{HIGHLIGHT_END}"'
+    count_sql = (
+        f"SELECT COUNT(*) FROM {SearchDocument._meta.db_table} "
+        f"WHERE search_vector @@ plainto_tsquery('{config}', %s)"
+    )
+    search_sql = f"""
+        SELECT document.id, document.content_type_id, document.object_id, document.question_id, document.title,
+               ts_headline('{config}', document.title, document.query, %s) AS title_highlight,
+               ts_headline('{config}', document.body, document.query, %s) AS snippet,
+               document.score
+        FROM (
+            SELECT id, content_type_id, object_id, question_id, title, body, query,
+                   ts_rank_cd(search_vector, query) AS score
+            FROM {SearchDocument._meta.db_table}, plainto_tsquery('{config}', %s) query
+            WHERE search_vector @@ query
+            ORDER BY score DESC, id
+            LIMIT %s OFFSET %s
+        ) document
+        ORDER BY document.score DESC, document.id
+    """
+
+    def install(self, schema_editor):
+        schema_editor.execute(f"""
+            ALTER TABLE {self.table} ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+                setweight(to_tsvector('{self.config}', title), 'A') || setweight(to_tsvector('{self.config}', body), 'B')
+            ) STORED
+        """)
+        schema_editor.execute(f'CREATE INDEX {self.index_name} ON {self.table} USING GIN (search_vector)')
+
+    def uninstall(self, schema_editor):
+        schema_editor.execute(f'DROP INDEX IF EXISTS {self.index_name}')
+        schema_editor.execute(f'ALTER TABLE {self.table} DROP COLUMN IF EXISTS search_vector')
+
+    def optimize(self):
+        # the generated column can't go out of sync, only the planner statistics are refreshed
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'ANALYZE {self.table}')
+
+    def get_match_query(self, terms):
+        return ' '.join(terms)
+
+    def get_search_params(self, match_query, offset, limit):
+        return [f'{self.headline_options}, HighlightAll=true', self.headline_options, match_query, limit, offset]
+
+
+BACKENDS = {
+    'sqlite': SQLiteSearchBackend,
+    'postgresql': PostgreSQLSearchBackend
+}
+
+
+def get_search_backend(connection=default_connection) -> SearchBackend:
+    try:
+        return BACKENDS[connection.vendor](connection)
+    except KeyError:
+        raise ImproperlyConfigured(f'Full text search is not supported on {connection.vendor}.')
+
+
+class SearchResults(object):
+    """
+    Lazy results of a search query, which can be counted and sliced by the paginator like a queryset
+    """
+
+    def __init__(self, query: str, backend: SearchBackend = None):
+        self.terms = get_search_terms(query)
+        self.backend = backend or get_search_backend()
+        self._count = None
+
+    def count(self):
+        if self._count is None:
+            self._count = self.backend.count(self.terms) if self.terms else 0
+
+        return self._count
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice) or key.step is not None:
+            raise TypeError('Search results can only be sliced.')
+
+        offset = key.start or 0
+        limit = (self.count() if key.stop is None else key.stop) - offset
+        if not self.terms or limit <= 0:
+            return []
+
+        results = self.backend.search(self.terms, offset, limit)
+        prefetch_related_objects(results, 'question')
+        for document in results:
+            # served from the content types cache
+            document.content_type = ContentType.objects.get_for_id(document.content_type_id)
+
+        return results
@@ -0,0 +1,54 @@
+from django.contrib.contenttypes.models import ContentType
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from questans.models import Answer, Question
+from search.backends import get_search_backend
+from search.models import SearchDocument
+
+
+class Command(BaseCommand):
+    help = 'Rewrites the search documents of all questions and answers (in batches) and rebuilds the full text index'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        sources = (
+            (Question, Question.objects.only('pk', 'title', 'description')),
+            (Answer, Answer.objects.only('pk', 'question_id', 'content'))
+        )
+        for model, queryset in sources:
+            content_type = ContentType.objects.get_for_model(model)
+            indexed = 0
+            batch = []
+            for obj in queryset.order_by('pk').iterator(chunk_size=batch_size):
+                batch.append(SearchDocument(content_object=obj, **SearchDocument.get_document_values(obj)))
+                if len(batch) >= batch_size:
+                    indexed += self.write_batch(batch)
+                    batch = []
+
+            indexed += self.write_batch(batch)
+
+            # documents left behind by objects deleted without signals (e.g. with raw sql)
+            deleted, _ = SearchDocument.objects.filter(content_type=content_type).exclude(
+                object_id__in=model.objects.values('pk')
+            ).delete()
+            self.stdout.write(f'{model._meta.verbose_name_plural}: {indexed} indexed, {deleted} stale removed')
+
+        get_search_backend().optimize()
+        self.stdout.write(self.style.SUCCESS('Search index rebuilt'))
+
+    def write_batch(self, batch):
+        # each batch is written in its own transaction, so searches keep working while the index is rebuilt
+        with transaction.atomic():
+            SearchDocument.objects.bulk_create(
+                batch,
+                update_conflicts=True,
+                # column names (rather than field names) as Django 4.1 writes the conflict target as given
+                unique_fields=['content_type_id', 'object_id'],
+                update_fields=['question_id', 'title', 'body']
+            )
+
+        return len(batch)
@@ -0,0 +1,50 @@
+from django.db import migrations
+
+BATCH_SIZE = 1000
+
+
+def install_search_index(apps, schema_editor):
+    from search.backends import get_search_backend
+
+    get_search_backend(schema_editor.connection).install(schema_editor)
+
+
+def uninstall_search_index(apps, schema_editor):
+    from search.backends import get_search_backend
+
+    get_search_backend(schema_editor.connection).uninstall(schema_editor)
+
+
+def index_documents(apps, schema_editor):
+    ContentType = apps.get_model('contenttypes', 'ContentType')
+    SearchDocument = apps.get_model('search', 'SearchDocument')
+    Question = apps.get_model('questans', 'Question')
+    Answer = apps.get_model('questans', 'Answer')
+
+    sources = (
+        (Question, lambda question: {'question_id': question.pk, 'title': question.title, 'body': question.description}),
+        (Answer, lambda answer: {'question_id': answer.question_id, 'title': '', 'body': answer.content})
+    )
+    for model, get_values in sources:
+        content_type, _ = ContentType.objects.get_or_create(app_label='questans', model=model._meta.model_name)
+        batch = []
+        for obj in model.objects.order_by('pk').iterator(chunk_size=BATCH_SIZE):
+            batch.append(SearchDocument(content_type=content_type, object_id=obj.pk, **get_values(obj)))
+            if len(batch) >= BATCH_SIZE:
+                SearchDocument.objects.bulk_create(batch)
+                batch = []
+
+        SearchDocument.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('search', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(install_search_index, uninstall_search_index),
+        # the documents are created after the index, so they are indexed by the triggers (or generated column)
+        migrations.RunPython(index_documents, migrations.RunPython.noop)
+    ]
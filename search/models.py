@@ -0,0 +1,61 @@
+from django.contrib.contenttypes.fields import GenericForeignKey
+from django.contrib.contenttypes.models import ContentType
+from django.db import models
+
+from questans.models import Answer, Question
+
+# Create your models here.
+
+
+class SearchDocumentQuerySet(models.QuerySet):
+
+    def for_object(self, obj):
+        return self.filter(content_type=ContentType.objects.get_for_model(obj), object_id=obj.pk)
+
+    def index(self, obj, created: bool = False):
+        """
+        Writes (or rewrites) the search document of a question or an answer, which also updates the full text
+        index (see search.backends)
+        """
+        values = self.model.get_document_values(obj)
+        if not created and self.for_object(obj).update(**values):
+            return
+
+        self.create(content_object=obj, **values)
+
+
+class SearchDocument(models.Model):
+    """
+    The searchable text of a question or an answer. The full text index itself is database specific (an FTS5
+    table kept in sync by triggers on SQLite, a generated tsvector column with a GIN index on PostgreSQL) and is
+    created by a migration, see search.backends
+    """
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE, related_name='+')
+    object_id = models.PositiveIntegerField()
+    content_object = GenericForeignKey('content_type', 'object_id')
+    # the question the document belongs to (the question itself or the question of an answer), so deleting a
+    # question also deletes the documents of its answers
+    question = models.ForeignKey(Question, on_delete=models.CASCADE, related_name='+')
+    title = models.CharField(max_length=120, blank=True)
+    body = models.TextField()
+
+    objects = SearchDocumentQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['content_type', 'object_id'], name='unique_search_document')
+        ]
+
+    def __str__(self):
+        return f'Search document of {self.content_type.model} {self.object_id}'
+
+    @staticmethod
+    def get_document_values(obj):
+        if isinstance(obj, Question):
+            return {'question_id': obj.pk, 'title': obj.title, 'body': obj.description}
+
+        if isinstance(obj, Answer):
+            # answers aren't titled, their question's title is shown with the results instead
+            return {'question_id': obj.question_id, 'title': '', 'body': obj.content}
+
+        raise TypeError(f'{type(obj).__name__} objects are not searchable.')
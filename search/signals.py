@@ -0,0 +1,26 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from questans.models import Answer, Question
+from search.models import SearchDocument
+
+# the fields copied into the search documents, saves that only update other fields don't need to touch the index
+INDEXED_FIELDS = {
+    Question: {'title', 'description'},
+    Answer: {'question', 'content'}
+}
+
+
+@receiver(post_save, sender=Question)
+@receiver(post_save, sender=Answer)
+def index_search_document(sender, instance, created, update_fields=None, **kwargs):
+    if update_fields is not None and INDEXED_FIELDS[sender].isdisjoint(update_fields):
+        return
+
+    SearchDocument.objects.index(instance, created=created)
+
+
+@receiver(post_delete, sender=Answer)
+def delete_search_document(sender, instance, **kwargs):
+    # the documents of deleted questions are deleted by cascade
+    SearchDocument.objects.for_object(instance).delete()
@@ -0,0 +1,98 @@
+from django.db import migrations
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+BATCH_SIZE = 1000
+
+# the models whose `upvotes` and `downvotes` many-to-many tables are replaced by the vote table
+VOTABLE_MODELS = (
+    ('questans', 'Question'),
+    ('questans', 'Answer'),
+    ('comments', 'Comment')
+)
+VOTE_FIELDS = (
+    ('upvotes', 1),
+    ('downvotes', -1)
+)
+
+
+def get_through_model(model, field_name):
+    field = model._meta.get_field(field_name)
+    return field.remote_field.through, field.m2m_field_name(), field.m2m_reverse_field_name()
+
+
+def vote_count_subquery(Vote, content_type, condition):
+    return Coalesce(
+        Subquery(
+            Vote.objects.filter(condition, content_type=content_type, object_id=OuterRef('pk')).order_by()
+            .values('object_id').annotate(count=Count('pk')).values('count')[:1]
+        ),
+        0
+    )
+
+
+def copy_m2m_votes(apps, schema_editor):
+    ContentType = apps.get_model('contenttypes', 'ContentType')
+    Vote = apps.get_model('votes', 'Vote')
+
+    for app_label, model_name in VOTABLE_MODELS:
+        model = apps.get_model(app_label, model_name)
+        content_type, _ = ContentType.objects.get_or_create(app_label=app_label, model=model._meta.model_name)
+
+        # upvotes are copied first, so in the unlikely case that a user has both voted up and down on an object
+        # the conflicting downvote is dropped by the unique constraint
+        for field_name, value in VOTE_FIELDS:
+            through, object_fk_name, user_fk_name = get_through_model(model, field_name)
+            rows = through.objects.values_list(f'{object_fk_name}_id', f'{user_fk_name}_id').order_by('pk')
+            batch = []
+            for object_id, user_id in rows.iterator(chunk_size=BATCH_SIZE):
+                batch.append(Vote(user_id=user_id, content_type=content_type, object_id=object_id, value=value))
+                if len(batch) >= BATCH_SIZE:
+                    Vote.objects.bulk_create(batch, ignore_conflicts=True)
+                    batch = []
+
+            Vote.objects.bulk_create(batch, ignore_conflicts=True)
+
+        # recounting from the vote table keeps the denormalized counts consistent with any dropped duplicates
+        model.objects.update(
+            upvote_count=vote_count_subquery(Vote, content_type, Q(value=1)),
+            downvote_count=vote_count_subquery(Vote, content_type, Q(value=-1))
+        )
+        model.objects.update(score=F('upvote_count') - F('downvote_count'))
+
+
+def copy_votes_to_m2m(apps, schema_editor):
+    ContentType = apps.get_model('contenttypes', 'ContentType')
+    Vote = apps.get_model('votes', 'Vote')
+
+    for app_label, model_name in VOTABLE_MODELS:
+        model = apps.get_model(app_label, model_name)
+        content_type, _ = ContentType.objects.get_or_create(app_label=app_label, model=model._meta.model_name)
+
+        for field_name, value in VOTE_FIELDS:
+            through, object_fk_name, user_fk_name = get_through_model(model, field_name)
+            rows = Vote.objects.filter(content_type=content_type, value=value).values_list('object_id', 'user_id')
+            batch = []
+            for object_id, user_id in rows.order_by('pk').iterator(chunk_size=BATCH_SIZE):
+                batch.append(through(**{f'{object_fk_name}_id': object_id, f'{user_fk_name}_id': user_id}))
+                if len(batch) >= BATCH_SIZE:
+                    through.objects.bulk_create(batch, ignore_conflicts=True)
+                    batch = []
+
+            through.objects.bulk_create(batch, ignore_conflicts=True)
+
+    Vote.objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('comments', '0002_add_vote_counts'),
+        ('questans', '0007_add_vote_counts'),
+        ('votes', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(copy_m2m_votes, copy_votes_to_m2m)
+    ]
@@ -0,0 +1,158 @@
+from typing import Tuple
+
+from django.conf import settings
+from django.contrib.contenttypes.fields import (GenericForeignKey,
+                                                GenericRelation)
+from django.contrib.contenttypes.models import ContentType
+from django.db import IntegrityError, models, transaction
+from django.db.models import F
+from django.utils.translation import gettext_lazy as _
+
+from profiles.reputation import add_reputation, get_vote_points
+
+# Create your models here.
+
+
+class VoteQuerySet(models.QuerySet):
+
+    def for_object(self, obj):
+        return self.filter(content_type=ContentType.objects.get_for_model(obj), object_id=obj.pk)
+
+    def toggle(self, user, obj, value: int) -> Tuple[int, int]:
+        """
+        Toggles the user's vote (`value` is Vote.UPVOTE or Vote.DOWNVOTE) on obj and applies the change to obj's
+        vote counts (and to its owner's reputation), returning the previous and the resulting vote values (0 meaning
+        no vote).
+
+        The user's existing vote row is locked, then a single delete, update or insert is run, so concurrent
+        toggles on the same object are serialized instead of overwriting each other.
+        """
+        qs = self.filter(user=user).for_object(obj)
+        with transaction.atomic():
+            previous = qs.select_for_update().values_list('value', flat=True).first() or 0
+            if previous == value:
+                qs.delete()
+                current = 0
+            elif previous:
+                qs.update(value=value)
+                current = value
+            else:
+                try:
+                    with transaction.atomic():
+                        self.create(user=user, content_object=obj, value=value)
+                except IntegrityError:
+                    # a concurrent toggle by the same user inserted the vote first, so the toggle is run again
+                    # against that (now existing) vote
+                    return self.toggle(user, obj, value)
+
+                current = value
+
+            upvotes = (current == Vote.UPVOTE) - (previous == Vote.UPVOTE)
+            downvotes = (current == Vote.DOWNVOTE) - (previous == Vote.DOWNVOTE)
+            type(obj).objects.filter(pk=obj.pk).update(
+                upvote_count=F('upvote_count') + upvotes,
+                downvote_count=F('downvote_count') + downvotes,
+                score=F('score') + current - previous,
+                **type(obj).get_vote_updates()
+            )
+            # obj's owner gains (or loses) the points of the vote
+            add_reputation({obj.user_id: get_vote_points(type(obj), upvotes, downvotes)})
+
+        return previous, current
+
+
+class Vote(models.Model):
+    UPVOTE = 1
+    DOWNVOTE = -1
+    VALUE_CHOICES = (
+        (UPVOTE, _('Upvote')),
+        (DOWNVOTE, _('Downvote'))
+    )
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='votes')
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE, related_name='votes')
+    object_id = models.PositiveIntegerField()
+    content_object = GenericForeignKey('content_type', 'object_id')
+    value = models.SmallIntegerField(choices=VALUE_CHOICES)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    objects = VoteQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            # also serves as the index for looking up an object's votes and the viewer's votes on a page of objects
+            models.UniqueConstraint(fields=['content_type', 'object_id', 'user'], name='unique_user_vote')
+        ]
+
+    def __str__(self):
+        return f"{self.user}'s {self.get_value_display().lower()}"
+
+
+def get_toggled_value(previous: int, value: int) -> int:
+    # toggling the vote the user has already cast removes it, toggling another value casts (or replaces) it
+    return 0 if previous == value else value
+
+
+class PendingVoteQuerySet(models.QuerySet):
+
+    def enqueue(self, user, obj, value: int) -> Tuple[int, int]:
+        """
+        Appends a toggle of the user's vote on obj to the outbox instead of applying it (see votes.write_behind),
+        returning the vote values expected before and after it, from the user's vote and pending toggles
+        """
+        content_type = ContentType.objects.get_for_model(obj)
+        previous = Vote.objects.filter(user=user).for_object(obj).values_list('value', flat=True).first() or 0
+        pending = self.filter(user=user, content_type=content_type, object_id=obj.pk).order_by('pk')
+        for pending_value in pending.values_list('value', flat=True):
+            previous = get_toggled_value(previous, pending_value)
+
+        self.create(user=user, content_type=content_type, object_id=obj.pk, value=value)
+        return previous, get_toggled_value(previous, value)
+
+
+class PendingVote(models.Model):
+    """
+    A vote toggle waiting to be applied, for the write-behind mode of the vote toggles (settings.VOTE_WRITE_BEHIND)
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='+')
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE, related_name='+')
+    object_id = models.PositiveIntegerField()
+    value = models.SmallIntegerField(choices=Vote.VALUE_CHOICES)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    objects = PendingVoteQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # backs the lookup of the user's pending toggles on an object when a toggle is enqueued
+            models.Index(fields=['user', 'content_type', 'object_id'], name='pending_vote_user_object_idx')
+        ]
+
+    def __str__(self):
+        return f"{self.user}'s pending {self.get_value_display().lower()} toggle"
+
+
+class VotableModel(models.Model):
+    """
+    Abstract base for models that can be upvoted and downvoted. The vote counts are denormalized onto the model
+    (and kept in sync by `Vote.objects.toggle`) so that listing objects doesn't need to count their votes
+    """
+    votes = GenericRelation(Vote)
+    upvote_count = models.PositiveIntegerField(default=0, editable=False)
+    downvote_count = models.PositiveIntegerField(default=0, editable=False)
+    score = models.IntegerField(default=0, editable=False)
+
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def get_vote_updates(cls) -> dict:
+        """
+        Returns the other columns to update (in the same statement as the vote counts) when objects of the model are
+        voted on
+        """
+        return {}
+
+    @property
+    def total_points(self):
+        return self.score
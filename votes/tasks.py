@@ -0,0 +1,16 @@
+from celery import shared_task
+from celery.utils.log import get_task_logger
+
+from votes.write_behind import apply_pending_votes
+
+logger = get_task_logger(__name__)
+
+
+@shared_task(name='apply pending votes')
+def apply_votes():
+    """
+    Applies the vote toggles enqueued in write-behind mode, see votes.write_behind
+    """
+    applied = apply_pending_votes()
+    logger.info(f'applied {applied} pending vote toggles')
+    return applied
@@ -0,0 +1,143 @@
+import time
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+
+from profiles.reputation import add_reputation, get_vote_points
+from votes.models import PendingVote, Vote, get_toggled_value
+
+# Write-behind vote toggles. When settings.VOTE_WRITE_BEHIND is on, the toggle endpoints only validate the toggle
+# and append it to the PendingVote outbox table (a short insert that doesn't lock the voted object), and a
+# periodic task (see votes.tasks) applies the outbox in batches.
+#
+# The toggles of a batch are grouped by user and object and folded (in the order they were made) into their net
+# effect, so repeated toggles of the same vote cost nothing once they cancel out, and the objects' vote counts (and
+# their owners' reputations) are updated with one statement per content type and distinct count change rather than
+# one per toggle. Votes and counts lag by up to the task's schedule interval, toggles are never lost since they're
+# only deleted from the outbox in the transaction that applies them
+APPLY_LOCK_KEY = 'pending-votes:apply-lock'
+# A run stops starting batches after APPLY_RUN_DURATION seconds and the next runs (every 5 seconds, see
+# settings.CELERY_BEAT_SCHEDULE) carry on, so a backlog can't hold the lock indefinitely. The lock is released when
+# a run ends, its timeout only frees it if the worker died during one, and it's longer than a run plus the longest
+# batch, since a lock that expired during a run would let another run apply the same toggles
+APPLY_RUN_DURATION = 60
+APPLY_LOCK_TIMEOUT = APPLY_RUN_DURATION + 240
+BATCH_SIZE = 500
+
+VoteKey = Tuple[int, int, int]
+
+
+def get_object_owners(pending_votes: List[PendingVote]) -> Dict[int, Dict[int, int]]:
+    """
+    Returns the users of the voted objects by content type and object id, toggles of objects deleted since they
+    were enqueued are dropped
+    """
+    object_ids = defaultdict(set)
+    for pending_vote in pending_votes:
+        object_ids[pending_vote.content_type_id].add(pending_vote.object_id)
+
+    return {
+        content_type_id: dict(
+            ContentType.objects.get_for_id(content_type_id).model_class().objects.filter(pk__in=ids)
+            .values_list('pk', 'user_id')
+        )
+        for content_type_id, ids in object_ids.items()
+    }
+
+
+def apply_batch(pending_votes: List[PendingVote]):
+    owners = get_object_owners(pending_votes)
+    toggles: Dict[VoteKey, List[int]] = defaultdict(list)
+    for pending_vote in pending_votes:
+        if pending_vote.object_id in owners[pending_vote.content_type_id]:
+            key = (pending_vote.content_type_id, pending_vote.object_id, pending_vote.user_id)
+            toggles[key].append(pending_vote.value)
+
+    # a superset of the votes of the batch, filtered below
+    votes = {
+        (vote.content_type_id, vote.object_id, vote.user_id): vote
+        for vote in Vote.objects.filter(
+            content_type__in={key[0] for key in toggles},
+            object_id__in={key[1] for key in toggles},
+            user__in={key[2] for key in toggles}
+        ).only('pk', 'content_type_id', 'object_id', 'user_id', 'value')
+    }
+
+    deleted, updated, created = [], defaultdict(list), []
+    counts = defaultdict(lambda: [0, 0])
+    for key, values in toggles.items():
+        vote = votes.get(key)
+        previous = current = vote.value if vote is not None else 0
+        for value in values:
+            current = get_toggled_value(current, value)
+
+        if current == previous:
+            continue
+
+        if not current:
+            deleted.append(vote.pk)
+        elif previous:
+            updated[current].append(vote.pk)
+        else:
+            content_type_id, object_id, user_id = key
+            created.append(Vote(content_type_id=content_type_id, object_id=object_id, user_id=user_id, value=current))
+
+        object_counts = counts[key[:2]]
+        object_counts[0] += (current == Vote.UPVOTE) - (previous == Vote.UPVOTE)
+        object_counts[1] += (current == Vote.DOWNVOTE) - (previous == Vote.DOWNVOTE)
+
+    Vote.objects.filter(pk__in=deleted).delete()
+    for value, vote_ids in updated.items():
+        Vote.objects.filter(pk__in=vote_ids).update(value=value)
+
+    Vote.objects.bulk_create(created)
+
+    objects_by_counts = defaultdict(list)
+    for (content_type_id, object_id), (upvotes, downvotes) in counts.items():
+        if upvotes or downvotes:
+            objects_by_counts[(content_type_id, upvotes, downvotes)].append(object_id)
+
+    points_by_user = defaultdict(int)
+    for (content_type_id, upvotes, downvotes), object_ids in objects_by_counts.items():
+        model = ContentType.objects.get_for_id(content_type_id).model_class()
+        model.objects.filter(pk__in=object_ids).update(
+            upvote_count=F('upvote_count') + upvotes,
+            downvote_count=F('downvote_count') + downvotes,
+            score=F('score') + upvotes - downvotes,
+            **model.get_vote_updates()
+        )
+        for object_id in object_ids:
+            points_by_user[owners[content_type_id][object_id]] += get_vote_points(model, upvotes, downvotes)
+
+    add_reputation(points_by_user)
+
+
+def apply_pending_votes(batch_size: int = BATCH_SIZE) -> int:
+    """
+    Applies the pending vote toggles in batches of `batch_size` (oldest first) for up to APPLY_RUN_DURATION seconds,
+    and returns the number of toggles applied
+    """
+    # the lock keeps overlapping runs from applying the same toggles twice
+    if not cache.add(APPLY_LOCK_KEY, 1, timeout=APPLY_LOCK_TIMEOUT):
+        return 0
+
+    applied, deadline = 0, time.monotonic() + APPLY_RUN_DURATION
+    try:
+        while True:
+            with transaction.atomic():
+                pending_votes = list(PendingVote.objects.order_by('pk')[:batch_size])
+                if not pending_votes:
+                    return applied
+
+                apply_batch(pending_votes)
+                PendingVote.objects.filter(pk__in=[pending_vote.pk for pending_vote in pending_votes]).delete()
+
+            applied += len(pending_votes)
+            if len(pending_votes) < batch_size or time.monotonic() > deadline:
+                return applied
+    finally:
+        cache.delete(APPLY_LOCK_KEY)